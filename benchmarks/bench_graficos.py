@@ -0,0 +1,98 @@
+"""Benchmark de los gráficos del PDF: PNG a 200 dpi contra SVG vectorial (tamaño y tiempo).
+
+Genera la misma propuesta (con la hoja de incertidumbre, es decir, los cinco gráficos) en cada formato y
+mide, por separado:
+  - el renderizado de los gráficos con la caché vacía (lo que paga la primera propuesta o un cambio de datos);
+  - generar_pdf() completo en frío (caché vacía) y en caliente (gráficos ya memoizados);
+  - el tamaño de cada gráfico y del PDF final.
+
+Uso:
+    python benchmarks/bench_graficos.py [--repeticiones 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hsp import graficos  # noqa: E402
+from hsp.calculos import calcular_propuesta  # noqa: E402
+from hsp.montecarlo import simular_montecarlo  # noqa: E402
+from hsp.propuesta_pdf import generar_pdf  # noqa: E402
+
+
+def _propuesta():
+    p = calcular_propuesta({"tipo_proyecto": "Comercial", "modelo_horario": True},
+                           ["15/01/2024", "15/02/2024", "15/03/2024", "15/04/2024"], [980.0, 1040.0, 1228.0, 1105.0])
+    p["montecarlo"] = simular_montecarlo(
+        p["generacion_y1"], p["costo_kwh"], p["inv_final"], p["deg_y1_pct"] / 100,
+        p["atenuacion_pct"] / 100, p["tipo_proyecto"], p["anios_beneficio"], simulaciones=20_000, semilla=0,
+    )
+    return p
+
+
+def _graficos(p, formato):
+    """Los cinco gráficos del PDF, en el orden en que aparecen."""
+    return {
+        "historico": graficos.grafico_historico(p["meses_hist"], p["valores_hist"], p["promedio_hist"],
+                                                 formato=formato),
+        "cobertura": graficos.grafico_cobertura(p["pct_autosuficiencia"], formato),
+        "tarifas": graficos.grafico_tarifas(p["costo_kwh"], p["tarifa_nivelada"], formato),
+        "recuperacion": graficos.grafico_recuperacion([0] + p["años"], [0] + p["acumulados"], p["inv_final"],
+                                                      p["tipo_proyecto"], p["anios_beneficio"], p["payback_exacto"],
+                                                      formato),
+        "incertidumbre": graficos.grafico_incertidumbre(*p["montecarlo"]["histograma_payback"], p["montecarlo"]["payback"],
+                                                        formato),
+    }
+
+
+def _mejor(funcion, repeticiones, antes=None):
+    tiempos = []
+    for _ in range(repeticiones):
+        if antes:
+            antes()
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    p = _propuesta()
+    generar_pdf(dict(p, formato_graficos="png"))  # calentamiento: fuentes, activos e imports de fpdf2
+
+    filas = {}
+    for formato in graficos.FORMATOS:
+        propuesta = dict(p, formato_graficos=formato)
+        t_graficos, generados = _mejor(lambda: _graficos(p, formato), args.repeticiones, graficos.CACHE_GRAFICOS.limpiar)
+        t_frio, pdf = _mejor(lambda: generar_pdf(propuesta), args.repeticiones, graficos.CACHE_GRAFICOS.limpiar)
+        t_caliente, _ = _mejor(lambda: generar_pdf(propuesta), args.repeticiones)
+        filas[formato] = {
+            "graficos_s": t_graficos, "pdf_frio_s": t_frio, "pdf_caliente_s": t_caliente, "pdf_bytes": len(pdf),
+            "bytes_por_grafico": {nombre: len(g["datos"]) for nombre, g in generados.items()},
+        }
+
+    print(f"{'':24}" + "".join(f"{formato.upper():>14}" for formato in filas))
+    for clave, etiqueta, formato_valor in (
+        ("graficos_s", "5 gráficos (frío)", "{:>13.3f}s"),
+        ("pdf_frio_s", "generar_pdf (frío)", "{:>13.3f}s"),
+        ("pdf_caliente_s", "generar_pdf (caliente)", "{:>13.3f}s"),
+        ("pdf_bytes", "tamaño del PDF", "{:>12,.0f} B"),
+    ):
+        print(f"{etiqueta:24}" + "".join(formato_valor.format(fila[clave]) for fila in filas.values()))
+    for nombre in filas["png"]["bytes_por_grafico"]:
+        print(f"{'  ' + nombre:24}" + "".join(f"{fila['bytes_por_grafico'][nombre]:>12,.0f} B" for fila in filas.values()))
+
+    png, svg = filas["png"], filas["svg"]
+    print(f"\nSVG: PDF {1 - svg['pdf_bytes'] / png['pdf_bytes']:.0%} más liviano; "
+          f"gráficos en frío {png['graficos_s'] / svg['graficos_s']:.1f}x más rápidos; "
+          f"generar_pdf en frío {png['pdf_frio_s'] / svg['pdf_frio_s']:.1f}x.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Benchmark del Monte Carlo del payback: 100 000 flujos de caja a 30 años deben correr en menos de 1 s.
+
+Usa una semilla fija, así que además verifica que dos corridas den exactamente los mismos percentiles.
+Sale con código 1 si se supera el límite de tiempo (apto para CI).
+
+Uso:
+    python benchmarks/bench_montecarlo.py [--simulaciones 100000] [--repeticiones 5] [--limite 1.0]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hsp.calculos import calcular_propuesta  # noqa: E402
+from hsp.montecarlo import simular_montecarlo  # noqa: E402
+
+SEMILLA = 1234
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--simulaciones", type=int, default=100_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--limite", type=float, default=1.0, help="Segundos máximos por corrida (la mejor de las repeticiones).")
+    args = parser.parse_args()
+
+    p = calcular_propuesta({"tipo_proyecto": "Comercial"})
+    entradas = (p["generacion_y1"], p["costo_kwh"], p["inv_final"],
+                p["deg_y1_pct"] / 100, p["atenuacion_pct"] / 100, p["tipo_proyecto"], p["anios_beneficio"])
+
+    tiempos, resultados = [], []
+    for _ in range(args.repeticiones):
+        inicio = time.perf_counter()
+        resultados.append(simular_montecarlo(*entradas, simulaciones=args.simulaciones, semilla=SEMILLA))
+        tiempos.append(time.perf_counter() - inicio)
+
+    r = resultados[0]
+    print(f"{args.simulaciones:,} simulaciones, {args.repeticiones} repeticiones")
+    print(f"  mejor {min(tiempos):.3f} s   mediana {sorted(tiempos)[len(tiempos) // 2]:.3f} s")
+    print(f"  payback P10/P50/P90: {r['payback']['P10']:.2f} / {r['payback']['P50']:.2f} / {r['payback']['P90']:.2f} años")
+    print(f"  ahorro 30 años P10/P50/P90: ${r['ahorro_vida_util']['P10']:,.0f} / ${r['ahorro_vida_util']['P50']:,.0f} / "
+          f"${r['ahorro_vida_util']['P90']:,.0f}")
+
+    if any(otro != r for otro in resultados[1:]):
+        sys.exit("ERROR: la misma semilla dio resultados distintos.")
+    if min(tiempos) > args.limite:
+        sys.exit(f"ERROR: {min(tiempos):.3f} s supera el límite de {args.limite:.3f} s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Benchmark de la lectura de campos de planillas: parser anterior (un re.search/findall por campo sobre
+todo el texto) contra hsp/analizador_planillas.py (una pasada por las líneas).
+
+El corpus son los textos anonimizados de fixtures/planillas/ y, de cada uno, tres variantes: con fines
+de línea CRLF, con un anexo de OCR largo (líneas de 300 caracteres sin "/", el peor caso del patrón de
+la dirección) y con cada línea partida en dos (los campos que cruzan saltos de línea). Para cada texto
+se comprueba que ambos parsers den exactamente el mismo resultado y se mide el tiempo medio por planilla.
+Al final se lista el formato detectado de cada fixture (hsp/formatos_planilla.py) con su confianza y el
+tiempo medio de la detección por huella.
+
+Uso:
+    python benchmarks/bench_planillas.py [--repeticiones 200]
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hsp.analizador_planillas import analizar_planilla  # noqa: E402
+from hsp.formatos_planilla import analizar, detectar_formato  # noqa: E402
+
+DIRECTORIO_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "planillas")
+
+
+# --- PARSER ANTERIOR (referencia, tal como estaba en hsp/planillas.py) ---
+def _buscar_texto(patron, texto, flags=re.IGNORECASE):
+    m = re.search(patron, texto, flags)
+    if not m:
+        return None
+    return m.group(1).strip()
+
+
+def _extraer_monto_energia(texto):
+    patron_lineas = r"(?:Energ[íi]a\s*Activa[^\n]*|Energ[íi]a\s*Reactiva[^\n]*|Demanda\s*Facturable[^\n]*)"
+    lineas = re.findall(patron_lineas, texto, flags=re.IGNORECASE)
+    montos = []
+    for linea in lineas:
+        numeros = re.findall(r"\d+(?:[.,]\d+)?", linea)
+        if numeros:
+            montos.append(float(numeros[-1].replace(",", ".")))
+    return round(sum(montos), 2) if montos else None
+
+
+def _extraer_valor_total_respaldo(texto):
+    patrones = [
+        r"(?:VALOR\s*A\s*PAGAR|VALOR\s*TOTAL\s*A\s*PAGAR|VALOR\s*TOTAL)[^\d]{0,20}(\d[\d.,]*\d|\d)",
+        r"(?:TOTAL\s*A\s*PAGAR|TOTAL\s*PLANILLA|TOTAL\s*FACTURA|TOTAL\s*GENERAL|TOTAL\s*USD|IMPORTE\s*A\s*PAGAR|PAGO\s*TOTAL)[^\d]{0,20}(\d[\d.,]*\d|\d)",
+    ]
+    for patron in patrones:
+        coincidencias = re.findall(patron, texto, flags=re.IGNORECASE)
+        if coincidencias:
+            try:
+                return float(coincidencias[-1].replace(",", "."))
+            except ValueError:
+                pass
+    coincidencias_dolar = re.findall(r"\$\s*(\d[\d.,]*\d|\d)", texto)
+    if coincidencias_dolar:
+        try:
+            return float(coincidencias_dolar[-1].replace(",", "."))
+        except ValueError:
+            pass
+    return None
+
+
+def extraer_datos_planilla_anterior(texto):
+    consumos = [float(x.replace(",", ".")) for x in re.findall(r"(\d{2,5}(?:[.,]\d+)?)\s*kWh", texto, flags=re.IGNORECASE)]
+    m_estructura = re.search(r"\b(\d{9,15})\s*\n\s*([A-ZÁÉÍÓÚÑ][A-ZÁÉÍÓÚÑ ]{9,60})\n", texto)
+    contrato = m_estructura.group(1) if m_estructura else _buscar_texto(
+        r"(?:N[uú]mero\s*de\s*Cuenta\s*Contrato|Cuenta\s*Contrato|N[°º]?\s*de?\s*Contrato|N[uú]mero\s*de\s*Suministro)[:\s#Nn°º]*([\w\-]{4,20})", texto)
+    cliente = m_estructura.group(2).strip() if m_estructura else _buscar_texto(
+        r"(?:Nombre\s*del?\s*Cliente|Cliente)[:\s]+([A-ZÁÉÍÓÚÑ][^\n]{3,60})", texto)
+    direccion = None
+    candidatas_direccion = re.findall(r"[^\n]{25,180}/[^\n]{3,100}", texto)
+    if candidatas_direccion:
+        direccion = max(candidatas_direccion, key=len).strip()
+    if not direccion:
+        direccion = _buscar_texto(r"(?:Direcci[oó]n\s*del?\s*servicio|Direcci[oó]n)[:\s]+([^\n]{5,120})", texto)
+    monto_energia = _extraer_monto_energia(texto)
+    valor_pagar = monto_energia if monto_energia is not None else _extraer_valor_total_respaldo(texto)
+    etiqueta_mes = None
+    m_fechas = re.search(r"Fecha\s*desde\s*Fecha\s*hasta[^\d]{0,40}(\d{2}[-/]\d{2}[-/]\d{4})\s+(\d{2}[-/]\d{2}[-/]\d{4})", texto, flags=re.IGNORECASE)
+    if m_fechas:
+        etiqueta_mes = m_fechas.group(2)
+    return {
+        "cliente": cliente,
+        "contrato": contrato,
+        "direccion": direccion,
+        "valor_pagar": valor_pagar,
+        "consumos_kwh": consumos,
+        "etiqueta_mes": etiqueta_mes,
+    }
+
+
+# --- CORPUS ---
+_ANEXO_OCR = "\n".join(
+    " ".join(f"PUNTO{(i * 7 + j) % 97:02d} RECAUDACION AUTORIZADA AGENCIA" for j in range(8)) for i in range(40)
+)
+
+
+def _partir_lineas(texto):
+    """Cada línea larga partida en dos por un espacio central (como un OCR que corta la fila)."""
+    partidas = []
+    for linea in texto.split("\n"):
+        corte = linea.find(" ", len(linea) // 2)
+        partidas.append(linea if corte < 0 else linea[:corte] + "\n" + linea[corte:])
+    return "\n".join(partidas)
+
+
+def corpus():
+    textos = {}
+    for ruta in sorted(glob.glob(os.path.join(DIRECTORIO_FIXTURES, "*.txt"))):
+        nombre = os.path.splitext(os.path.basename(ruta))[0]
+        with open(ruta, encoding="utf-8") as f:
+            texto = f.read()
+        textos[nombre] = texto
+        textos[nombre + "+crlf"] = texto.replace("\n", "\r\n")
+        textos[nombre + "+anexo_ocr"] = texto + "\n" + _ANEXO_OCR
+        textos[nombre + "+lineas_partidas"] = _partir_lineas(texto)
+    return textos
+
+
+def _medio(parser, textos, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for texto in textos:
+            parser(texto)
+    return (time.perf_counter() - inicio) / (repeticiones * len(textos))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=200)
+    args = parser.parse_args()
+
+    textos = corpus()
+    distintos = [nombre for nombre, texto in textos.items()
+                 if analizar_planilla(texto) != extraer_datos_planilla_anterior(texto)]
+    print(f"{len(textos)} textos, {len(textos) - len(distintos)} con resultado idéntico")
+    for nombre in distintos:
+        print(f"  DISTINTO: {nombre}")
+
+    grupos = {
+        "fixtures": [t for n, t in textos.items() if "+" not in n],
+        "con anexo OCR": [t for n, t in textos.items() if n.endswith("+anexo_ocr")],
+        "todo el corpus": list(textos.values()),
+    }
+    print(f"{'':18}{'anterior':>12}{'una pasada':>12}")
+    for grupo, lista in grupos.items():
+        t_anterior = _medio(extraer_datos_planilla_anterior, lista, args.repeticiones)
+        t_nuevo = _medio(analizar_planilla, lista, args.repeticiones)
+        print(f"{grupo:18}{t_anterior * 1e6:10.1f}us{t_nuevo * 1e6:10.1f}us  ({t_anterior / t_nuevo:.1f}x)")
+
+    print()
+    for nombre, texto in textos.items():
+        if "+" not in nombre:
+            datos = analizar(texto)
+            print(f"{nombre:32}{datos['formato']:>12}  confianza {datos['confianza']:.2f}")
+    t_deteccion = _medio(detectar_formato, grupos["todo el corpus"], args.repeticiones)
+    print(f"detección de formato: {t_deteccion * 1e6:.1f}us por planilla")
+    sys.exit(1 if distintos else 0)
+
+
+if __name__ == "__main__":
+    main()
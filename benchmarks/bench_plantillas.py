@@ -0,0 +1,76 @@
+"""Benchmark de las plantillas del PDF: N propuestas distintas con y sin reutilizar las partes fijas.
+
+Genera N propuestas (clientes y consumos distintos, gráficos ya memoizados) y mide el tiempo medio de
+generar_pdf():
+  - sin reutilización: la caché de plantillas se vacía antes de cada documento (cada uno dibuja todo);
+  - con reutilización: el primer documento graba los fragmentos fijos y los demás los copian.
+También escribe las N propuestas directo a archivo (generar_pdf(propuesta, ruta)) e informa la memoria
+máxima del proceso, que no debería crecer con N.
+
+Uso:
+    python benchmarks/bench_plantillas.py [--propuestas 20]
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hsp import graficos  # noqa: E402
+from hsp.calculos import calcular_propuesta  # noqa: E402
+from hsp.plantillas import CACHE_PLANTILLAS  # noqa: E402
+from hsp.propuesta_pdf import generar_pdf  # noqa: E402
+
+
+def _propuestas(n):
+    return [
+        calcular_propuesta({"nombre_cliente": f"Cliente {i}", "tipo_proyecto": "Comercial" if i % 2 else "Residencial"},
+                           ["15/01/2024", "15/02/2024"], [900.0 + 37 * i, 700.0 + 11 * i])
+        for i in range(n)
+    ]
+
+
+def _memoria_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _medio(propuestas, antes=None):
+    inicio = time.perf_counter()
+    for p in propuestas:
+        if antes:
+            antes()
+        generar_pdf(p)
+    return (time.perf_counter() - inicio) / len(propuestas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--propuestas", type=int, default=20)
+    args = parser.parse_args()
+
+    propuestas = _propuestas(args.propuestas)
+    graficos.CACHE_GRAFICOS.max_entradas = 5 * len(propuestas)  # que se mida el PDF, no redibujar gráficos
+    for p in propuestas:
+        generar_pdf(p)  # calentamiento: gráficos memoizados, activos interpretados
+
+    t_sin = _medio(propuestas, CACHE_PLANTILLAS.limpiar)
+    CACHE_PLANTILLAS.limpiar()
+    t_con = _medio(propuestas)
+    print(f"{'sin reutilización':24}{t_sin * 1000:10.1f} ms/propuesta")
+    print(f"{'con reutilización':24}{t_con * 1000:10.1f} ms/propuesta  ({t_sin / t_con:.2f}x)")
+    print(f"{'plantillas':24}{CACHE_PLANTILLAS.estadisticas()}")
+
+    with tempfile.TemporaryDirectory() as directorio:
+        memoria = []
+        for i, p in enumerate(propuestas):
+            generar_pdf(p, os.path.join(directorio, f"{i}.pdf"))
+            if (i + 1) % max(1, len(propuestas) // 5) == 0:
+                memoria.append(f"{i + 1}: {_memoria_mb():.0f} MB")
+    print(f"{'memoria máxima (a disco)':24}  " + ", ".join(memoria))
+
+
+if __name__ == "__main__":
+    main()
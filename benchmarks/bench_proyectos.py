@@ -0,0 +1,79 @@
+"""Benchmark del almacén de proyectos (hsp/proyectos.py): guardar, cargar y buscar con N proyectos.
+
+Genera N proyectos sintéticos (cliente, contrato, ciudad, 12 meses de histórico, 12 planillas leídas y
+su meteorología) en una base temporal y mide el tiempo medio de cargar() por número de proyecto y de
+buscar() por palabra del cliente, prefijo del contrato y ciudad.
+
+Uso:
+    python benchmarks/bench_proyectos.py [--proyectos 5000] [--consultas 200]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hsp.calculos import ENTRADAS_DEFAULT  # noqa: E402
+from hsp.clima import ciudades_data, resolver_meteorologia  # noqa: E402
+from hsp.proyectos import AlmacenProyectos  # noqa: E402
+
+NOMBRES = ("María", "José", "Ángel", "Lucía", "Pedro", "Carmen", "Jorge", "Rosa", "Luis", "Elena")
+APELLIDOS = ("Pérez", "Zambrano", "Martillo", "Jara", "Salazar", "Quimis", "Vélez", "Cedeño", "Mora", "Andrade")
+
+
+def _proyecto(i, azar):
+    ciudad = azar.choice(list(ciudades_data))
+    entradas = dict(ENTRADAS_DEFAULT, n_proyecto=f"P{i:010d}", ciudad_sel=ciudad,
+                    nombre_cliente=f"{azar.choice(APELLIDOS)} {azar.choice(APELLIDOS)} {azar.choice(NOMBRES)}",
+                    numero_contrato=str(100000000000 + azar.randrange(10 ** 11)), inv_total=9000.0)
+    meses = [f"01/{m:02d}/2024" for m in range(1, 13)]
+    valores = [float(azar.randrange(200, 2000)) for _ in meses]
+    planillas = [{"archivo": f"{mes[3:5]}.pdf", "hash": f"{i:08x}{k:056x}",
+                  "datos": {"etiqueta_mes": mes, "consumos_kwh": [valor], "valor_pagar": round(valor * 0.092, 2)}}
+                 for k, (mes, valor) in enumerate(zip(meses, valores))]
+    meteo = {"ubicacion": [ciudad, False, False, None, None], "meteo": resolver_meteorologia(ciudad, False)}
+    return entradas, meses, valores, planillas, meteo
+
+
+def _medio(funcion, argumentos):
+    inicio = time.perf_counter()
+    for argumento in argumentos:
+        funcion(argumento)
+    return (time.perf_counter() - inicio) / len(argumentos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--proyectos", type=int, default=5000)
+    parser.add_argument("--consultas", type=int, default=200)
+    args = parser.parse_args()
+
+    azar = random.Random(0)
+    with tempfile.TemporaryDirectory() as directorio:
+        almacen = AlmacenProyectos(os.path.join(directorio, "proyectos.sqlite"))
+        proyectos = [_proyecto(i, azar) for i in range(args.proyectos)]
+        inicio = time.perf_counter()
+        for entradas, meses, valores, planillas, meteo in proyectos:
+            almacen.guardar(entradas["n_proyecto"], entradas, meses, valores, planillas, meteo)
+        t_guardar = (time.perf_counter() - inicio) / len(proyectos)
+
+        muestra = [azar.choice(proyectos)[0] for _ in range(args.consultas)]
+        t_cargar = _medio(almacen.cargar, [e["n_proyecto"] for e in muestra])
+        busquedas = {
+            "apellido": [e["nombre_cliente"].split()[1] for e in muestra],
+            "prefijo de contrato": [e["numero_contrato"][:7] for e in muestra],
+            "ciudad": [e["ciudad_sel"] for e in muestra],
+            "apellido + ciudad": [f"{e['nombre_cliente'].split()[0]} {e['ciudad_sel']}" for e in muestra],
+        }
+        print(f"{args.proyectos} proyectos ({almacen.estadisticas()['terminos']} términos indexados)")
+        print(f"{'guardar':28}{t_guardar * 1000:8.2f} ms")
+        print(f"{'cargar':28}{t_cargar * 1000:8.2f} ms")
+        for nombre, textos in busquedas.items():
+            print(f"{'buscar ' + nombre:28}{_medio(almacen.buscar, textos) * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
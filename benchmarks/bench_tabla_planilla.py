@@ -0,0 +1,170 @@
+"""Benchmark de la tabla de facturación por geometría: texto aplanado de todas las páginas contra
+hsp/tabla_facturacion.py (recuadro de la tabla, página por página).
+
+Las planillas de fixtures/planillas/ que tienen tabla de rubros se dibujan como PDF digital (fpdf2): la
+tabla en columnas (Cantidad, Precio Unitario, Monto) y, a la derecha y a la misma altura de sus filas,
+un recuadro con el historial de consumos, como en las planillas reales; después, --anexos hojas de
+texto (condiciones, puntos de pago). Cada planilla se genera además con las líneas de la tabla
+dibujadas (la ruta de extract_tables()). Para cada una se compara el monto de energía y los kWh con los
+que dice la tabla del fixture, y se mide el tiempo medio de lectura.
+
+Uso:
+    python benchmarks/bench_tabla_planilla.py [--anexos 8] [--repeticiones 5]
+"""
+import argparse
+import glob
+import io
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdfplumber  # noqa: E402
+from fpdf import FPDF  # noqa: E402
+
+from hsp.planillas import extraer_datos_planilla, extraer_texto_detallado  # noqa: E402
+
+DIRECTORIO_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "planillas")
+_RE_NUMERO = re.compile(r"^\$?\d[\d.,]*$")
+_RE_TOTAL = re.compile(r"^(?:VALOR|TOTAL)\b", re.IGNORECASE)
+_HISTORIAL = ("ENE-24 651", "DIC-23 702", "NOV-23 688", "OCT-23 640", "SEP-23 615", "AGO-23 633", "JUL-23 690")
+
+
+# --- PLANILLAS PDF ---
+def _partes_tabla(lineas):
+    """Divide el fixture en (antes, encabezado, filas, despues); las filas sin números (rubro partido en
+    dos líneas) se unen a la siguiente."""
+    i = next(i for i, linea in enumerate(lineas) if linea.startswith("Rubro"))
+    filas, pendiente, j = [], "", i + 1
+    while j < len(lineas) and not _RE_TOTAL.match(lineas[j]):
+        linea = (pendiente + " " + lineas[j].strip()).strip()
+        if any(_RE_NUMERO.match(t) for t in linea.split()):
+            filas.append(linea)
+            pendiente = ""
+        else:
+            pendiente = linea
+        j += 1
+    return lineas[:i], lineas[i], filas, lineas[j:]
+
+
+def _celdas(fila):
+    """(concepto, cantidad, precio, monto) de una fila: con tres números son las tres columnas; con uno,
+    el monto."""
+    tokens = fila.split()
+    primero = next(i for i, t in enumerate(tokens) if _RE_NUMERO.match(t))
+    concepto, resto = " ".join(tokens[:primero]), tokens[primero:]
+    numeros = [t for t in resto if _RE_NUMERO.match(t)]
+    if len(numeros) >= 3:
+        unidad = " kWh" if "kWh" in resto else ""
+        return concepto, numeros[0] + unidad, numeros[1], numeros[2]
+    return concepto, "", "", numeros[-1]
+
+
+def planilla_pdf(texto, anexos, con_lineas):
+    antes, _, filas, despues = _partes_tabla(texto.split("\n"))
+    pdf = FPDF(format="A4")
+    pdf.set_auto_page_break(False)
+    pdf.add_page()
+    pdf.set_font("Helvetica", size=9)
+    y = 15
+    for linea in antes:
+        pdf.text(15, y, linea)
+        y += 5
+    borde = 1 if con_lineas else 0
+    pdf.set_xy(15, y)
+    for texto_celda, ancho in (("Rubro", 55), ("Cantidad", 25), ("Precio Unitario", 25), ("Monto ($)", 22)):
+        pdf.cell(ancho, 5, texto_celda, border=borde, align="L" if ancho == 55 else "R")
+    pdf.text(150, y + 3.5, "Historial (kWh)")
+    for k, fila in enumerate(filas):
+        y += 5
+        pdf.set_xy(15, y)
+        for texto_celda, ancho in zip(_celdas(fila), (55, 25, 25, 22)):
+            pdf.cell(ancho, 5, texto_celda, border=borde, align="L" if ancho == 55 else "R")
+        if k < len(_HISTORIAL):
+            pdf.text(150, y + 3.5, _HISTORIAL[k])
+    y += 10
+    for linea in despues:
+        pdf.text(15, y, linea)
+        y += 5
+    for n in range(anexos):
+        pdf.add_page()
+        for k in range(50):
+            pdf.text(15, 15 + 5 * k, f"ANEXO {n + 1}.{k + 1} PUNTO DE RECAUDACION AUTORIZADO AGENCIA {k * 37 % 101:03d} "
+                                     f"HORARIO DE ATENCION LUNES A VIERNES")
+    return bytes(pdf.output())
+
+
+def valores_tabla(texto):
+    """Lo que dice la tabla del fixture: suma de la columna Monto de las filas de energía y kWh de la
+    columna Cantidad de Energía Activa."""
+    montos, consumos = [], []
+    for fila in _partes_tabla(texto.split("\n"))[2]:
+        concepto, cantidad, _, monto = _celdas(fila)
+        if re.search(r"Energ[íi]a\s*(?:Activa|Reactiva)|Demanda\s*Facturable", concepto, re.IGNORECASE):
+            montos.append(float(monto.replace(",", ".")))
+        if re.search(r"Energ[íi]a\s*Activa", concepto, re.IGNORECASE):
+            consumos.append(float(cantidad.split()[0].replace(",", ".")))
+    return {"valor_pagar": round(sum(montos), 2), "consumos_kwh": consumos}
+
+
+def corpus(anexos):
+    planillas = {}
+    for ruta in sorted(glob.glob(os.path.join(DIRECTORIO_FIXTURES, "*.txt"))):
+        with open(ruta, encoding="utf-8") as f:
+            texto = f.read()
+        if not any(linea.startswith("Rubro") for linea in texto.split("\n")):
+            continue
+        nombre = os.path.splitext(os.path.basename(ruta))[0]
+        esperado = valores_tabla(texto)
+        for sufijo, con_lineas in (("", False), ("+lineas", True)):
+            planillas[nombre + sufijo] = (planilla_pdf(texto, anexos, con_lineas), esperado)
+    return planillas
+
+
+# --- LECTURAS ---
+def lectura_anterior(datos):
+    """Como antes: extract_text() de todas las páginas y los campos del texto aplanado."""
+    texto = ""
+    with pdfplumber.open(io.BytesIO(datos)) as pdf:
+        for pagina in pdf.pages:
+            texto += (pagina.extract_text() or "") + "\n"
+    return extraer_datos_planilla(texto), len(pdf.pages)
+
+
+def lectura_nueva(datos):
+    lectura = extraer_texto_detallado(datos, "planilla.pdf")
+    return extraer_datos_planilla(lectura["texto"], lectura["tabla"]), lectura["paginas_procesadas"]
+
+
+def _medio(lectura, datos, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        lectura(datos)
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--anexos", type=int, default=8)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'':28}{'anterior':>26}{'tabla por geometría':>30}")
+    errores = 0
+    for nombre, (datos, esperado) in corpus(args.anexos).items():
+        fila = f"{nombre:28}"
+        for lectura in (lectura_anterior, lectura_nueva):
+            resultado, paginas = lectura(datos)
+            correcto = (resultado["valor_pagar"] == esperado["valor_pagar"]
+                        and resultado["consumos_kwh"] == esperado["consumos_kwh"])
+            errores += lectura is lectura_nueva and not correcto
+            t = _medio(lectura, datos, args.repeticiones)
+            fila += f"{t * 1000:8.1f} ms {paginas:2d} pág {'ok' if correcto else 'MAL':>4} ${resultado['valor_pagar']!s:>7}"
+        print(fila)
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Lógica de cálculo y generación de propuestas de Latitud Solar, independiente de la interfaz Streamlit (app.py)."""
@@ -0,0 +1,162 @@
+"""Línea de comandos: python -m hsp <comando> ...
+
+    python -m hsp lote planillas/ --salida propuestas/ [--procesos 8] [--ciudad Quito] [--tipo-proyecto Comercial]
+    python -m hsp clima prefetch [--paso 0.5] [--hilos 8] [--forzar] [--db .cache/clima.sqlite]
+    python -m hsp clima indice [--paso 0.5] [--db .cache/clima.sqlite] [--salida .cache/clima_grilla.npz]
+    python -m hsp activos [--forzar] [--dpi 200]
+"""
+import argparse
+import os
+import sys
+
+from hsp.calculos import ENTRADAS_DEFAULT
+from hsp.clima import ciudades_data
+
+
+def _comando_lote(args):
+    from hsp.almacen_clima import AlmacenClima
+    from hsp.clima import resolver_meteorologia
+    from hsp.lote import procesar_lote
+    from hsp.nasa_power import obtener_climatologia_lote
+
+    entradas_base = {
+        "ciudad_sel": args.ciudad,
+        "tipo_proyecto": args.tipo_proyecto,
+        "costo_kwp": args.costo_kwp,
+        "usar_tiempo_real": args.tiempo_real,
+        "vendedor": args.vendedor,
+        "modelo_horario": args.horario,
+        "balance_autoconsumo": args.autoconsumo,
+        "tarifa_excedentes": args.tarifa_excedentes,
+        "formato_graficos": args.graficos,
+    }
+
+    def al_avanzar(ruta, resumen, error):
+        nombre = os.path.basename(ruta)
+        if error is None:
+            print(f"  OK     {nombre} -> {resumen['archivo_pdf']} ({resumen['segundos']:.2f} s)")
+        else:
+            print(f"  FALLO  {nombre}: {error}")
+
+    # Sin nadie esperando en una interfaz, el lote consulta NASA POWER con el perfil que reintenta
+    almacen = (AlmacenClima(consultar=obtener_climatologia_lote) if args.tiempo_real or args.lat is not None
+               else None)
+    coordenadas = {}
+    if args.lat is not None and args.lon is not None:
+        from hsp.interpolacion import IndiceClimatico
+        coordenadas = {"lat": args.lat, "lon": args.lon, "indice": IndiceClimatico.desde_almacen(almacen)}
+    if args.tiempo_real:
+        meteo = resolver_meteorologia(args.ciudad, True, consultar_nasa=almacen.obtener, **coordenadas)
+        if meteo["fallo_nasa"]:
+            print("Aviso: NASA POWER no respondió y no hay climatología guardada; se usan valores de referencia locales.")
+    else:
+        meteo = resolver_meteorologia(args.ciudad, False, **coordenadas)
+    print(f"Meteorología: {meteo['fuente_meteo']} (HSP {meteo['hsp_avg']:.2f} h/día, {meteo['temp_prom']:.1f} °C)")
+
+    informe = procesar_lote(args.entrada, args.salida, entradas_base, procesos=args.procesos, al_avanzar=al_avanzar,
+                            meteo=meteo)
+    print(
+        f"\n{informe['archivos']} planillas en {informe['segundos']:.1f} s "
+        f"({informe['archivos_por_segundo']:.2f} archivos/s, {informe['procesos']} procesos): "
+        f"{informe['exitos']} propuestas generadas, {len(informe['fallos'])} fallos."
+    )
+    return 1 if informe["fallos"] else 0
+
+
+def _comando_clima_prefetch(args):
+    from hsp.almacen_clima import RUTA_DEFAULT, AlmacenClima, coordenadas_prefetch
+
+    almacen = AlmacenClima(ruta=args.db or RUTA_DEFAULT)
+    coordenadas = coordenadas_prefetch(paso=args.paso)
+    print(f"Precargando {len(coordenadas)} coordenadas en {almacen.ruta} ...")
+
+    def al_avanzar(lat, lon, estado):
+        if estado != "vigente":
+            print(f"  {estado:<10} {lat:7.2f}, {lon:7.2f}")
+
+    resumen = almacen.prefetch(coordenadas, forzar=args.forzar, al_avanzar=al_avanzar, hilos=args.hilos)
+    print(
+        f"\n{resumen['descargada']} descargadas, {resumen['vigente']} ya vigentes, {resumen['fallo']} fallos. "
+        f"Total en el almacén: {almacen.estadisticas()['entradas']}."
+    )
+    return 1 if resumen["fallo"] else 0
+
+
+def _comando_clima_indice(args):
+    from hsp.almacen_clima import RUTA_DEFAULT, AlmacenClima
+    from hsp.interpolacion import IndiceClimatico
+
+    almacen = AlmacenClima(ruta=args.db or RUTA_DEFAULT)
+    indice = IndiceClimatico.desde_almacen(almacen, paso=args.paso)
+    salida = args.salida or os.path.join(os.path.dirname(almacen.ruta), "clima_grilla.npz")
+    indice.guardar(salida)
+    print(
+        f"Grilla {len(indice.lats)} x {len(indice.lons)} ({args.paso}°) a partir de {len(indice.puntos[0])} puntos "
+        f"conocidos -> {salida}"
+    )
+    return 0
+
+
+def _comando_activos(args):
+    from hsp.activos import AlmacenActivos
+
+    almacen = AlmacenActivos(dpi=args.dpi)
+    resumen = almacen.preparar(forzar=args.forzar)
+    print(
+        f"{resumen['procesados']} activos procesados, {resumen['vigentes']} ya vigentes -> {almacen.destino}\n"
+        f"{resumen['bytes_origen'] / 1024:,.0f} KB originales -> {resumen['bytes'] / 1024:,.0f} KB insertados en el PDF."
+    )
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m hsp", description="Herramientas de Latitud Solar sin interfaz.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_lote = sub.add_parser("lote", aliases=["batch"], help="Genera una propuesta (PDF + JSON) por cada planilla de una carpeta.")
+    p_lote.add_argument("entrada", help="Carpeta con planillas (PDF, JPG o PNG).")
+    p_lote.add_argument("--salida", "--out", required=True, help="Carpeta donde se escriben los PDF y JSON.")
+    p_lote.add_argument("--procesos", type=int, default=None, help="Procesos en paralelo (por defecto, uno por núcleo).")
+    p_lote.add_argument("--ciudad", choices=list(ciudades_data), default=ENTRADAS_DEFAULT["ciudad_sel"])
+    p_lote.add_argument("--tipo-proyecto", choices=["Residencial", "Comercial"], default=ENTRADAS_DEFAULT["tipo_proyecto"])
+    p_lote.add_argument("--costo-kwp", type=float, default=ENTRADAS_DEFAULT["costo_kwp"])
+    p_lote.add_argument("--vendedor", default=ENTRADAS_DEFAULT["vendedor"])
+    p_lote.add_argument("--lat", type=float, default=None, help="Latitud exacta del proyecto (con --lon; interpola HSP y temperatura).")
+    p_lote.add_argument("--lon", type=float, default=None, help="Longitud exacta del proyecto.")
+    p_lote.add_argument("--horario", action="store_true", help="Generación con la simulación horaria (8760 h) en lugar del modelo mensual.")
+    p_lote.add_argument("--autoconsumo", action="store_true",
+                        help="Valora solo el autoconsumo al costo del kWh y los excedentes a --tarifa-excedentes (balance hora a hora).")
+    p_lote.add_argument("--tarifa-excedentes", type=float, default=ENTRADAS_DEFAULT["tarifa_excedentes"],
+                        help="USD por kWh exportado a la red con --autoconsumo (por defecto 0).")
+    p_lote.add_argument("--graficos", choices=["png", "svg"], default=None,
+                        help="Formato de los gráficos del PDF: png (200 dpi) o svg (vectorial). Por defecto png o $HSP_FORMATO_GRAFICOS.")
+    p_lote.add_argument("--tiempo-real", action="store_true", help="Consultar NASA POWER (por defecto, valores de referencia locales).")
+    p_lote.set_defaults(funcion=_comando_lote)
+
+    p_clima = sub.add_parser("clima", help="Almacén local de climatología de NASA POWER.")
+    sub_clima = p_clima.add_subparsers(dest="accion", required=True)
+    p_prefetch = sub_clima.add_parser("prefetch", help="Precarga las ciudades y una grilla sobre Ecuador (la app queda sin depender de la red).")
+    p_prefetch.add_argument("--paso", type=float, default=0.5, help="Separación de la grilla en grados (por defecto 0.5).")
+    p_prefetch.add_argument("--hilos", type=int, default=8, help="Consultas simultáneas a NASA POWER (por defecto 8).")
+    p_prefetch.add_argument("--forzar", action="store_true", help="Vuelve a descargar aunque la entrada esté vigente.")
+    p_prefetch.add_argument("--db", default=None, help="Ruta del archivo SQLite (por defecto .cache/clima.sqlite o $HSP_CACHE_DIR).")
+    p_prefetch.set_defaults(funcion=_comando_clima_prefetch)
+    p_indice = sub_clima.add_parser("indice", help="Precalcula la grilla interpolada de HSP/temperatura (.npz) a partir del almacén.")
+    p_indice.add_argument("--paso", type=float, default=0.5, help="Separación de la grilla en grados (por defecto 0.5).")
+    p_indice.add_argument("--db", default=None, help="Ruta del archivo SQLite (por defecto .cache/clima.sqlite o $HSP_CACHE_DIR).")
+    p_indice.add_argument("--salida", default=None, help="Archivo .npz de salida (por defecto clima_grilla.npz junto al almacén).")
+    p_indice.set_defaults(funcion=_comando_clima_indice)
+
+    p_activos = sub.add_parser("activos", help="Reduce y recomprime los logos y fotos de assets/ para el PDF (.cache/activos).")
+    p_activos.add_argument("--forzar", action="store_true", help="Vuelve a procesar aunque el manifiesto esté vigente.")
+    p_activos.add_argument("--dpi", type=int, default=200, help="Resolución de impresión (por defecto 200).")
+    p_activos.set_defaults(funcion=_comando_activos)
+
+    args = parser.parse_args(argv)
+    if args.funcion is _comando_lote and (args.lat is None) != (args.lon is None):
+        p_lote.error("--lat y --lon van juntos")
+    return args.funcion(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
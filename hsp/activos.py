@@ -0,0 +1,229 @@
+"""Activos fijos del PDF (logos y fotos de portafolio de assets/) preprocesados una vez y reutilizados.
+
+Los archivos de assets/ vienen tal como salieron del material original: logo_icono.png tiene 1024 px
+(414 KB) para imprimirse a 14 mm, y la mitad de las fotos de portafolio son PNG RGBA de ~500 KB
+cuya transparencia se reduce a los bordes. Cada pdf.image() los decodificaba y recomprimía de nuevo,
+y PIL los abría otra vez solo para conocer su proporción. Aquí:
+
+  - preparar() reduce cada activo a su tamaño máximo de impresión (ANCHO_IMPRESION_MM a DPI_ACTIVOS)
+    y lo recomprime: JPEG si es opaco o casi (se aplana sobre blanco, el color de la página), PNG
+    optimizado si la transparencia es parte del dibujo, como en los logos (si el resultado no es más
+    liviano, se usa el original). Los archivos van a .cache/activos/ con un manifest.json que guarda
+    sus dimensiones; solo se reprocesa lo que cambió (tamaño o fecha del original, o los parámetros);
+  - la proporción de cada activo sale del manifiesto, sin abrir la imagen;
+  - insertar() reutiliza entre documentos la imagen ya interpretada por fpdf2 (datos comprimidos,
+    máscara de transparencia): el primer PDF del proceso la lee del disco y los siguientes solo la
+    registran en su propio image_cache.
+
+`python -m hsp activos` los prepara de antemano (al construir la imagen del despliegue); la app y el
+lote también los preparan al arrancar.
+"""
+import json
+import os
+import threading
+
+from fpdf.image_parsing import get_img_info
+from PIL import Image
+
+from hsp.plantillas import CACHE_PLANTILLAS, registrar_imagen
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASSETS_DIR = os.path.join(BASE_DIR, "assets")
+DIR_PROCESADOS = os.path.join(os.environ.get("HSP_CACHE_DIR", os.path.join(BASE_DIR, ".cache")), "activos")
+
+EXTENSIONES_ACTIVOS = (".png", ".jpg", ".jpeg")
+DPI_ACTIVOS = 200  # la misma resolución de los gráficos (graficos.DPI)
+CALIDAD_JPEG = 85
+# Ancho máximo (mm) con que se imprime cada activo; el resto, a lo sumo el ancho útil de la página.
+ANCHO_IMPRESION_MM = {
+    "logo_portada.png": 130,  # portada (en el encabezado va a 32 mm)
+    "logo_icono.png": 14,     # encabezado de casos de éxito
+}
+ANCHO_IMPRESION_DEFAULT_MM = 180
+# Hasta esta fracción de píxeles transparentes (bordes recortados de una foto) se aplana y va como JPEG.
+FRACCION_TRANSPARENTE_MAX = 0.05
+
+
+def _usa_transparencia(img):
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        histograma = img.convert("RGBA").getchannel("A").histogram()
+        return 1 - histograma[255] / (img.width * img.height) > FRACCION_TRANSPARENTE_MAX
+    return False
+
+
+def aplanar_sobre_blanco(img):
+    """Imagen RGB con la transparencia compuesta sobre blanco (el color de la página del PDF)."""
+    if img.mode in ("RGBA", "LA", "P"):
+        fondo = Image.new("RGB", img.size, (255, 255, 255))
+        fondo.paste(img.convert("RGBA"), mask=img.convert("RGBA").getchannel("A"))
+        return fondo
+    return img.convert("RGB")
+
+
+def _procesar(ruta_origen, destino, ancho_mm, dpi):
+    """Reduce y recomprime un activo en `destino`. Devuelve (archivo, ancho_px, alto_px): archivo es
+    el nombre dentro de `destino`, o None si el original ya era lo más liviano."""
+    nombre = os.path.basename(ruta_origen)
+    ancho_max_px = round(ancho_mm / 25.4 * dpi)
+    with Image.open(ruta_origen) as img:
+        img.load()
+        transparente = _usa_transparencia(img)
+        img = img.convert("RGBA") if transparente else aplanar_sobre_blanco(img)
+        if img.width > ancho_max_px:
+            img = img.resize((ancho_max_px, round(img.height * ancho_max_px / img.width)), Image.LANCZOS)
+        archivo = os.path.splitext(nombre)[0] + (".png" if transparente else ".jpg")
+        temporal = os.path.join(destino, f".{archivo}.{os.getpid()}.tmp")
+        if transparente:
+            img.save(temporal, format="PNG", optimize=True)
+        else:
+            img.save(temporal, format="JPEG", quality=CALIDAD_JPEG, optimize=True)
+        ancho_px, alto_px = img.size
+
+    if os.path.getsize(temporal) >= os.path.getsize(ruta_origen):
+        os.remove(temporal)
+        with Image.open(ruta_origen) as img:
+            return None, *img.size
+    os.replace(temporal, os.path.join(destino, archivo))  # atómico: otro proceso nunca ve un archivo a medias
+    return archivo, ancho_px, alto_px
+
+
+class AlmacenActivos:
+    """Activos de `origen` preprocesados en `destino`, con su manifiesto de dimensiones y las imágenes ya
+    interpretadas por fpdf2 (compartidas entre los PDF del proceso). Segura entre hilos."""
+
+    def __init__(self, origen=ASSETS_DIR, destino=DIR_PROCESADOS, dpi=DPI_ACTIVOS):
+        self.origen = origen
+        self.destino = destino
+        self.dpi = dpi
+        self._manifiesto = None
+        self._interpretadas = {}
+        self._lock = threading.Lock()
+        self.reutilizadas = 0
+        self.interpretadas = 0
+
+    @property
+    def ruta_manifiesto(self):
+        return os.path.join(self.destino, "manifest.json")
+
+    def preparar(self, forzar=False):
+        """Procesa los activos nuevos o modificados y reescribe el manifiesto. Devuelve un resumen:
+        procesados, vigentes, bytes_origen y bytes (total de los originales y de lo que se inserta)."""
+        with self._lock:
+            anterior = {} if forzar else self._leer_manifiesto()
+            nombres = sorted(n for n in os.listdir(self.origen) if n.lower().endswith(EXTENSIONES_ACTIVOS)) \
+                if os.path.isdir(self.origen) else []
+            os.makedirs(self.destino, exist_ok=True)
+
+            manifiesto = {}
+            procesados = 0
+            for nombre in nombres:
+                ruta_origen = os.path.join(self.origen, nombre)
+                info = os.stat(ruta_origen)
+                ancho_mm = ANCHO_IMPRESION_MM.get(nombre, ANCHO_IMPRESION_DEFAULT_MM)
+                firma = [info.st_size, info.st_mtime_ns, ancho_mm, self.dpi, CALIDAD_JPEG, FRACCION_TRANSPARENTE_MAX]
+                entrada = anterior.get(nombre)
+                if entrada is None or entrada["firma"] != firma or not os.path.exists(self._ruta_entrada(nombre, entrada)):
+                    archivo, ancho_px, alto_px = _procesar(ruta_origen, self.destino, ancho_mm, self.dpi)
+                    entrada = {
+                        "archivo": archivo, "ancho_px": ancho_px, "alto_px": alto_px, "firma": firma,
+                        "bytes_origen": info.st_size,
+                        "bytes": os.path.getsize(os.path.join(self.destino, archivo)) if archivo else info.st_size,
+                    }
+                    procesados += 1
+                manifiesto[nombre] = entrada
+
+            if manifiesto != anterior:
+                temporal = f"{self.ruta_manifiesto}.{os.getpid()}.tmp"
+                with open(temporal, "w", encoding="utf-8") as f:
+                    json.dump(manifiesto, f, indent=2)
+                os.replace(temporal, self.ruta_manifiesto)
+                vigentes = {e["archivo"] for e in manifiesto.values()} | {"manifest.json"}
+                for archivo in os.listdir(self.destino):
+                    if archivo not in vigentes and not archivo.endswith(".tmp"):
+                        os.remove(os.path.join(self.destino, archivo))  # versiones anteriores de un activo
+            if manifiesto != self._manifiesto:
+                self._interpretadas.clear()
+                CACHE_PLANTILLAS.limpiar()  # los fragmentos grabados llevan las imágenes anteriores
+            self._manifiesto = manifiesto
+
+        return {
+            "procesados": procesados,
+            "vigentes": len(manifiesto) - procesados,
+            "bytes_origen": sum(e["bytes_origen"] for e in manifiesto.values()),
+            "bytes": sum(e["bytes"] for e in manifiesto.values()),
+        }
+
+    def entrada(self, nombre):
+        """Entrada del manifiesto ({archivo, ancho_px, alto_px, ...}) o None si el activo no existe.
+        La primera consulta del proceso prepara los activos."""
+        if self._manifiesto is None:
+            self.preparar()
+        return self._manifiesto.get(nombre)
+
+    def ruta(self, nombre):
+        """Ruta del archivo que se inserta en el PDF (el procesado o, si no ganó nada, el original)."""
+        entrada = self.entrada(nombre)
+        return self._ruta_entrada(nombre, entrada) if entrada else None
+
+    def proporcion(self, nombre):
+        """Ancho / alto del activo, o None si no existe."""
+        entrada = self.entrada(nombre)
+        return entrada["ancho_px"] / entrada["alto_px"] if entrada else None
+
+    def alto_mm(self, nombre, ancho_mm):
+        return ancho_mm / self.proporcion(nombre)
+
+    def insertar(self, pdf, nombre, x=None, y=None, w=0, h=0):
+        """pdf.image() del activo, registrando antes en el documento la imagen ya interpretada (si otro PDF
+        del proceso la usó). Devuelve False, sin insertar nada, si el activo no existe."""
+        ruta = self.ruta(nombre)
+        if ruta is None:
+            return False
+        if ruta not in pdf.image_cache.images:
+            with self._lock:
+                info = self._interpretadas.get(ruta)
+                if info is None:
+                    info = get_img_info(ruta, image_filter=pdf.image_cache.image_filter)
+                    self.interpretadas += 1
+                    if info.get("iccp") is None:  # con perfil ICC el documento debe registrar el perfil: no se comparte
+                        self._interpretadas[ruta] = info
+                else:
+                    self.reutilizadas += 1
+            if info.get("iccp") is None:
+                registrar_imagen(pdf, ruta, info)  # fpdf2 le suma el uso al encontrarla dentro de image()
+        pdf.image(ruta, x=x, y=y, w=w, h=h)
+        return True
+
+    def limpiar(self):
+        """Olvida el manifiesto y las imágenes interpretadas (la próxima consulta vuelve a preparar)."""
+        with self._lock:
+            self._manifiesto = None
+            self._interpretadas.clear()
+            CACHE_PLANTILLAS.limpiar()
+
+    def estadisticas(self):
+        manifiesto = self._manifiesto or {}
+        consultas = self.reutilizadas + self.interpretadas
+        return {
+            "activos": len(manifiesto),
+            "bytes_origen": sum(e["bytes_origen"] for e in manifiesto.values()),
+            "bytes": sum(e["bytes"] for e in manifiesto.values()),
+            "interpretadas": self.interpretadas,
+            "reutilizadas": self.reutilizadas,
+            "tasa_reutilizacion": self.reutilizadas / consultas if consultas else 0.0,
+        }
+
+    def _ruta_entrada(self, nombre, entrada):
+        if entrada["archivo"] is None:
+            return os.path.join(self.origen, nombre)
+        return os.path.join(self.destino, entrada["archivo"])
+
+    def _leer_manifiesto(self):
+        try:
+            with open(self.ruta_manifiesto, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+
+ACTIVOS = AlmacenActivos()
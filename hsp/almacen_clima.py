@@ -0,0 +1,212 @@
+"""Almacén persistente (SQLite) de la climatología de NASA POWER, con réplica local para trabajar sin red.
+
+La caché de Streamlit se pierde en cada reinicio y es por proceso, así que cada arranque en frío pagaba
+la consulta a NASA POWER (hasta 8 s de timeout) o caía a los valores de ciudades_data. Aquí cada
+respuesta se guarda por coordenada redondeada (la climatología de NASA POWER tiene ~0.5° de
+resolución; redondear a 0.1° no pierde información y hace que coordenadas cercanas compartan entrada):
+
+  - entrada vigente  -> se devuelve sin tocar la red;
+  - entrada vencida  -> se devuelve igual (stale-while-revalidate) y se refresca en un hilo aparte;
+  - sin entrada      -> se consulta a NASA POWER y se guarda.
+
+`python -m hsp clima prefetch` precarga todas las ciudades de ciudades_data y una grilla sobre el
+Ecuador continental, de modo que la app arranca sin depender de la red.
+"""
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+from hsp.clima import ciudades_data, obtener_datos_nasa_power
+from hsp.nasa_power import HILOS_DEFAULT, PERFIL_LOTE
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_DEFAULT = os.path.join(os.environ.get("HSP_CACHE_DIR", os.path.join(BASE_DIR, ".cache")), "clima.sqlite")
+
+DECIMALES_COORDENADA = 1
+VIGENCIA_SEGUNDOS = 30 * 86400  # la climatología multi-anual casi no cambia: se revalida una vez al mes
+ESPERA_TRAS_FALLO = 600  # tras un fallo de red, no se reintenta la misma coordenada durante 10 min
+
+# Ecuador continental (aprox.): latitud -5.0 a 1.5, longitud -81.0 a -75.0.
+LIMITES_ECUADOR = {"lat_min": -5.0, "lat_max": 1.5, "lon_min": -81.0, "lon_max": -75.0}
+PASO_GRILLA = 0.5
+
+
+def coordenadas_prefetch(paso=PASO_GRILLA, limites=LIMITES_ECUADOR):
+    """Ciudades de ciudades_data + grilla regular de `paso` grados sobre `limites`, sin duplicados."""
+    coordenadas = [(datos["lat"], datos["lon"]) for datos in ciudades_data.values()]
+    n_lat = int(round((limites["lat_max"] - limites["lat_min"]) / paso)) + 1
+    n_lon = int(round((limites["lon_max"] - limites["lon_min"]) / paso)) + 1
+    for i in range(n_lat):
+        for j in range(n_lon):
+            coordenadas.append((round(limites["lat_min"] + i * paso, 6), round(limites["lon_min"] + j * paso, 6)))
+    return coordenadas
+
+
+class AlmacenClima:
+    """Climatología mensual (hsp y temperatura, 12 valores cada una) por coordenada redondeada.
+    obtener() tiene la misma firma y retorno que clima.obtener_datos_nasa_power, así que se puede
+    pasar como `consultar_nasa` a resolver_meteorologia(). Segura entre hilos: cada operación abre
+    su propia conexión a SQLite.
+    obtener() consulta con `consultar` (por defecto el perfil interactivo de NASA POWER: alguien espera
+    la respuesta); prefetch() y el refresco en segundo plano, con `consultar_lote` (por defecto el perfil
+    con reintentos; si solo se indica `consultar`, se usa esa misma función)."""
+
+    def __init__(self, ruta=RUTA_DEFAULT, consultar=obtener_datos_nasa_power, vigencia=VIGENCIA_SEGUNDOS,
+                 decimales=DECIMALES_COORDENADA, consultar_lote=None):
+        self.ruta = ruta
+        self.consultar = consultar
+        if consultar_lote is None:
+            consultar_lote = (functools.partial(obtener_datos_nasa_power, perfil=PERFIL_LOTE)
+                              if consultar is obtener_datos_nasa_power else consultar)
+        self.consultar_lote = consultar_lote
+        self.vigencia = vigencia
+        self.decimales = decimales
+        self._lock = threading.Lock()
+        self._refrescando = set()
+        self._fallos_recientes = {}
+        self.aciertos = 0
+        self.aciertos_vencidos = 0
+        self.consultas_red = 0
+        self.fallos = 0
+        if os.path.dirname(ruta):
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with self._conectar() as conexion:
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS climatologia ("
+                " lat REAL NOT NULL, lon REAL NOT NULL, hsp TEXT NOT NULL, temp TEXT NOT NULL,"
+                " actualizado REAL NOT NULL, PRIMARY KEY (lat, lon))"
+            )
+
+    # --- API principal ---
+    def obtener(self, lat, lon):
+        """Retorna (hsp_mensual, temp_mensual, exito), desde el almacén si es posible."""
+        clave = self.clave(lat, lon)
+        fila = self._leer(clave)
+        if fila is not None:
+            hsp, temp, actualizado = fila
+            if time.time() - actualizado <= self.vigencia:
+                self.aciertos += 1
+            else:
+                self.aciertos_vencidos += 1
+                self._refrescar_en_segundo_plano(clave)
+            return hsp, temp, True
+
+        if time.time() - self._fallos_recientes.get(clave, float("-inf")) < ESPERA_TRAS_FALLO:
+            self.fallos += 1
+            return None, None, False
+        return self._consultar_y_guardar(clave, self.consultar)
+
+    def prefetch(self, coordenadas=None, forzar=False, al_avanzar=None, hilos=HILOS_DEFAULT):
+        """Descarga y guarda la climatología de cada coordenada (por defecto, coordenadas_prefetch())
+        que falte o esté vencida (todas si forzar=True), con hasta `hilos` consultas simultáneas.
+        al_avanzar(lat, lon, estado) recibe 'vigente', 'descargada' o 'fallo'. Devuelve un resumen
+        con el conteo de cada estado."""
+        resumen = {"vigente": 0, "descargada": 0, "fallo": 0}
+
+        def avisar(clave, estado):
+            resumen[estado] += 1
+            if al_avanzar:
+                al_avanzar(clave[0], clave[1], estado)
+
+        pendientes = []
+        for clave in dict.fromkeys(self.clave(lat, lon) for lat, lon in (coordenadas or coordenadas_prefetch())):
+            fila = None if forzar else self._leer(clave)
+            if fila is not None and time.time() - fila[2] <= self.vigencia:
+                avisar(clave, "vigente")
+            else:
+                pendientes.append(clave)
+
+        if pendientes:
+            with ThreadPoolExecutor(max_workers=max(1, min(hilos, len(pendientes)))) as pool:
+                futuros = {pool.submit(self._consultar_y_guardar, clave, self.consultar_lote): clave
+                           for clave in pendientes}
+                for futuro in as_completed(futuros):
+                    avisar(futuros[futuro], "descargada" if futuro.result()[2] else "fallo")
+        return resumen
+
+    def clave(self, lat, lon):
+        """Coordenada redondeada con la que se guarda y busca cada entrada."""
+        return round(float(lat), self.decimales), round(float(lon), self.decimales)
+
+    def entradas(self):
+        """Lista de (lat, lon, hsp_mensual, temp_mensual) de todo el almacén."""
+        with self._conectar() as conexion:
+            filas = conexion.execute("SELECT lat, lon, hsp, temp FROM climatologia ORDER BY lat, lon").fetchall()
+        return [(lat, lon, json.loads(hsp), json.loads(temp)) for lat, lon, hsp, temp in filas]
+
+    def estadisticas(self):
+        with self._conectar() as conexion:
+            total = conexion.execute("SELECT COUNT(*) FROM climatologia").fetchone()[0]
+        return {
+            "entradas": total,
+            "aciertos": self.aciertos,
+            "aciertos_vencidos": self.aciertos_vencidos,
+            "consultas_red": self.consultas_red,
+            "fallos": self.fallos,
+        }
+
+    def version(self):
+        """(entradas, último `actualizado`): cambia cada vez que se agrega o se refresca una entrada, para
+        que quien arma algo derivado del almacén (p. ej. el índice climático) sepa cuándo rearmarlo."""
+        with self._conectar() as conexion:
+            return tuple(conexion.execute("SELECT COUNT(*), MAX(actualizado) FROM climatologia").fetchone())
+
+    # --- Internos ---
+    @contextmanager
+    def _conectar(self):
+        conexion = sqlite3.connect(self.ruta, timeout=30)
+        try:
+            conexion.execute("PRAGMA journal_mode=WAL")
+            with conexion:  # commit al salir (o rollback si hubo excepción)
+                yield conexion
+        finally:
+            conexion.close()
+
+    def _leer(self, clave):
+        with self._conectar() as conexion:
+            fila = conexion.execute(
+                "SELECT hsp, temp, actualizado FROM climatologia WHERE lat = ? AND lon = ?", clave
+            ).fetchone()
+        if fila is None:
+            return None
+        return json.loads(fila[0]), json.loads(fila[1]), fila[2]
+
+    def _guardar(self, clave, hsp, temp):
+        with self._conectar() as conexion:
+            conexion.execute(
+                "INSERT OR REPLACE INTO climatologia (lat, lon, hsp, temp, actualizado) VALUES (?, ?, ?, ?, ?)",
+                (clave[0], clave[1], json.dumps(hsp), json.dumps(temp), time.time()),
+            )
+
+    def _consultar_y_guardar(self, clave, consultar):
+        hsp, temp, exito = consultar(*clave)
+        if exito:
+            self._guardar(clave, hsp, temp)
+        with self._lock:
+            self.consultas_red += 1
+            if exito:
+                self._fallos_recientes.pop(clave, None)
+            else:
+                self.fallos += 1
+                self._fallos_recientes[clave] = time.time()
+        return hsp, temp, exito
+
+    def _refrescar_en_segundo_plano(self, clave):
+        with self._lock:
+            if clave in self._refrescando or time.time() - self._fallos_recientes.get(clave, float("-inf")) < ESPERA_TRAS_FALLO:
+                return
+            self._refrescando.add(clave)
+
+        def refrescar():
+            try:
+                self._consultar_y_guardar(clave, self.consultar_lote)
+            finally:
+                with self._lock:
+                    self._refrescando.discard(clave)
+
+        threading.Thread(target=refrescar, daemon=True).start()
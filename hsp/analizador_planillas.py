@@ -0,0 +1,186 @@
+"""Lectura de los campos de una planilla eléctrica en una sola pasada por sus líneas.
+
+extraer_datos_planilla() recorría el texto completo una vez por campo (más de diez re.search/re.findall
+con patrones en texto, compilados en cada llamada) y el patrón de la dirección,
+[^\\n]{25,180}/[^\\n]{3,100}, retrocedía en cada posición de cada línea: en un texto OCR largo, sin "/",
+era casi todo el tiempo de la lectura. Aquí:
+
+  - los patrones se compilan una vez, al importar el módulo, y son exactamente los de antes;
+  - una única pasada por las líneas anota cuáles pueden contener cada campo (las que mencionan kWh,
+    Energía/Demanda, "Fecha", las que tienen "/" y largo suficiente para una dirección, las que
+    terminan en un número largo seguido del nombre del cliente);
+  - cada patrón se evalúa solo sobre esos tramos del texto (pattern.search(texto, inicio, fin), sin
+    copiar subcadenas). Un tramo abarca también la línea anterior o siguiente cuando el patrón puede
+    cruzar un salto de línea (p. ej. "728\\nkWh"), así que el resultado es idéntico al de recorrer todo
+    el texto. Los patrones de respaldo (etiquetas de cliente, contrato y dirección, valor total) solo
+    corren si el campo no apareció por la vía principal, como antes.
+
+Ver benchmarks/bench_planillas.py: compara contra la versión anterior (tiempo y resultado) sobre las
+planillas anonimizadas de benchmarks/fixtures/planillas/.
+"""
+import re
+
+# --- PATRONES (compilados una vez) ---
+_RE_CONSUMO = re.compile(r"(\d{2,5}(?:[.,]\d+)?)\s*kWh", re.IGNORECASE)
+# Contrato + Cliente por estructura: número de cuenta contrato seguido del nombre en MAYÚSCULAS.
+_RE_ESTRUCTURA = re.compile(r"\b(\d{9,15})\s*\n\s*([A-ZÁÉÍÓÚÑ][A-ZÁÉÍÓÚÑ ]{9,60})\n")
+_RE_CONTRATO_ETIQUETA = re.compile(
+    r"(?:N[uú]mero\s*de\s*Cuenta\s*Contrato|Cuenta\s*Contrato|N[°º]?\s*de?\s*Contrato|N[uú]mero\s*de\s*Suministro)"
+    r"[:\s#Nn°º]*([\w\-]{4,20})", re.IGNORECASE)
+_RE_CLIENTE_ETIQUETA = re.compile(r"(?:Nombre\s*del?\s*Cliente|Cliente)[:\s]+([A-ZÁÉÍÓÚÑ][^\n]{3,60})", re.IGNORECASE)
+_RE_DIRECCION = re.compile(r"[^\n]{25,180}/[^\n]{3,100}")
+_RE_DIRECCION_ETIQUETA = re.compile(r"(?:Direcci[oó]n\s*del?\s*servicio|Direcci[oó]n)[:\s]+([^\n]{5,120})", re.IGNORECASE)
+_RE_LINEA_ENERGIA = re.compile(
+    r"(?:Energ[íi]a\s*Activa[^\n]*|Energ[íi]a\s*Reactiva[^\n]*|Demanda\s*Facturable[^\n]*)", re.IGNORECASE)
+_RE_NUMERO = re.compile(r"\d+(?:[.,]\d+)?")
+_RE_VALOR_TOTAL = (
+    re.compile(r"(?:VALOR\s*A\s*PAGAR|VALOR\s*TOTAL\s*A\s*PAGAR|VALOR\s*TOTAL)[^\d]{0,20}(\d[\d.,]*\d|\d)", re.IGNORECASE),
+    re.compile(r"(?:TOTAL\s*A\s*PAGAR|TOTAL\s*PLANILLA|TOTAL\s*FACTURA|TOTAL\s*GENERAL|TOTAL\s*USD|IMPORTE\s*A\s*PAGAR"
+               r"|PAGO\s*TOTAL)[^\d]{0,20}(\d[\d.,]*\d|\d)", re.IGNORECASE),
+)
+_RE_DOLAR = re.compile(r"\$\s*(\d[\d.,]*\d|\d)")
+_RE_FECHAS = re.compile(r"Fecha\s*desde\s*Fecha\s*hasta[^\d]{0,40}(\d{2}[-/]\d{2}[-/]\d{4})\s+(\d{2}[-/]\d{2}[-/]\d{4})",
+                        re.IGNORECASE)
+
+# Con IGNORECASE, "i", "s" y "k" también coinciden con estas letras: se igualan antes de buscar palabras clave.
+_EQUIVALENCIAS = str.maketrans({"İ": "i", "ı": "i", "ſ": "s", "K": "k"})
+LARGO_MIN_DIRECCION = 29  # 25 + "/" + 3
+
+
+def _coincidencias(patron, texto, tramos):
+    """Como patron.finditer(texto), pero buscando solo dentro de `tramos` ((inicio, fin), ordenados por
+    inicio; pueden solaparse): cada búsqueda sigue desde el final de la coincidencia anterior."""
+    ultimo = 0
+    for inicio, fin in tramos:
+        pos = max(inicio, ultimo)
+        m = patron.search(texto, pos, fin)
+        while m:
+            yield m
+            ultimo = m.end()
+            m = patron.search(texto, ultimo, fin)
+
+
+def _recorrer_lineas(texto):
+    """La pasada por las líneas: posición de cada una y qué líneas pueden contener cada campo."""
+    posiciones, vacias = [], []
+    consumo, energia, fecha, direccion, estructura = [], [], [], [], []
+    inicio = 0
+    for i, linea in enumerate(texto.split("\n")):
+        largo = len(linea)
+        posiciones.append((inicio, inicio + largo))
+        inicio += largo + 1
+        recortada = linea.rstrip()
+        if not recortada:
+            vacias.append(True)
+            continue
+        vacias.append(False)
+        baja = linea.lower() if linea.isascii() else linea.translate(_EQUIVALENCIAS).lower()
+        if "kwh" in baja:
+            consumo.append(i)
+        if "energ" in baja or "demanda" in baja:
+            energia.append(i)
+        if "fecha" in baja:
+            fecha.append(i)
+        if largo >= LARGO_MIN_DIRECCION and "/" in linea:
+            direccion.append(i)
+        if recortada[-1].isdecimal():
+            estructura.append(i)
+    candidatas = {"consumo": consumo, "energia": energia, "fecha": fecha, "direccion": direccion,
+                  "estructura": estructura}
+    return posiciones, vacias, candidatas
+
+
+def _no_vacia(vacias, i, paso):
+    """Índice de la primera línea no vacía antes (paso=-1) o después (paso=1) de la línea i, o None."""
+    i += paso
+    while 0 <= i < len(vacias):
+        if not vacias[i]:
+            return i
+        i += paso
+    return None
+
+
+def _monto_energia(lineas_energia):
+    """Suma el último número de cada línea de Energía Activa/Reactiva/Demanda Facturable (la columna
+    Monto $): el monto que corresponde SOLO al consumo de energía (sin alumbrado, intereses, IVA...)."""
+    montos = []
+    for linea in lineas_energia:
+        numeros = _RE_NUMERO.findall(linea)
+        if numeros:
+            montos.append(float(numeros[-1].replace(",", ".")))
+    return round(sum(montos), 2) if montos else None
+
+
+def _valor_total_respaldo(texto):
+    """Respaldo si no se pudo aislar el monto de energía: el Valor/Total general de la factura."""
+    for patron in _RE_VALOR_TOTAL + (_RE_DOLAR,):
+        coincidencias = patron.findall(texto)
+        if coincidencias:
+            try:
+                return float(coincidencias[-1].replace(",", "."))
+            except ValueError:
+                pass
+    return None
+
+
+def _texto_etiqueta(patron, texto):
+    m = patron.search(texto)
+    return m.group(1).strip() if m else None
+
+
+def analizar_planilla(texto):
+    """Campos de la planilla: {cliente, contrato, direccion, valor_pagar, consumos_kwh, etiqueta_mes}
+    (ver planillas.extraer_datos_planilla)."""
+    posiciones, vacias, candidatas = _recorrer_lineas(texto)
+
+    # kWh: el número puede estar al final de la línea no vacía anterior ("728\nkWh").
+    tramos = []
+    for i in candidatas["consumo"]:
+        anterior = _no_vacia(vacias, i, -1)
+        tramos.append((posiciones[i if anterior is None else anterior][0], posiciones[i][1]))
+    consumos = [float(m.group(1).replace(",", ".")) for m in _coincidencias(_RE_CONSUMO, texto, tramos)]
+
+    # Contrato + Cliente por estructura: la línea termina en el número y el nombre ocupa la siguiente no vacía.
+    m_estructura = None
+    for i in candidatas["estructura"]:
+        siguiente = _no_vacia(vacias, i, 1)
+        if siguiente is not None:
+            m_estructura = _RE_ESTRUCTURA.search(texto, posiciones[i][0], posiciones[siguiente][1] + 1)
+            if m_estructura:
+                break
+    if m_estructura:
+        contrato, cliente = m_estructura.group(1), m_estructura.group(2).strip()
+    else:
+        contrato = _texto_etiqueta(_RE_CONTRATO_ETIQUETA, texto)
+        cliente = _texto_etiqueta(_RE_CLIENTE_ETIQUETA, texto)
+
+    # Dirección: la línea más larga con separadores "/" típicos de sectores/urbanizaciones.
+    candidatas_direccion = [m.group(0) for m in _coincidencias(_RE_DIRECCION, texto,
+                                                               [posiciones[i] for i in candidatas["direccion"]])]
+    direccion = max(candidatas_direccion, key=len).strip() if candidatas_direccion else None
+    if not direccion:
+        direccion = _texto_etiqueta(_RE_DIRECCION_ETIQUETA, texto)
+
+    # Monto de energía: "Energía" y "Activa" pueden quedar en líneas distintas.
+    tramos = []
+    for i in candidatas["energia"]:
+        siguiente = _no_vacia(vacias, i, 1)
+        tramos.append((posiciones[i][0], posiciones[i if siguiente is None else siguiente][1]))
+    monto_energia = _monto_energia(m.group(0) for m in _coincidencias(_RE_LINEA_ENERGIA, texto, tramos))
+    valor_pagar = monto_energia if monto_energia is not None else _valor_total_respaldo(texto)
+
+    # Mes facturado: la segunda fecha después de "Fecha desde Fecha hasta" (fin del período).
+    etiqueta_mes = None
+    if candidatas["fecha"]:
+        m_fechas = _RE_FECHAS.search(texto, posiciones[candidatas["fecha"][0]][0])
+        if m_fechas:
+            etiqueta_mes = m_fechas.group(2)
+
+    return {
+        "cliente": cliente,
+        "contrato": contrato,
+        "direccion": direccion,
+        "valor_pagar": valor_pagar,
+        "consumos_kwh": consumos,
+        "etiqueta_mes": etiqueta_mes,
+    }
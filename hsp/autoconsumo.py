@@ -0,0 +1,107 @@
+"""Balance hora a hora entre la generación solar y la curva de carga del cliente: autoconsumo, energía
+importada de la red y excedentes exportados.
+
+El flujo de caja asumía que cada kWh producido vale costo_kwh. Con el balance, solo el kWh que coincide
+con el consumo del cliente (autoconsumo) evita comprar a la red a costo_kwh; el excedente se inyecta y
+se valora a la tarifa de excedentes (0 si la distribuidora no lo reconoce).
+
+  - Curva de carga (8760 h): el consumo de cada mes (calculos.consumo_por_mes, desde tabla_historico)
+    se reparte entre los días (los comerciales consumen menos el fin de semana) y entre las horas con
+    la forma típica residencial o comercial.
+  - Forma de la generación (8760 h, suma 1): la de la simulación horaria (hsp.horario) de la planta.
+
+El autoconsumo anual como función de la energía producida E es lineal por tramos:
+    autoconsumo(E) = Σ_h min(E · forma_h, carga_h)
+así que se precalcula una vez (curva_autoconsumo) y se tabula en una grilla uniforme de E: evaluar un
+arreglo de producciones es un índice directo más una interpolación lineal, sin volver a recorrer las
+8760 horas (3 millones de valores en unas decenas de ms). Eso permite usarlo dentro del flujo de caja
+(producción degradada año a año), del barrido de sensibilidad y del Monte Carlo.
+"""
+import numpy as np
+
+from hsp.horario import MES_POR_DIA
+
+# Forma diaria del consumo (hora 0 a 23); se normaliza para que sume 1.
+PERFILES_CARGA = {
+    # Hogar: base nocturna, algo de consumo en la mañana y pico entre las 18 y las 21 h.
+    "Residencial": [0.025, 0.022, 0.021, 0.020, 0.021, 0.026, 0.038, 0.045, 0.040, 0.036, 0.036, 0.038,
+                    0.041, 0.040, 0.037, 0.036, 0.039, 0.047, 0.063, 0.070, 0.066, 0.057, 0.045, 0.033],
+    # Local u oficina: consumo concentrado en horario laboral (8 a 18 h), base baja en la noche.
+    "Comercial": [0.015, 0.015, 0.015, 0.015, 0.015, 0.015, 0.020, 0.030, 0.060, 0.070, 0.075, 0.075,
+                  0.070, 0.070, 0.075, 0.075, 0.070, 0.060, 0.045, 0.030, 0.020, 0.015, 0.015, 0.015],
+}
+# Consumo de un sábado/domingo respecto de un día laborable.
+FACTOR_FIN_DE_SEMANA = {"Residencial": 1.0, "Comercial": 0.5}
+DIA_SEMANA = np.arange(365) % 7  # año tipo que empieza en lunes: 5 y 6 son fin de semana
+DIAS_A_MESES = (MES_POR_DIA[:, None] == np.arange(12)).astype(float)  # (365, 12): suma por mes con un producto matricial
+
+# Tabla de la curva de autoconsumo: PUNTOS_TABLA valores de E entre 0 y ALCANCE_TABLA veces el consumo
+# anual (más allá, que no ocurre en la práctica, se calcula exacto).
+PUNTOS_TABLA = 10_001
+ALCANCE_TABLA = 10.0
+
+
+def perfil_carga(consumo_mensual_12, tipo_proyecto):
+    """Curva de carga horaria (kWh en cada una de las 8760 horas) que conserva el consumo de cada mes."""
+    forma_diaria = np.asarray(PERFILES_CARGA.get(tipo_proyecto, PERFILES_CARGA["Residencial"]), dtype=float)
+    forma_diaria /= forma_diaria.sum()
+    peso_dia = np.where(DIA_SEMANA >= 5, FACTOR_FIN_DE_SEMANA.get(tipo_proyecto, 1.0), 1.0)
+    peso_mes = np.bincount(MES_POR_DIA, weights=peso_dia, minlength=12)
+    consumo_diario = np.asarray(consumo_mensual_12, dtype=float)[MES_POR_DIA] * peso_dia / peso_mes[MES_POR_DIA]
+    return (consumo_diario[:, None] * forma_diaria[None, :]).ravel()
+
+
+def balance_horario(generacion, carga):
+    """Balance hora a hora de una generación (kWh por hora, forma (..., 8760)) contra la carga.
+    Devuelve autoconsumo, importación y exportación por mes (forma (..., 12)) y sus totales anuales."""
+    generacion = np.asarray(generacion, dtype=float)
+    carga = np.asarray(carga, dtype=float)
+    autoconsumo = np.minimum(generacion, carga)
+    por_hora = {"autoconsumo": autoconsumo, "importacion": carga - autoconsumo, "exportacion": generacion - autoconsumo}
+    resultado = {}
+    for nombre, serie in por_hora.items():
+        mensual = serie.reshape(serie.shape[:-1] + (365, 24)).sum(axis=-1) @ DIAS_A_MESES
+        resultado[f"{nombre}_mensual"] = mensual
+        resultado[nombre] = mensual.sum(axis=-1)
+    return resultado
+
+
+def curva_autoconsumo(forma_generacion, carga):
+    """Precalcula autoconsumo(E) = Σ_h min(E · forma_h, carga_h) para una forma de generación (8760
+    valores, se normaliza a suma 1) y una curva de carga (8760 kWh). Para E dado, las horas con
+    carga_h / forma_h < E quedan limitadas por la carga y el resto autoconsume toda su generación."""
+    forma = np.asarray(forma_generacion, dtype=float)
+    forma = forma / forma.sum()
+    carga = np.asarray(carga, dtype=float)
+    con_sol = forma > 0
+    umbral = carga[con_sol] / forma[con_sol]  # E a partir de la cual esa hora exporta
+    orden = np.argsort(umbral)
+    curva = {
+        "umbrales": umbral[orden],
+        "carga_acumulada": np.concatenate([[0.0], np.cumsum(carga[con_sol][orden])]),
+        "forma_acumulada": np.concatenate([[0.0], np.cumsum(forma[con_sol][orden])]),
+        "consumo_anual": float(carga.sum()),
+    }
+    curva["paso_tabla"] = max(ALCANCE_TABLA * curva["consumo_anual"], 1.0) / (PUNTOS_TABLA - 1)
+    curva["tabla"] = _autoconsumo_exacto(curva, curva["paso_tabla"] * np.arange(PUNTOS_TABLA))
+    return curva
+
+
+def _autoconsumo_exacto(curva, produccion):
+    limitadas = np.searchsorted(curva["umbrales"], produccion)  # horas que ya exportan
+    return curva["carga_acumulada"][limitadas] + produccion * (1.0 - curva["forma_acumulada"][limitadas])
+
+
+def evaluar_autoconsumo(curva, produccion):
+    """Autoconsumo (kWh) para producciones anuales arbitrarias (escalar o arreglo de cualquier forma).
+    Interpola linealmente en la tabla; como la curva es cóncava y lineal por tramos, el error entre
+    nodos es despreciable (centésimas de kWh al año)."""
+    produccion = np.asarray(produccion, dtype=float)
+    tabla = curva["tabla"]
+    x = np.clip(produccion / curva["paso_tabla"], 0, len(tabla) - 1)
+    i = np.minimum(x.astype(np.intp), len(tabla) - 2)
+    autoconsumo = tabla[i] + (x - i) * (tabla[i + 1] - tabla[i])
+    fuera = produccion > curva["paso_tabla"] * (len(tabla) - 1)
+    if fuera.any():
+        autoconsumo = np.where(fuera, _autoconsumo_exacto(curva, produccion), autoconsumo)
+    return autoconsumo
@@ -0,0 +1,207 @@
+"""Caché de planillas direccionada por contenido (SHA-256 de los bytes subidos).
+
+Mientras una planilla sigue cargada en el uploader, Streamlit vuelve a ejecutar el script en cada clic;
+sin caché eso significa repetir pdfplumber y, en escaneos, varios segundos de OCR con Tesseract.
+Aquí se guarda, por hash del archivo, el texto extraído, el método usado y los datos ya interpretados
+por extraer_datos_planilla(): primero en memoria y, opcionalmente, en disco (con límite de tamaño y
+desalojo LRU), de modo que la misma planilla nunca se procesa dos veces. Una lectura fallida (p. ej.
+sin el binario de tesseract o con el pool de OCR caído) no se guarda en disco y en memoria solo dura
+TTL_FALLO segundos: evita repetir el OCR en cada rerun, pero no deja el archivo marcado como ilegible.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from hsp.planillas import MAX_PAGINAS_OCR, extraer_datos_planilla, extraer_texto_detallado
+
+# Si cambia la lógica de extraer_datos_planilla(), subir este número: las entradas guardadas conservan
+# el texto (lo caro de obtener) pero sus datos interpretados se recalculan.
+VERSION_PARSER = 3
+TTL_FALLO = 60  # segundos que una lectura fallida se sirve desde memoria antes de reintentarse
+
+
+def hash_contenido(datos):
+    return hashlib.sha256(datos).hexdigest()
+
+
+class CachePlanillas:
+    """Caché de dos niveles: memoria (LRU por número de entradas) y, si se indica `directorio`,
+    un almacén en disco de un JSON por planilla (LRU por tamaño total en bytes, usando la fecha de
+    modificación de cada archivo como marca del último acceso). Es segura entre hilos (sesiones de
+    Streamlit que comparten la misma instancia)."""
+
+    def __init__(self, directorio=None, max_entradas_memoria=64, max_bytes_disco=50 * 1024 * 1024,
+                 max_paginas_ocr=MAX_PAGINAS_OCR, ttl_fallo=TTL_FALLO):
+        self.directorio = directorio
+        self.max_paginas_ocr = max_paginas_ocr
+        self.max_entradas_memoria = max_entradas_memoria
+        self.max_bytes_disco = max_bytes_disco
+        self.ttl_fallo = ttl_fallo
+        self._memoria = OrderedDict()
+        self._vencimiento_fallos = {}  # clave -> time.monotonic() en que deja de servirse el fallo
+        self._lock = threading.Lock()
+        self.aciertos_memoria = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+    # --- API principal ---
+    def leer_planilla(self, datos, nombre):
+        """Devuelve (texto, metodo, datos_planilla) para el archivo dado. datos_planilla es None si
+        metodo == 'fallo'. Solo ejecuta la extracción (pdfplumber/OCR) si el contenido no está en caché."""
+        entrada = self.leer_planilla_detallado(datos, nombre)
+        return entrada["texto"], entrada["metodo"], entrada["datos"]
+
+    def leer_planilla_detallado(self, datos, nombre):
+        """Como leer_planilla(), pero devuelve la entrada completa: texto, metodo, datos y el informe
+        de OCR (paginas_procesadas / paginas_totales, None si no hubo OCR de PDF)."""
+        clave = hash_contenido(datos)
+        entrada = self._buscar(clave)
+        # Las entradas de PDFs digitales guardadas antes de leer la tabla de facturación se extraen de
+        # nuevo (sin OCR, es barato): el texto solo no da los montos por columna.
+        if entrada is None or (entrada["metodo"] == "texto_pdf" and "tabla" not in entrada):
+            entrada = extraer_texto_detallado(datos, nombre, max_paginas_ocr=self.max_paginas_ocr)
+            self._completar_datos(entrada)
+            self._guardar(clave, entrada)
+        elif entrada.get("version_parser") != VERSION_PARSER:
+            self._completar_datos(entrada)
+            self._guardar(clave, entrada)
+        return entrada
+
+    def leer_archivo(self, archivo_subido):
+        """Atajo para un UploadedFile de Streamlit (o cualquier objeto con .name y .getvalue())."""
+        return self.leer_planilla(archivo_subido.getvalue(), archivo_subido.name)
+
+    def leer_archivo_detallado(self, archivo_subido):
+        return self.leer_planilla_detallado(archivo_subido.getvalue(), archivo_subido.name)
+
+    def estadisticas(self):
+        consultas = self.aciertos_memoria + self.aciertos_disco + self.fallos
+        return {
+            "aciertos_memoria": self.aciertos_memoria,
+            "aciertos_disco": self.aciertos_disco,
+            "fallos": self.fallos,
+            "tasa_aciertos": (consultas - self.fallos) / consultas if consultas else 0.0,
+            "entradas_memoria": len(self._memoria),
+            "bytes_disco": self._bytes_en_disco(),
+        }
+
+    def limpiar(self):
+        with self._lock:
+            self._memoria.clear()
+            self._vencimiento_fallos.clear()
+            for ruta in self._archivos_disco():
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+
+    # --- Internos ---
+    @staticmethod
+    def _completar_datos(entrada):
+        entrada["datos"] = (extraer_datos_planilla(entrada["texto"], entrada.get("tabla"))
+                            if entrada["metodo"] != "fallo" else None)
+        entrada["version_parser"] = VERSION_PARSER
+
+    def _buscar(self, clave):
+        with self._lock:
+            if clave in self._vencimiento_fallos and time.monotonic() >= self._vencimiento_fallos[clave]:
+                self._memoria.pop(clave, None)
+                del self._vencimiento_fallos[clave]
+            if clave in self._memoria:
+                self._memoria.move_to_end(clave)
+                self.aciertos_memoria += 1
+                return self._memoria[clave]
+
+            entrada = self._leer_disco(clave)
+            if entrada is not None:
+                self.aciertos_disco += 1
+                self._poner_en_memoria(clave, entrada)
+                return entrada
+
+            self.fallos += 1
+            return None
+
+    def _guardar(self, clave, entrada):
+        with self._lock:
+            self._poner_en_memoria(clave, entrada)
+            if entrada["metodo"] == "fallo":
+                self._vencimiento_fallos[clave] = time.monotonic() + self.ttl_fallo
+            else:
+                self._vencimiento_fallos.pop(clave, None)
+                self._escribir_disco(clave, entrada)
+
+    def _poner_en_memoria(self, clave, entrada):
+        self._memoria[clave] = entrada
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.max_entradas_memoria:
+            desalojada, _ = self._memoria.popitem(last=False)
+            self._vencimiento_fallos.pop(desalojada, None)
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.json")
+
+    def _leer_disco(self, clave):
+        if not self.directorio:
+            return None
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                entrada = json.load(f)
+            if entrada.get("metodo") == "fallo":  # guardada por una versión anterior: se reintenta
+                os.remove(ruta)
+                return None
+            os.utime(ruta)  # marca de último acceso para el desalojo LRU
+            return entrada
+        except (OSError, ValueError):
+            return None
+
+    def _escribir_disco(self, clave, entrada):
+        if not self.directorio:
+            return
+        ruta = self._ruta(clave)
+        ruta_tmp = ruta + ".tmp"
+        try:
+            with open(ruta_tmp, "w", encoding="utf-8") as f:
+                json.dump(entrada, f, ensure_ascii=False)
+            os.replace(ruta_tmp, ruta)
+        except OSError:
+            return
+        self._desalojar_disco()
+
+    def _archivos_disco(self):
+        if not self.directorio or not os.path.isdir(self.directorio):
+            return []
+        return [os.path.join(self.directorio, n) for n in os.listdir(self.directorio) if n.endswith(".json")]
+
+    def _bytes_en_disco(self):
+        total = 0
+        for ruta in self._archivos_disco():
+            try:
+                total += os.path.getsize(ruta)
+            except OSError:
+                pass
+        return total
+
+    def _desalojar_disco(self):
+        """Borra las entradas usadas hace más tiempo hasta quedar por debajo de max_bytes_disco."""
+        archivos = []
+        for ruta in self._archivos_disco():
+            try:
+                info = os.stat(ruta)
+            except OSError:
+                continue
+            archivos.append((info.st_mtime, info.st_size, ruta))
+        total = sum(tam for _, tam, _ in archivos)
+        for _, tam, ruta in sorted(archivos):
+            if total <= self.max_bytes_disco:
+                break
+            try:
+                os.remove(ruta)
+                total -= tam
+            except OSError:
+                pass
@@ -0,0 +1,234 @@
+"""Dimensionamiento de la planta y flujo de caja a 30 años (sin dependencias de Streamlit).
+
+Son las mismas fórmulas que usa la app; aquí viven como funciones puras para que la interfaz y el
+generador por lotes (python -m hsp lote) compartan exactamente el mismo cálculo.
+"""
+import math
+import re
+
+from hsp.autoconsumo import curva_autoconsumo, perfil_carga
+from hsp.clima import resolver_meteorologia
+from hsp.flujo_caja import ANIOS_VIDA_UTIL, simular_flujo_caja
+from hsp.horario import simular_anio
+
+# Valores por defecto de una propuesta (los mismos con los que arranca la app).
+ENTRADAS_DEFAULT = {
+    "nombre_cliente": "",
+    "costo_kwp": 850.0,
+    "consumo_mensual": 1228.0,
+    "pago_planilla": 149.94,
+    "ubicacion_cliente": "",
+    "numero_contrato": "",
+    "n_proyecto": "",
+    "ciudad_sel": "Guayaquil",
+    "tipo_proyecto": "Residencial",
+    "vendedor": "Ing. Solar",
+    "usar_tiempo_real": False,
+    "pct_autosuficiencia": 95.0,
+    "potencia_manual": 0.0,
+    "potencia_panel_wp": 625.0,
+    "area_panel_m2": 2.74,
+    "deg_y1_pct": 2.0,
+    "atenuacion_pct": 0.55,
+    "anios_beneficio": 2,
+    # Simulación horaria (hsp.horario) en lugar del modelo potencia × HSP × PR × 365
+    "modelo_horario": False,
+    "inclinacion_deg": 10.0,
+    "azimut_deg": 0.0,
+    "relacion_dc_ac": 1.15,
+    # Balance autoconsumo/exportación contra la curva de carga (hsp.autoconsumo)
+    "balance_autoconsumo": False,
+    "tarifa_excedentes": 0.0,
+}
+
+MESES_ABREV = ("ENE", "FEB", "MAR", "ABR", "MAY", "JUN", "JUL", "AGO", "SEP", "OCT", "NOV", "DIC")
+
+
+def calcular_costo_kwh(pago_planilla, consumo_mensual):
+    return pago_planilla / consumo_mensual if consumo_mensual > 0 else 0
+
+
+def resumir_historico(meses, valores):
+    """Suma y promedio del consumo histórico (valores ya convertidos a número)."""
+    suma = sum(valores)
+    promedio = suma / len(valores) if valores else 0
+    return {"meses_hist": list(meses), "valores_hist": list(valores), "suma_hist": suma, "promedio_hist": promedio}
+
+
+def dimensionar_sistema(consumo_mensual, hsp_avg, temp_prom, potencia_manual, potencia_panel_wp, area_panel_m2):
+    """Potencia sugerida/final, generación del año 1 y número/área de paneles."""
+    pr_calculado = 0.82 - (max(0, temp_prom - 15) * 0.0045)
+    potencia_sug = (consumo_mensual / (hsp_avg * pr_calculado * 30.44)) if consumo_mensual > 0 else 0.1
+
+    # Potencia final: usa la manual si fue ingresada (> 0), si no, la sugerida
+    potencia_final = potencia_manual if potencia_manual > 0 else potencia_sug
+    potencia_final = max(potencia_final, 0.1)  # nunca 0: evita inversión/generación nulas y divisiones por cero más adelante
+    generacion_y1 = potencia_final * hsp_avg * pr_calculado * 365
+
+    numero_paneles = math.ceil((potencia_final * 1000) / potencia_panel_wp) if potencia_panel_wp > 0 else 0
+    return {
+        "pr_calculado": pr_calculado,
+        "potencia_sug": potencia_sug,
+        "potencia_final": potencia_final,
+        "generacion_y1": generacion_y1,
+        "numero_paneles": numero_paneles,
+        "area_total_paneles_m2": numero_paneles * area_panel_m2,
+    }
+
+
+def simular_generacion_horaria(potencia_final, meteo, inclinacion_deg, azimut_deg, relacion_dc_ac):
+    """Año típico hora a hora (hsp.horario.simular_anio) con la climatología mensual de `meteo`
+    (ver clima.resolver_meteorologia). Su generacion_anual reemplaza a generacion_y1."""
+    return simular_anio(potencia_final, meteo["hsp_mensual"], meteo["temp_mensual"], meteo["lat"], {
+        "inclinacion_deg": inclinacion_deg, "azimut_deg": azimut_deg, "relacion_dc_ac": relacion_dc_ac,
+    })
+
+
+def mes_de_etiqueta(etiqueta):
+    """Mes (0-11) de una etiqueta del histórico: fecha dd/mm/aaaa (fin del período facturado) o un
+    nombre/abreviatura de mes en español. None si no se reconoce (p. ej. "Mes 1")."""
+    m = re.search(r"\d{1,2}[-/](\d{1,2})[-/]\d{2,4}", etiqueta)
+    if m and 1 <= int(m.group(1)) <= 12:
+        return int(m.group(1)) - 1
+    palabra = re.search(r"\b(ENE|FEB|MAR|ABR|MAY|JUN|JUL|AGO|SEP|SET|OCT|NOV|DIC)", etiqueta.upper())
+    if palabra:
+        return MESES_ABREV.index("SEP" if palabra.group(1) == "SET" else palabra.group(1))
+    return None
+
+
+def produccion_por_mes_hist(meses_hist, produccion_mensual):
+    """Generación solar alineada con las etiquetas del histórico de consumo: la del mes correspondiente,
+    o el promedio mensual si la etiqueta no indica el mes."""
+    promedio = sum(produccion_mensual) / 12
+    return [produccion_mensual[mes] if mes is not None else promedio for mes in map(mes_de_etiqueta, meses_hist)]
+
+
+def consumo_por_mes(meses_hist, valores_hist, consumo_mensual):
+    """Consumo (kWh) de cada mes del año a partir del histórico: promedio de las filas de ese mes y,
+    para los meses sin dato, el promedio de los meses con dato. Si ninguna etiqueta indica el mes
+    ("Mes 1"...), todos los meses toman consumo_mensual (el consumo con que se dimensionó la planta)."""
+    suma, filas = [0.0] * 12, [0] * 12
+    for etiqueta, valor in zip(meses_hist, valores_hist):
+        mes = mes_de_etiqueta(str(etiqueta))
+        if mes is not None:
+            suma[mes] += valor
+            filas[mes] += 1
+    if not any(filas):
+        return [float(consumo_mensual)] * 12
+    promedios = [suma[m] / filas[m] for m in range(12) if filas[m]]
+    relleno = sum(promedios) / len(promedios)
+    return [suma[m] / filas[m] if filas[m] else relleno for m in range(12)]
+
+
+def perfil_autoconsumo(potencia_final, meteo, meses_hist, valores_hist, consumo_mensual, tipo_proyecto, horario=None):
+    """Forma horaria de la generación (la de `horario` si ya se corrió la simulación horaria; si no, la
+    de una simulación con los parámetros por defecto), curva de carga del cliente y la curva de
+    autoconsumo precalculada que usan el flujo de caja, el barrido y el Monte Carlo."""
+    if horario is None:
+        horario = simular_anio(potencia_final, meteo["hsp_mensual"], meteo["temp_mensual"], meteo["lat"])
+    carga = perfil_carga(consumo_por_mes(meses_hist, valores_hist, consumo_mensual), tipo_proyecto)
+    forma = horario["potencia_ac_kw"] / horario["potencia_ac_kw"].sum()
+    return {"forma_generacion": forma, "carga": carga, "curva": curva_autoconsumo(forma, carga)}
+
+
+def porcentaje_beneficio_tributario(tipo_proyecto, anios_beneficio):
+    return (100.0 / anios_beneficio) if tipo_proyecto == "Comercial" else 0.0
+
+
+def calcular_flujo_caja(generacion_y1, costo_kwh, inv_final, deg_y1, atenuacion, tipo_proyecto, anios_beneficio,
+                        curva_autoconsumo=None, tarifa_excedentes=0.0):
+    """Flujo de caja año a año (degradación, producción, ahorro energético + tributario) y el año exacto
+    de recuperación de la inversión, para un solo escenario (ver flujo_caja.simular_flujo_caja para
+    evaluar muchos a la vez). Devuelve las series numéricas; las filas de la tabla se arman al mostrarlas
+    con filas_tabla_flujo(). Con curva_autoconsumo (ver perfil_autoconsumo) agrega el balance de energía:
+    autoconsumos, exportaciones e importaciones por año y las coberturas del año 1."""
+    porcentaje_distribucion = porcentaje_beneficio_tributario(tipo_proyecto, anios_beneficio)
+    ahorro_trib_anual_usd = inv_final * (porcentaje_distribucion / 100.0)
+
+    r = simular_flujo_caja(generacion_y1, costo_kwh, inv_final, deg_y1, atenuacion,
+                           ahorro_trib_anual_usd, anios_beneficio, ANIOS_VIDA_UTIL,
+                           curva_autoconsumo=curva_autoconsumo, tarifa_excedentes=tarifa_excedentes)
+    acumulados = r["acumulado"].tolist()
+    payback = float(r["payback"])
+    flujo = {
+        "porcentaje_distribucion": porcentaje_distribucion,
+        "ahorro_trib_anual_usd": ahorro_trib_anual_usd,
+        "años": list(range(1, ANIOS_VIDA_UTIL + 1)),
+        "factores_deg": r["factor_deg"].tolist(),
+        "producciones_anuales": r["produccion"].tolist(),
+        "ahorros_energia": r["ahorro_energia"].tolist(),
+        "beneficios_trib": r["beneficio_trib"].tolist(),
+        "ahorros_anuales": r["ahorro_anual"].tolist(),
+        "acumulados": acumulados,
+        "payback_exacto": None if math.isnan(payback) else payback,
+        "energia_total_30_años": float(r["energia_total"]),
+        "tarifa_nivelada": float(r["tarifa_nivelada"]),
+        "ahorro_vida_util": acumulados[-1] if acumulados else 0.0,
+    }
+    if curva_autoconsumo is not None:
+        consumo_anual = curva_autoconsumo["consumo_anual"]
+        autoconsumo_y1, produccion_y1 = float(r["autoconsumo"][0]), float(r["produccion"][0])
+        flujo.update(
+            autoconsumos=r["autoconsumo"].tolist(),
+            exportaciones=r["exportacion"].tolist(),
+            importaciones=r["importacion"].tolist(),
+            consumo_anual=consumo_anual,
+            # Cobertura: parte del consumo que pone la planta; autoconsumo: parte de la producción que se usa
+            pct_autosuficiencia=100.0 * autoconsumo_y1 / consumo_anual if consumo_anual > 0 else 0.0,
+            pct_autoconsumo=100.0 * autoconsumo_y1 / produccion_y1 if produccion_y1 > 0 else 0.0,
+        )
+    return flujo
+
+
+def filas_tabla_flujo(flujo):
+    """Filas de texto de la tabla de flujo de caja (app y PDF) a partir de las series de calcular_flujo_caja()."""
+    return [
+        {
+            "Año": año, "Ind. Deg.": f"-{factor_deg:.3f}", "Prod. kWh": f"{prod_anual:,.0f}",
+            "Ahorro Energía": f"${ahorro_energetico:,.2f}", "Ahorro Trib.": f"${beneficio_extra:,.2f}",
+            "Ahorro Año": f"${total_año:,.2f}", "Acumulado": f"${balance_acumulado:,.2f}"
+        }
+        for año, factor_deg, prod_anual, ahorro_energetico, beneficio_extra, total_año, balance_acumulado in zip(
+            flujo["años"], flujo["factores_deg"], flujo["producciones_anuales"], flujo["ahorros_energia"],
+            flujo["beneficios_trib"], flujo["ahorros_anuales"], flujo["acumulados"])
+    ]
+
+
+def calcular_propuesta(entradas, meses_hist=None, valores_hist=None, meteo=None):
+    """Cálculo completo de una propuesta a partir de un dict de entradas (claves de ENTRADAS_DEFAULT;
+    las que falten toman el valor por defecto). Si no se pasa el histórico de consumo, se usa el
+    consumo mensual como único mes; si no se pasa `meteo` (ver clima.resolver_meteorologia), se resuelve
+    según ciudad_sel / usar_tiempo_real. Devuelve un dict con todo lo que necesita generar_pdf()."""
+    e = dict(ENTRADAS_DEFAULT, **entradas)
+    if meses_hist is None:
+        meses_hist, valores_hist = ["Mes 1"], [e["consumo_mensual"]]
+    if meteo is None:
+        meteo = resolver_meteorologia(e["ciudad_sel"], e["usar_tiempo_real"])
+
+    costo_kwh = calcular_costo_kwh(e["pago_planilla"], e["consumo_mensual"])
+    sistema = dimensionar_sistema(e["consumo_mensual"], meteo["hsp_avg"], meteo["temp_prom"], e["potencia_manual"],
+                                  e["potencia_panel_wp"], e["area_panel_m2"])
+    horario = produccion_mensual = None
+    if e["modelo_horario"]:
+        horario = simular_generacion_horaria(sistema["potencia_final"], meteo, e["inclinacion_deg"], e["azimut_deg"],
+                                             e["relacion_dc_ac"])
+        sistema["generacion_y1"] = horario["generacion_anual"]
+        produccion_mensual = horario["produccion_mensual"]
+    curva = None
+    if e["balance_autoconsumo"]:
+        curva = perfil_autoconsumo(sistema["potencia_final"], meteo, meses_hist, valores_hist, e["consumo_mensual"],
+                                   e["tipo_proyecto"], horario)["curva"]
+    inv_final = e.get("inv_total") or e["costo_kwp"] * sistema["potencia_final"]
+    flujo = calcular_flujo_caja(sistema["generacion_y1"], costo_kwh, inv_final, e["deg_y1_pct"] / 100,
+                                e["atenuacion_pct"] / 100, e["tipo_proyecto"], e["anios_beneficio"],
+                                curva, e["tarifa_excedentes"])
+
+    propuesta = dict(e)
+    propuesta.update(meteo)
+    propuesta.update(sistema)
+    propuesta.update(flujo)
+    propuesta.update(resumir_historico(meses_hist, valores_hist))
+    pct_autosuficiencia = flujo.get("pct_autosuficiencia", e["pct_autosuficiencia"])
+    propuesta.update(costo_kwh=costo_kwh, inv_final=inv_final, pct_autosuficiencia=pct_autosuficiencia,
+                     pct_aporte_red=100.0 - pct_autosuficiencia, produccion_mensual=produccion_mensual)
+    return propuesta
@@ -0,0 +1,138 @@
+"""Carga de varias planillas a la vez (archivos sueltos o un ZIP) para armar el histórico de consumo.
+
+El uploader aceptaba una sola planilla y cada clic en "Aplicar" agregaba una fila al histórico con
+pd.concat + drop_duplicates y un st.rerun(): cargar un año eran doce vueltas de subir, esperar el
+texto/OCR y recargar la página. Aquí:
+
+  - archivos_subidos() abre los ZIP (solo las extensiones de planilla, con tope de archivos y de bytes
+    descomprimidos) y devuelve una lista plana de (nombre, datos);
+  - leer_planillas() lee todas en paralelo en un pool de hilos: la lectura pasa por la caché de
+    planillas (segura entre hilos) y el OCR ya reparte sus páginas en su propio pool de procesos;
+  - combinar_historico() junta el histórico actual con los meses leídos, deja una fila por
+    etiqueta_mes (la última leída gana) y ordena por fecha, para que la app lo guarde de una sola vez
+    y haga un único rerun;
+  - datos_recientes() elige, de la planilla más reciente que los tenga, cliente, contrato, dirección
+    y monto.
+"""
+import io
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from hsp.cache_planillas import hash_contenido
+from hsp.lote import EXTENSIONES_PLANILLA
+
+MAX_ARCHIVOS_ZIP = 60  # 5 años de planillas mensuales
+MAX_BYTES_ZIP = 200 * 1024 * 1024  # descomprimidos, sumando todo el ZIP
+MAX_HILOS_LECTURA = 8
+
+
+# --- ARCHIVOS SUBIDOS ---
+def _planillas_del_zip(nombre_zip, datos):
+    planillas, total = [], 0
+    with zipfile.ZipFile(io.BytesIO(datos)) as zip_:
+        for info in sorted(zip_.infolist(), key=lambda i: i.filename):
+            nombre = os.path.basename(info.filename)
+            if (info.is_dir() or nombre.startswith(".") or info.filename.startswith("__MACOSX/")
+                    or not nombre.lower().endswith(EXTENSIONES_PLANILLA)):
+                continue
+            total += info.file_size
+            if len(planillas) >= MAX_ARCHIVOS_ZIP or total > MAX_BYTES_ZIP:
+                raise ValueError(f"{nombre_zip}: más de {MAX_ARCHIVOS_ZIP} planillas o de "
+                                 f"{MAX_BYTES_ZIP // 1024 ** 2} MB descomprimidos.")
+            planillas.append((nombre, zip_.read(info)))
+    return planillas
+
+
+def archivos_subidos(subidas):
+    """[(nombre, datos)] de las planillas subidas, abriendo los ZIP. `subidas`: objetos con .name y
+    .getvalue() (UploadedFile de Streamlit). Un ZIP dañado o demasiado grande lanza ValueError."""
+    archivos = []
+    for subida in subidas:
+        if subida.name.lower().endswith(".zip"):
+            try:
+                archivos.extend(_planillas_del_zip(subida.name, subida.getvalue()))
+            except zipfile.BadZipFile:
+                raise ValueError(f"{subida.name}: el ZIP está dañado.")
+        else:
+            archivos.append((subida.name, subida.getvalue()))
+    return archivos
+
+
+# --- LECTURA EN PARALELO ---
+def _leer_sin_excepcion(leer, nombre, datos):
+    try:
+        lectura = leer(datos, nombre)
+    except Exception as e:
+        return {"archivo": nombre, "hash": hash_contenido(datos), "metodo": "fallo", "datos": None,
+                "error": f"{type(e).__name__}: {e}"}
+    return dict(lectura, archivo=nombre, hash=hash_contenido(datos), error=None)
+
+
+def leer_planillas(archivos, leer, hilos=None):
+    """Lee [(nombre, datos)] con leer(datos, nombre) -> dict con metodo y datos (p. ej.
+    CachePlanillas.leer_planilla_detallado) en un pool de hilos. Devuelve las lecturas en el orden de
+    `archivos`, cada una con "archivo", "hash" (SHA-256 del contenido) y "error" (None, o el mensaje si la
+    lectura lanzó una excepción)."""
+    if not archivos:
+        return []
+    hilos = hilos or min(MAX_HILOS_LECTURA, len(archivos))
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        return list(pool.map(lambda archivo: _leer_sin_excepcion(leer, *archivo), archivos))
+
+
+# --- HISTÓRICO ---
+def fecha_de_etiqueta(etiqueta):
+    """datetime de una etiqueta dd/mm/aaaa o dd-mm-aaaa (fin del período facturado); None si no es fecha."""
+    try:
+        return datetime.strptime(str(etiqueta).strip().replace("-", "/"), "%d/%m/%Y")
+    except ValueError:
+        return None
+
+
+def _validas(lecturas):
+    return [lectura for lectura in lecturas if lectura["metodo"] != "fallo" and lectura["datos"]]
+
+
+def _etiqueta_libre(filas):
+    n = len(filas) + 1
+    while f"Mes {n}" in filas:
+        n += 1
+    return f"Mes {n}"
+
+
+def combinar_historico(meses, consumos, lecturas):
+    """Histórico (meses, consumos) actual más una fila por planilla leída con consumo: su consumo es la
+    suma de sus kWh y su etiqueta, etiqueta_mes (si no tiene, el primer "Mes N" libre, para no pisar
+    una fila cargada a mano). Queda una fila por etiqueta (la
+    última gana); las filas con fecha se ordenan cronológicamente y las demás (cargadas a mano) quedan
+    antes, en su orden."""
+    filas = dict(zip(meses, consumos))
+    for lectura in _validas(lecturas):
+        datos = lectura["datos"]
+        if not datos["consumos_kwh"]:
+            continue
+        etiqueta = datos.get("etiqueta_mes") or _etiqueta_libre(filas)
+        filas.pop(etiqueta, None)  # la fila repetida pasa al final, como drop_duplicates(keep="last")
+        filas[etiqueta] = sum(datos["consumos_kwh"])
+    sin_fecha = [etiqueta for etiqueta in filas if fecha_de_etiqueta(etiqueta) is None]
+    con_fecha = sorted((etiqueta for etiqueta in filas if fecha_de_etiqueta(etiqueta) is not None),
+                       key=fecha_de_etiqueta)
+    orden = sin_fecha + con_fecha
+    return orden, [filas[etiqueta] for etiqueta in orden]
+
+
+def datos_recientes(lecturas):
+    """{cliente, contrato, direccion, valor_pagar}: cada campo de la planilla más reciente (por
+    etiqueta_mes; sin fecha, la última subida) que lo tenga. Los campos que ninguna trae no aparecen."""
+    validas = _validas(lecturas)
+    minima = datetime.min
+    ordenadas = sorted(range(len(validas)),
+                       key=lambda i: (fecha_de_etiqueta(validas[i]["datos"].get("etiqueta_mes")) or minima, i))
+    recientes = {}
+    for i in reversed(ordenadas):
+        for campo in ("cliente", "contrato", "direccion", "valor_pagar"):
+            if campo not in recientes and validas[i]["datos"].get(campo):
+                recientes[campo] = validas[i]["datos"][campo]
+    return recientes
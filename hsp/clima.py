@@ -0,0 +1,69 @@
+"""Datos meteorológicos: climatología de NASA POWER y valores de referencia locales por ciudad."""
+from hsp.nasa_power import PERFIL_INTERACTIVO, obtener_climatologia
+
+# --- 1. BASE DE DATOS DE RESPALDO (usada si NASA POWER no responde) ---
+# HSP: Atlas Solar del Ecuador (CONELEC/CIE, 2008) y estimaciones satelitales NREL/Global Solar Atlas.
+# Coordenadas: ubicación geográfica estándar de cada ciudad.
+ciudades_data = {
+    "Guayaquil":  {"lat": -2.1894, "lon": -79.8891, "hsp": [4.12, 4.05, 4.38, 4.51, 4.32, 4.10, 4.45, 4.92, 5.15, 5.02, 4.85, 4.58], "temp": 27.5},
+    "Durán":      {"lat": -2.1710, "lon": -79.8285, "hsp": [4.08, 3.98, 4.35, 4.48, 4.28, 4.05, 4.40, 4.88, 5.10, 5.05, 4.90, 4.62], "temp": 27.8},
+    "Quito":      {"lat": -0.1807, "lon": -78.4678, "hsp": [4.85, 4.62, 4.28, 4.02, 4.15, 4.65, 5.18, 5.42, 5.35, 4.88, 4.55, 4.68], "temp": 14.5},
+    "Cuenca":     {"lat": -2.9006, "lon": -79.0045, "hsp": [4.45, 4.38, 4.25, 4.15, 3.85, 3.72, 3.95, 4.35, 4.62, 4.75, 4.82, 4.55], "temp": 15.0},
+    "Esmeraldas": {"lat":  0.9682, "lon": -79.6517, "hsp": [3.65, 3.82, 4.12, 4.25, 4.18, 3.85, 3.75, 4.05, 4.15, 4.08, 3.95, 3.72], "temp": 26.5},
+    "Manta":      {"lat": -0.9677, "lon": -80.7089, "hsp": [4.82, 4.95, 5.15, 5.35, 5.12, 4.85, 4.98, 5.45, 5.75, 5.62, 5.48, 5.15], "temp": 26.2}
+}
+
+
+def obtener_datos_nasa_power(lat, lon, perfil=PERFIL_INTERACTIVO):
+    """Consulta la climatología mensual multi-anual de NASA POWER (irradiancia y temperatura).
+    Retorna (hsp_mensual, temp_mensual, exito). Ver hsp.nasa_power (sesión compartida y perfiles de
+    reintentos: por defecto el interactivo, de presupuesto corto)."""
+    return obtener_climatologia(lat, lon, perfil=perfil)
+
+
+def resolver_meteorologia(ciudad, usar_tiempo_real, consultar_nasa=obtener_datos_nasa_power, lat=None, lon=None,
+                          indice=None):
+    """HSP promedio y temperatura media para la ciudad: NASA POWER en vivo si se pide (y responde),
+    si no, los valores de referencia de ciudades_data. consultar_nasa permite inyectar una versión
+    con caché (p. ej. la de Streamlit). Devuelve un dict con hsp_avg, temp_prom, fuente_meteo,
+    fallo_nasa (True si se pidió tiempo real pero no hubo respuesta), los 12 valores mensuales
+    (hsp_mensual, temp_mensual) y la coordenada usada (lat, lon).
+
+    lat/lon: coordenadas exactas del proyecto (por defecto, las de la ciudad). Si se pasan junto con
+    `indice` (interpolacion.IndiceClimatico), los valores de referencia se interpolan en ese punto en
+    lugar de tomar los de la ciudad: el índice es la fuente sin red y el respaldo de NASA POWER."""
+    ciudad_ref = ciudades_data[ciudad]
+    usar_indice = indice is not None and lat is not None and lon is not None
+    if lat is None or lon is None:
+        lat, lon = ciudad_ref["lat"], ciudad_ref["lon"]
+
+    def resultado(hsp_mensual, temp_mensual, temp_prom, fuente, fallo_nasa):
+        return {
+            "hsp_avg": sum(hsp_mensual) / 12,
+            "temp_prom": temp_prom,
+            "fuente_meteo": fuente,
+            "fallo_nasa": fallo_nasa,
+            "hsp_mensual": list(hsp_mensual),
+            "temp_mensual": list(temp_mensual),
+            "lat": lat,
+            "lon": lon,
+        }
+
+    if usar_tiempo_real:
+        hsp_mensual_nasa, temp_mensual_nasa, exito_nasa = consultar_nasa(lat, lon)
+        if exito_nasa:
+            return resultado(hsp_mensual_nasa, temp_mensual_nasa, sum(temp_mensual_nasa) / 12,
+                             "NASA POWER — climatología satelital multi-anual (en vivo)", False)
+
+    if usar_indice:
+        hsp_mensual, temp_mensual = indice.interpolar(lat, lon)
+        temp_prom = sum(temp_mensual) / 12
+        fuente = f"Grilla interpolada de Ecuador ({lat:.4f}, {lon:.4f})"
+    else:
+        hsp_mensual, temp_mensual, temp_prom = ciudad_ref["hsp"], [ciudad_ref["temp"]] * 12, ciudad_ref["temp"]
+        fuente = "Valores de referencia locales"
+
+    if usar_tiempo_real:
+        return resultado(hsp_mensual, temp_mensual, temp_prom, f"{fuente} (sin conexión a NASA POWER)", True)
+    return resultado(hsp_mensual, temp_mensual, temp_prom,
+                     fuente if usar_indice else f"{fuente} (Atlas Solar Ecuador / estimación)", False)
@@ -0,0 +1,90 @@
+"""Motor vectorizado (NumPy) del flujo de caja a 30 años.
+
+Todos los parámetros aceptan escalares o arreglos con forma compatible (broadcasting de NumPy), así que
+una misma llamada evalúa un escenario o miles (distintas potencias, tarifas, degradaciones...). Los
+resultados por año llevan el eje de años al final: forma (..., anios). Es una función pura: no
+formatea nada; las filas de texto de la tabla se arman solo al mostrarlas (calculos.filas_tabla_flujo).
+"""
+import numpy as np
+
+from hsp.autoconsumo import evaluar_autoconsumo
+
+ANIOS_VIDA_UTIL = 30
+
+
+def simular_flujo_caja(generacion_y1, costo_kwh, inv_final, deg_y1, atenuacion,
+                       ahorro_trib_anual=0.0, anios_beneficio=0, anios=ANIOS_VIDA_UTIL, escalamiento_tarifa=0.0,
+                       curva_autoconsumo=None, tarifa_excedentes=0.0):
+    """Mismas fórmulas que el cálculo año a año de la app:
+        factor_deg(año) = (1 - deg_y1) * (1 - atenuacion) ** (año - 1)
+        producción      = generacion_y1 * factor_deg
+        tarifa(año)     = costo_kwh * (1 + escalamiento_tarifa) ** (año - 1)
+        ahorro del año  = producción * tarifa + ahorro_trib_anual (solo si año <= anios_beneficio)
+    ahorro_trib_anual debe venir ya en 0 cuando no aplica el beneficio (proyectos residenciales).
+    Con curva_autoconsumo (autoconsumo.curva_autoconsumo), la producción de cada año se separa en
+    autoconsumo (valorado a la tarifa) y exportación (valorada a tarifa_excedentes, con el mismo
+    escalamiento), y se agregan las series autoconsumo, exportacion e importacion (kWh).
+    El payback es exacto: interpola dentro del primer año en que el acumulado alcanza la inversión
+    (NaN si no se recupera en el horizonte)."""
+    generacion_y1 = np.asarray(generacion_y1, dtype=float)[..., None]
+    costo_kwh = np.asarray(costo_kwh, dtype=float)[..., None]
+    inv_final = np.asarray(inv_final, dtype=float)
+    deg_y1 = np.asarray(deg_y1, dtype=float)[..., None]
+    atenuacion = np.asarray(atenuacion, dtype=float)[..., None]
+    ahorro_trib_anual = np.asarray(ahorro_trib_anual, dtype=float)[..., None]
+    anios_beneficio = np.asarray(anios_beneficio)[..., None]
+    escalamiento_tarifa = np.asarray(escalamiento_tarifa, dtype=float)[..., None]
+
+    año = np.arange(1, anios + 1)
+    factor_deg = (1 - deg_y1) * ((1 - atenuacion) ** (año - 1))
+    produccion = generacion_y1 * factor_deg
+    escalamiento = (1 + escalamiento_tarifa) ** (año - 1)
+    if curva_autoconsumo is None:
+        ahorro_energia = produccion * (costo_kwh * escalamiento)
+    else:
+        autoconsumo = evaluar_autoconsumo(curva_autoconsumo, produccion)
+        exportacion = produccion - autoconsumo
+        ahorro_energia = (autoconsumo * costo_kwh + exportacion * tarifa_excedentes) * escalamiento
+    beneficio_trib = np.where(año <= anios_beneficio, ahorro_trib_anual, 0.0)
+    ahorro_anual = ahorro_energia + beneficio_trib
+    acumulado = np.cumsum(ahorro_anual, axis=-1)
+
+    payback = payback_exacto(ahorro_anual, acumulado, inv_final)
+    energia_total = np.cumsum(produccion, axis=-1)[..., -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tarifa_nivelada = np.where(energia_total > 0, inv_final / energia_total, 0.0)
+
+    resultado = {
+        "factor_deg": factor_deg,
+        "produccion": produccion,
+        "ahorro_energia": ahorro_energia,
+        "beneficio_trib": beneficio_trib,
+        "ahorro_anual": ahorro_anual,
+        "acumulado": acumulado,
+        "payback": payback,
+        "energia_total": energia_total,
+        "tarifa_nivelada": tarifa_nivelada,
+    }
+    if curva_autoconsumo is not None:
+        resultado.update(autoconsumo=autoconsumo, exportacion=exportacion,
+                         importacion=curva_autoconsumo["consumo_anual"] - autoconsumo)
+    return resultado
+
+
+def payback_exacto(ahorro_anual, acumulado, inv_final):
+    """Años (fraccionarios) hasta recuperar la inversión: primer año con ahorro positivo en que el
+    acumulado alcanza inv_final, interpolando linealmente dentro de ese año. NaN si nunca ocurre."""
+    inv_final = np.asarray(inv_final, dtype=float)
+    forma = np.broadcast_shapes(acumulado.shape[:-1], inv_final.shape)
+    acumulado = np.broadcast_to(acumulado, forma + acumulado.shape[-1:])
+    ahorro_anual = np.broadcast_to(ahorro_anual, acumulado.shape)
+    inv_final = np.broadcast_to(inv_final, forma)
+
+    cruza = (ahorro_anual > 0) & (acumulado >= inv_final[..., None])
+    recupera = cruza.any(axis=-1)
+    idx = cruza.argmax(axis=-1)[..., None]
+    acumulado_previo = np.where(idx > 0, np.take_along_axis(acumulado, np.maximum(idx - 1, 0), axis=-1), 0.0)[..., 0]
+    ahorro_en_cruce = np.take_along_axis(ahorro_anual, idx, axis=-1)[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payback = idx[..., 0] + (inv_final - acumulado_previo) / ahorro_en_cruce
+    return np.where(recupera, payback, np.nan)
@@ -0,0 +1,173 @@
+"""Formatos de planilla por empresa eléctrica: un parser por formato, elegido por la huella del encabezado.
+
+La lectura de campos (hsp/analizador_planillas.py) está afinada para las planillas de CNEL, donde el
+texto extraído separa las etiquetas de sus valores y el contrato y el cliente se reconocen por
+estructura. Las de EEQ (Quito) o CENTROSUR (Cuenca) rotulan cada dato en su propia línea
+("Cliente: ...", "Período: ... al ..."): con las heurísticas de CNEL la dirección salía de una línea
+de fechas, el mes no aparecía y había que completar a mano. Aquí:
+
+  - cada formato se registra con @registrar_formato(nombre, empresa, huellas, regiones_ocr): las huellas
+    son palabras o pares de palabras que la empresa imprime en el encabezado ("CNEL", "CENTRO SUR") y
+    las regiones_ocr, las zonas de la hoja que el OCR adaptativo (hsp/ocr.py) relee a mayor resolución
+    una vez reconocida la empresa;
+  - detectar_formato() mira solo las primeras LINEAS_HUELLA líneas y busca cada palabra (y cada par de
+    palabras seguidas) en un índice {huella: formato}: el costo no depende del largo de la planilla ni
+    de cuántos formatos haya registrados;
+  - analizar() corre el parser del formato detectado (o el genérico) y devuelve los mismos campos de
+    siempre más "formato" y "confianza" (0-1): la fracción de CAMPOS_REQUERIDOS encontrados, rebajada
+    a CERTEZA_GENERICO si ninguna huella reconoció la planilla.
+
+Agregar una empresa es registrar otra función; las que rotulan sus campos pueden reutilizar
+_analizar_por_etiquetas() con sus propias etiquetas.
+"""
+import re
+import unicodedata
+from collections import Counter
+
+from hsp.analizador_planillas import analizar_planilla
+from hsp.tabla_facturacion import campos_tabla
+
+# Campos sin los cuales la planilla no sirve para la propuesta.
+CAMPOS_REQUERIDOS = ("consumos_kwh", "valor_pagar", "contrato", "cliente", "etiqueta_mes")
+
+LINEAS_HUELLA = 8
+FORMATO_GENERICO = "generico"
+CERTEZA_GENERICO = 0.8  # sin huella, los campos salen solo de heurísticas generales
+
+FORMATOS = {}  # nombre -> {"nombre", "empresa", "huellas", "regiones_ocr", "analizar"}
+_INDICE_HUELLAS = {}  # huella normalizada -> nombre del formato
+_RE_PALABRA = re.compile(r"[A-Z0-9]+")
+
+
+def _normalizar(texto):
+    """Mayúsculas sin tildes (el OCR y las fuentes de las planillas las pierden a menudo)."""
+    descompuesto = unicodedata.normalize("NFKD", texto.upper())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def registrar_formato(nombre, empresa, huellas=(), regiones_ocr=None):
+    """Decorador: registra `analizar(texto) -> dict de campos` como parser del formato `nombre`.
+    Cada huella es una palabra o un par de palabras del encabezado; no puede pertenecer a dos formatos.
+    regiones_ocr: {nombre: (x0, y0, x1, y1)} en fracciones de la página, o None para leerla completa."""
+    def registrar(analizar):
+        for huella in huellas:
+            clave = " ".join(_RE_PALABRA.findall(_normalizar(huella)))
+            if not clave or clave.count(" ") > 1:
+                raise ValueError(f"Huella inválida para {nombre!r}: {huella!r} (una o dos palabras).")
+            if _INDICE_HUELLAS.get(clave, nombre) != nombre:
+                raise ValueError(f"La huella {huella!r} ya pertenece al formato {_INDICE_HUELLAS[clave]!r}.")
+            _INDICE_HUELLAS[clave] = nombre
+        FORMATOS[nombre] = {"nombre": nombre, "empresa": empresa, "huellas": tuple(huellas),
+                            "regiones_ocr": regiones_ocr, "analizar": analizar}
+        return analizar
+    return registrar
+
+
+def detectar_formato(texto):
+    """Nombre del formato de la planilla según las huellas de sus primeras líneas, o FORMATO_GENERICO."""
+    cabecera = "\n".join(texto.split("\n", LINEAS_HUELLA)[:LINEAS_HUELLA])
+    palabras = _RE_PALABRA.findall(_normalizar(cabecera))
+    votos = Counter()
+    for clave in palabras + [f"{a} {b}" for a, b in zip(palabras, palabras[1:])]:
+        formato = _INDICE_HUELLAS.get(clave)
+        if formato:
+            votos[formato] += 1
+    return votos.most_common(1)[0][0] if votos else FORMATO_GENERICO
+
+
+def confianza(datos, formato):
+    encontrados = sum(1 for campo in CAMPOS_REQUERIDOS if datos.get(campo))
+    certeza = CERTEZA_GENERICO if formato == FORMATO_GENERICO else 1.0
+    return round(encontrados / len(CAMPOS_REQUERIDOS) * certeza, 2)
+
+
+def analizar(texto, tabla=None):
+    """Campos de la planilla con el parser de su formato: {cliente, contrato, direccion, valor_pagar,
+    consumos_kwh, etiqueta_mes, formato, confianza}. Con `tabla` (tabla_facturacion.leer_tabla() del
+    PDF), el monto de energía y los kWh salen de sus columnas."""
+    formato = detectar_formato(texto)
+    datos = FORMATOS[formato]["analizar"](texto)
+    datos.update(campos_tabla(tabla))
+    datos["formato"] = formato
+    datos["confianza"] = confianza(datos, formato)
+    return datos
+
+
+# --- PARSER POR ETIQUETAS (empresas que rotulan cada dato en su línea) ---
+_RE_NUMERO = re.compile(r"\d+(?:[.,]\d+)?")
+ETIQUETAS_COMUNES = {
+    "cliente": r"(?:Nombre\s*del?\s*Cliente|Cliente|Raz[oó]n\s*Social|Titular)\s*:\s*([^\n]{4,60})",
+    "contrato": r"(?:C[oó]digo\s*[UÚ]nico\s*El[eé]ctrico\s*Nacional|CUEN|N[uú]mero\s*de\s*Suministro|Suministro"
+                r"|Cuenta\s*Contrato|Contrato)\s*(?:N[°º.o]*\s*)?[:#]\s*(\d[\d\-]{3,19})",
+    "direccion": r"Direcci[oó]n(?:\s*del?\s*(?:servicio|suministro|predio))?\s*:\s*([^\n]{5,120})",
+    # Segunda fecha del período = fin del período facturado.
+    "etiqueta_mes": r"(?:Per[ií]odo(?:\s*(?:facturado|de\s*consumo))?|Desde)\s*:?\s*\d{2}[-/]\d{2}[-/]\d{4}\s*"
+                    r"(?:al|a|hasta|-)\s*(\d{2}[-/]\d{2}[-/]\d{4})",
+    # Líneas con el cargo por energía: se suma el último número de cada una (la columna del monto).
+    "lineas_energia": r"(?:Cargo\s*por\s*energ[ií]a|Consumo\s*de\s*energ[ií]a|Valor\s*(?:de\s*)?energ[ií]a)[^\n]*",
+    # Consumo con la unidad antes del número ("Consumo (kWh): 318").
+    "consumo": r"Consumo\s*\(?kWh\)?\s*:\s*(\d{1,6}(?:[.,]\d+)?)",
+}
+
+
+def _compilar(etiquetas):
+    return {campo: re.compile(patron, re.IGNORECASE) for campo, patron in etiquetas.items()}
+
+
+def _analizar_por_etiquetas(texto, patrones):
+    """Lectura general (analizador_planillas) corregida con los campos rotulados que aparezcan: un campo
+    con etiqueta reemplaza al obtenido por heurística; si la etiqueta no está, queda el general."""
+    datos = analizar_planilla(texto)
+    for campo in ("cliente", "contrato", "direccion", "etiqueta_mes"):
+        m = patrones[campo].search(texto)
+        if m:
+            datos[campo] = m.group(1).strip()
+    montos = []
+    for linea in patrones["lineas_energia"].findall(texto):
+        numeros = _RE_NUMERO.findall(linea)
+        if numeros:
+            montos.append(float(numeros[-1].replace(",", ".")))
+    if montos:
+        datos["valor_pagar"] = round(sum(montos), 2)
+    consumos = [float(x.replace(",", ".")) for x in patrones["consumo"].findall(texto)]
+    if consumos:
+        datos["consumos_kwh"] = consumos
+    return datos
+
+
+# --- FORMATOS REGISTRADOS ---
+# Regiones de OCR: encabezado (cliente, contrato, período) y tabla de facturación, en fracciones de la hoja.
+_REGIONES_CNEL = {"encabezado": (0.0, 0.0, 1.0, 0.32), "tabla_facturacion": (0.0, 0.30, 1.0, 0.78)}
+_REGIONES_ROTULADAS = {"encabezado": (0.0, 0.0, 1.0, 0.30), "tabla_facturacion": (0.0, 0.28, 1.0, 0.80)}
+
+
+@registrar_formato("cnel", "CNEL EP", huellas=("CNEL", "CORPORACION NACIONAL"), regiones_ocr=_REGIONES_CNEL)
+def _analizar_cnel(texto):
+    return analizar_planilla(texto)
+
+
+_PATRONES_EEQ = _compilar(ETIQUETAS_COMUNES)
+
+
+@registrar_formato("eeq", "Empresa Eléctrica Quito", huellas=("EEQ", "ELECTRICA QUITO"),
+                   regiones_ocr=_REGIONES_ROTULADAS)
+def _analizar_eeq(texto):
+    return _analizar_por_etiquetas(texto, _PATRONES_EEQ)
+
+
+_PATRONES_CENTROSUR = _compilar(dict(
+    ETIQUETAS_COMUNES,
+    contrato=r"(?:C[oó]digo\s*[UÚ]nico\s*El[eé]ctrico\s*Nacional|CUEN|C[oó]digo\s*de\s*Cliente|N[uú]mero\s*de\s*Cuenta"
+             r"|Cuenta|Suministro|Contrato)\s*(?:N[°º.o]*\s*)?[:#]\s*(\d[\d\-]{3,19})",
+))
+
+
+@registrar_formato("centrosur", "CENTROSUR (Cuenca)", huellas=("CENTROSUR", "CENTRO SUR"),
+                   regiones_ocr=_REGIONES_ROTULADAS)
+def _analizar_centrosur(texto):
+    return _analizar_por_etiquetas(texto, _PATRONES_CENTROSUR)
+
+
+@registrar_formato(FORMATO_GENERICO, "Otra empresa")
+def _analizar_generico(texto):
+    return analizar_planilla(texto)
@@ -0,0 +1,123 @@
+"""Fotos del proyecto subidas por el usuario, reducidas a su recuadro de impresión antes de ir al PDF.
+
+Las fotos del techo y de la cubierta llegan desde el celular (8 a 12 MP, 3 a 10 MB) y fpdf2 las
+insertaba a resolución completa: el PDF pesaba decenas de MB y cada generación volvía a decodificarlas.
+Aquí cada foto, en memoria:
+
+  - se endereza según su orientación EXIF (los celulares guardan la foto "de lado" y marcan el giro);
+  - se reduce al ancho exacto con que se imprime (130 mm en Propuesta de Ahorro, 180 mm en Distribución
+    a Cubierta) a los DPI del perfil de calidad; los JPEG se decodifican ya reducidos (draft), sin
+    pasar por los 12 MP;
+  - se recomprime como JPEG (sin EXIF) con la calidad del perfil.
+
+El resultado se memoiza por el hash del contenido y los parámetros: los reruns de Streamlit y las
+regeneraciones del PDF no vuelven a procesar la misma foto.
+"""
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageOps
+
+from hsp.activos import aplanar_sobre_blanco
+
+ANCHO_FOTO_AHORRO_MM = 130
+ANCHO_FOTO_CUBIERTA_MM = 180
+
+# Perfil de calidad -> resolución de impresión y calidad JPEG.
+PERFILES_FOTO = {
+    "Alta": {"dpi": 300, "calidad": 90},
+    "Estándar": {"dpi": 200, "calidad": 85},
+    "Liviana": {"dpi": 150, "calidad": 75},
+}
+PERFIL_DEFAULT = "Estándar"
+
+
+class CacheFotos:
+    """LRU en memoria de fotos procesadas: {firma: foto} (ver procesar_foto). Segura entre hilos."""
+
+    def __init__(self, max_entradas=24):
+        self.max_entradas = max_entradas
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.procesadas = 0
+
+    def obtener(self, clave, procesar):
+        with self._lock:
+            foto = self._memoria.get(clave)
+            if foto is not None:
+                self._memoria.move_to_end(clave)
+                self.aciertos += 1
+                return foto
+        foto = procesar()
+        with self._lock:
+            self.procesadas += 1
+            self._memoria[clave] = foto
+            while len(self._memoria) > self.max_entradas:
+                self._memoria.popitem(last=False)
+        return foto
+
+    def limpiar(self):
+        with self._lock:
+            self._memoria.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            fotos = list(self._memoria.values())
+        return {
+            "entradas": len(fotos),
+            "aciertos": self.aciertos,
+            "procesadas": self.procesadas,
+            "bytes_origen": sum(f["bytes_origen"] for f in fotos),
+            "bytes": sum(f["bytes"] for f in fotos),
+        }
+
+
+CACHE_FOTOS = CacheFotos()
+
+
+def _procesar(datos, ancho_mm, dpi, calidad):
+    ancho_max_px = round(ancho_mm / 25.4 * dpi)
+    with Image.open(io.BytesIO(datos)) as original:
+        formato = original.format
+        tamano_origen = original.size
+        orientacion = original.getexif().get(0x0112, 1)
+        # Decodifica el JPEG a 1/2, 1/4 u 1/8 si alcanza para el ancho pedido (cuadrado: vale girada o no).
+        original.draft("RGB", (ancho_max_px, ancho_max_px))
+        img = aplanar_sobre_blanco(ImageOps.exif_transpose(original))
+    ancho_origen_px, alto_origen_px = tamano_origen if orientacion in (1, 2, 3, 4) else tamano_origen[::-1]
+    reducida = ancho_origen_px > ancho_max_px
+    if img.width > ancho_max_px:
+        img = img.resize((ancho_max_px, round(img.height * ancho_max_px / img.width)), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=calidad, optimize=True)
+    salida = buffer.getvalue()
+    if formato == "JPEG" and orientacion == 1 and not reducida and len(datos) <= len(salida):
+        salida = datos  # ya cabía en el recuadro, derecha y más liviana: va tal cual
+    return {
+        "datos": salida, "ancho_px": img.width, "alto_px": img.height,
+        "ancho_origen_px": ancho_origen_px, "alto_origen_px": alto_origen_px,
+        "bytes_origen": len(datos), "bytes": len(salida),
+    }
+
+
+def procesar_foto(datos, ancho_mm, perfil=PERFIL_DEFAULT):
+    """Foto (bytes JPEG/PNG tal como se subió) lista para insertarse con `ancho_mm` de ancho. Devuelve
+    {"datos" (JPEG), "ancho_px", "alto_px", "ancho_origen_px", "alto_origen_px", "bytes_origen", "bytes"}.
+    `perfil` es una clave de PERFILES_FOTO."""
+    parametros = PERFILES_FOTO[perfil]
+    clave = (hashlib.sha256(datos).hexdigest(), ancho_mm, parametros["dpi"], parametros["calidad"])
+    return CACHE_FOTOS.obtener(clave, lambda: _procesar(datos, ancho_mm, parametros["dpi"], parametros["calidad"]))
+
+
+def imagen(foto):
+    """Objeto que acepta pdf.image()."""
+    return io.BytesIO(foto["datos"])
+
+
+def alto_mm(foto, ancho_mm):
+    """Alto (mm) de la foto insertada con `ancho_mm` de ancho."""
+    return ancho_mm * foto["alto_px"] / foto["ancho_px"]
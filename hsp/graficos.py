@@ -0,0 +1,255 @@
+"""Gráficos del PDF renderizados en memoria y memoizados por los datos que dibujan.
+
+Antes cada gráfico se guardaba con plt.savefig en un NamedTemporaryFile, se volvía a abrir con PIL solo
+para conocer su alto, se insertaba y se borraba: cuatro o cinco archivos temporales por propuesta y
+un redibujo completo aunque los datos no hubieran cambiado (cada rerun de Streamlit). Aquí:
+
+  - cada gráfico es una función que dibuja sobre una matplotlib.figure.Figure propia (sin el estado
+    global de pyplot, así que es segura entre hilos) y se guarda como PNG en un io.BytesIO;
+  - el tamaño en píxeles sale del recuadro ajustado (tight bbox) de la figura, sin decodificar el PNG;
+  - el resultado se memoiza por la firma de los datos (nombre del gráfico, tamaño, datos y estilo de
+    matplotlib activo): un gráfico que no cambió nunca se vuelve a dibujar.
+
+fpdf2 acepta el BytesIO directamente (ver imagen()), así que generar el PDF no toca el disco. insertar()
+además guarda en el gráfico memoizado el PNG ya interpretado por fpdf2: regenerar el PDF no lo vuelve a
+descomprimir y comprimir.
+
+Con formato="svg" el gráfico se exporta como SVG y fpdf2 lo inserta como dibujo vectorial: el PDF pesa
+menos y se ve nítido a cualquier zoom. Los textos quedan como texto del PDF (fuente base Helvetica), no
+como un trazo por letra: así se puede seleccionar y buscar, y fpdf2 dibuja cada gráfico varias veces
+más rápido. El formato por defecto es PNG; se cambia por propuesta (entrada formato_graficos) o con HSP_FORMATO_GRAFICOS.
+Ver benchmarks/bench_graficos.py para la comparación de tamaño y tiempo.
+"""
+import hashlib
+import io
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import matplotlib
+import matplotlib.ticker as mtick
+from fpdf.image_parsing import get_img_info
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from hsp.plantillas import registrar_imagen
+
+DPI = 200
+FORMATOS = ("png", "svg")
+FORMATO_DEFAULT = os.environ.get("HSP_FORMATO_GRAFICOS", "png")
+_RE_METADATA_SVG = re.compile(rb"<metadata>.*?</metadata>", re.DOTALL)
+
+
+class CacheGraficos:
+    """LRU en memoria de gráficos renderizados: {firma: {"formato", "datos", "ancho_px", "alto_px"}}.
+    Segura entre hilos (sesiones de Streamlit que generan PDFs a la vez)."""
+
+    def __init__(self, max_entradas=32):
+        self.max_entradas = max_entradas
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.renderizados = 0
+
+    def obtener(self, clave, renderizar):
+        with self._lock:
+            grafico = self._memoria.get(clave)
+            if grafico is not None:
+                self._memoria.move_to_end(clave)
+                self.aciertos += 1
+                return grafico
+        grafico = renderizar()
+        with self._lock:
+            self.renderizados += 1
+            self._memoria[clave] = grafico
+            while len(self._memoria) > self.max_entradas:
+                self._memoria.popitem(last=False)
+        return grafico
+
+    def limpiar(self):
+        with self._lock:
+            self._memoria.clear()
+
+    def estadisticas(self):
+        consultas = self.aciertos + self.renderizados
+        return {
+            "entradas": len(self._memoria),
+            "aciertos": self.aciertos,
+            "renderizados": self.renderizados,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+        }
+
+
+CACHE_GRAFICOS = CacheGraficos()
+
+
+def _firma(nombre, figsize, datos):
+    # El estilo activo (p. ej. plt.style.use('ggplot') en la app) cambia el dibujo: entra en la firma.
+    estilo = repr(sorted((k, repr(v)) for k, v in matplotlib.rcParams.items()))
+    return hashlib.sha256(repr((nombre, figsize, datos, estilo)).encode("utf-8")).hexdigest()
+
+
+def _renderizar(nombre, figsize, formato, dibujar, *datos):
+    """Dibuja (o recupera de la caché) el gráfico `nombre`: dibujar(fig, *datos) sobre una figura de
+    `figsize` pulgadas, exportada en `formato` ("png" o "svg"; None = FORMATO_DEFAULT). Devuelve
+    {"formato", "datos": bytes, "ancho_px", "alto_px"} (tamaño equivalente a DPI, también en SVG)."""
+    formato = formato or FORMATO_DEFAULT
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de gráfico no soportado: {formato!r} (use {' o '.join(FORMATOS)}).")
+
+    def renderizar():
+        fig = Figure(figsize=figsize)
+        canvas = FigureCanvasAgg(fig)
+        dibujar(fig, *datos)
+        recuadro = fig.get_tightbbox(canvas.get_renderer()).padded(matplotlib.rcParams["savefig.pad_inches"])
+        buffer = io.BytesIO()
+        if formato == "svg":
+            # Las fuentes base del PDF son Latin-1: el signo menos tipográfico (U+2212) se cambia por "-".
+            with matplotlib.rc_context({"svg.fonttype": "none", "axes.unicode_minus": False}):
+                fig.savefig(buffer, format="svg", bbox_inches=recuadro, metadata={"Date": None})
+            contenido = _svg_para_fpdf(buffer.getvalue())
+        else:
+            fig.savefig(buffer, format="png", dpi=DPI, bbox_inches=recuadro)
+            contenido = buffer.getvalue()
+        return {"formato": formato, "datos": contenido, "ancho_px": recuadro.width * DPI, "alto_px": recuadro.height * DPI}
+
+    return CACHE_GRAFICOS.obtener(_firma(nombre, figsize, (formato,) + datos), renderizar)
+
+
+def _svg_para_fpdf(svg):
+    """Ajustes del SVG de matplotlib para fpdf2: quita <metadata> (fpdf2 no la interpreta y solo avisa
+    en el log) y declara el relleno negro por defecto en la raíz; matplotlib omite el fill del texto
+    negro y fpdf2 heredaría el último color de relleno usado en la página."""
+    svg = _RE_METADATA_SVG.sub(b"", svg)
+    return svg.replace(b"<svg ", b'<svg fill="#000000" ', 1)
+
+
+def imagen(grafico):
+    """Objeto que acepta pdf.image() (un BytesIO nuevo por inserción; fpdf2 reconoce el SVG por su
+    contenido y lo dibuja como vectores)."""
+    return io.BytesIO(grafico["datos"])
+
+
+def insertar(pdf, grafico, x=None, y=None, w=0):
+    """pdf.image() del gráfico. Un PNG se interpreta una sola vez: la imagen interpretada queda en el
+    gráfico memoizado y se registra en cada documento que lo inserta (ver plantillas.registrar_imagen)."""
+    if grafico["formato"] == "png":
+        if "imagen_pdf" not in grafico:
+            nombre = hashlib.md5(grafico["datos"].strip(), usedforsecurity=False).hexdigest()  # el nombre que usa fpdf2
+            grafico["imagen_pdf"] = (nombre, get_img_info(nombre, io.BytesIO(grafico["datos"]), pdf.image_cache.image_filter))
+        nombre, info = grafico["imagen_pdf"]
+        if info.get("iccp") is None:  # con perfil ICC, el documento debe registrar el perfil: que la lea fpdf2
+            registrar_imagen(pdf, nombre, info)
+    pdf.image(imagen(grafico), x=x, y=y, w=w)
+
+
+def alto_mm(grafico, ancho_mm):
+    """Alto (mm) del gráfico insertado con `ancho_mm` de ancho."""
+    return ancho_mm * grafico["alto_px"] / grafico["ancho_px"]
+
+
+# --- GRÁFICOS DE LA HOJA "PERFIL DE CONSUMO" ---
+def _dibujar_historico(fig, meses_hist, valores_hist, promedio_hist, produccion_hist):
+    ax_hist = fig.subplots()
+    colores_barras = ['#95a5a6'] * (len(valores_hist) - 1) + ['#2c3e50'] if valores_hist else []
+    ax_hist.bar(meses_hist, valores_hist, color=colores_barras if colores_barras else '#2c3e50')
+    ax_hist.axhline(y=promedio_hist, color='red', linewidth=1.5)
+    if produccion_hist:
+        ax_hist.plot(meses_hist, produccion_hist, color='#2ecc71', marker='o', linewidth=2, label='Generación solar')
+        ax_hist.legend(loc='upper left', fontsize=7, frameon=False)
+    if valores_hist:
+        ax_hist.set_ylim(0, max(max(valores_hist), promedio_hist, *produccion_hist) * 1.20)  # margen superior: evita que la barra/línea toquen el título
+    ax_hist.set_ylabel('kWh')
+    ax_hist.set_title('Histórico de Consumo Eléctrico', fontsize=10, fontweight='bold')
+    fig.tight_layout()
+
+
+def grafico_historico(meses_hist, valores_hist, promedio_hist, produccion_hist=(), formato=None):
+    return _renderizar("historico", (5, 3.2), formato, _dibujar_historico, list(meses_hist), list(valores_hist),
+                       promedio_hist, list(produccion_hist))
+
+
+def _dibujar_cobertura(fig, pct_autosuficiencia):
+    ax_dona = fig.subplots()
+    sizes = [pct_autosuficiencia, 100.0 - pct_autosuficiencia]
+    colors_dona = ['#2ecc71', '#bdc3c7']
+    ax_dona.pie(sizes, colors=colors_dona, startangle=90, counterclock=False, wedgeprops=dict(width=0.35),
+                autopct='%1.0f%%', pctdistance=0.82, textprops={'fontsize': 8, 'fontweight': 'bold', 'color': '#333'})
+    ax_dona.text(0, 0.08, f"{pct_autosuficiencia:.0f}%", ha='center', va='center', fontsize=22, fontweight='bold', color='#27ae60')
+    ax_dona.text(0, -0.18, "AUTOSUFICIENCIA", ha='center', va='center', fontsize=8, color='#555')
+    ax_dona.set_title('Cobertura Energética Proyectada', fontsize=10, fontweight='bold')
+    # Nota: sin legend() externa a los ejes -> evita que el recuadro ajustado agrande la imagen de forma
+    # impredecible. La leyenda se dibuja aparte, directamente en el PDF.
+
+
+def grafico_cobertura(pct_autosuficiencia, formato=None):
+    return _renderizar("cobertura", (5, 3.2), formato, _dibujar_cobertura, pct_autosuficiencia)
+
+
+def _dibujar_tarifas(fig, costo_kwh, tarifa_nivelada):
+    ax_tarifa = fig.subplots()
+    barras = ax_tarifa.bar(['Red Eléctrica\n(CNEL)', 'Planta Solar\n(Latitud Solar)'], [costo_kwh, tarifa_nivelada], color=['#5d6d7e', '#2ecc71'])
+    ax_tarifa.set_ylim(0, max(costo_kwh, tarifa_nivelada) * 1.20)
+    for b in barras:
+        ax_tarifa.annotate(f"${b.get_height():.3f}", xy=(b.get_x() + b.get_width() / 2, b.get_height()),
+                           xytext=(0, 4), textcoords="offset points", ha='center', fontweight='bold')
+    ax_tarifa.set_ylabel('Tarifa (USD/kWh)')
+    fig.tight_layout()
+
+
+def grafico_tarifas(costo_kwh, tarifa_nivelada, formato=None):
+    return _renderizar("tarifas", (5, 3.2), formato, _dibujar_tarifas, costo_kwh, tarifa_nivelada)
+
+
+# --- GRÁFICO DE RECUPERACIÓN DE LA INVERSIÓN (hoja "Rentabilidad") ---
+def _dibujar_recuperacion(fig, años, acumulados, inv_final, tipo_proyecto, años_beneficio, payback_exacto):
+    ax_pdf = fig.subplots()
+    ax_pdf.plot(años, acumulados, color='#1f77b4', marker='o', linewidth=2, label='Ahorro Acumulado Combinado')
+    ax_pdf.axhline(y=inv_final, color='#e74c3c', linestyle='--', linewidth=2, label='Inversión Inicial')
+
+    recuperado = [a >= inv_final for a in acumulados]
+    ax_pdf.fill_between(años, acumulados, inv_final, where=recuperado, interpolate=True, color='green', alpha=0.2)
+    ax_pdf.fill_between(años, acumulados, inv_final, where=[not r for r in recuperado], interpolate=True, color='red', alpha=0.1)
+
+    if tipo_proyecto == "Comercial" and años_beneficio > 0:
+        ax_pdf.axvspan(0, años_beneficio, color='#f1c40f', alpha=0.12,
+                       label=f'Incentivo Tributario Activo ({años_beneficio} añ.)')
+
+    if payback_exacto:
+        ax_pdf.plot(payback_exacto, inv_final, marker='*', markersize=15, color='#f1c40f')
+        ax_pdf.annotate(f'Retorno: {payback_exacto:.2f} años', xy=(payback_exacto, inv_final), xytext=(payback_exacto, inv_final * 1.15),
+                        fontweight='bold', color='#2c3e50', arrowprops=dict(facecolor='#2c3e50', shrink=0.08, width=1, headwidth=6))
+
+    ax_pdf.set_ylabel("Dólares (USD)")
+    ax_pdf.set_xlabel("Años")
+    ax_pdf.set_xlim(0, 30.5)
+    ax_pdf.yaxis.set_major_formatter(mtick.StrMethodFormatter('${x:,.0f}'))
+    ax_pdf.legend(loc='upper left')
+
+
+def grafico_recuperacion(años, acumulados, inv_final, tipo_proyecto, años_beneficio, payback_exacto, formato=None):
+    """años y acumulados incluyen el año 0 (acumulado 0)."""
+    return _renderizar("recuperacion", (10, 5), formato, _dibujar_recuperacion, list(años), list(acumulados),
+                       inv_final, tipo_proyecto, años_beneficio, payback_exacto)
+
+
+# --- GRÁFICO DE LA HOJA "ANÁLISIS DE INCERTIDUMBRE" ---
+def _dibujar_incertidumbre(fig, conteos, bordes, paybacks):
+    ax_mc = fig.subplots()
+    ax_mc.bar(bordes[:-1], conteos, width=[b - a for a, b in zip(bordes[:-1], bordes[1:])], align='edge',
+              color='#1f77b4', alpha=0.8, edgecolor='white')
+    for p, color in (("P10", '#2ecc71'), ("P50", '#2c3e50'), ("P90", '#e74c3c')):
+        if paybacks[p] != float("inf"):
+            ax_mc.axvline(paybacks[p], color=color, linestyle='--', linewidth=2, label=f"{p}: {paybacks[p]:.1f} años")
+    ax_mc.set_xlabel("Años hasta recuperar la inversión")
+    ax_mc.set_ylabel("Escenarios")
+    ax_mc.set_title('Distribución del Retorno de Inversión', fontsize=11, fontweight='bold')
+    ax_mc.legend(loc='upper right')
+    fig.tight_layout()
+
+
+def grafico_incertidumbre(conteos, bordes, paybacks, formato=None):
+    """Histograma del payback de montecarlo.simular_montecarlo con los percentiles P10/P50/P90."""
+    return _renderizar("incertidumbre", (10, 4.2), formato, _dibujar_incertidumbre, list(conteos), list(bordes),
+                       {p: paybacks[p] for p in ("P10", "P50", "P90")})
@@ -0,0 +1,127 @@
+"""Simulación horaria (8760 h) de la planta sobre un año meteorológico típico sintético.
+
+El modelo mensual (potencia × hsp_avg × PR × 365) usa un promedio anual y una corrección lineal por
+temperatura. Aquí, a partir de las 12 HSP y temperaturas mensuales que ya resuelve clima.py:
+
+  1. Año típico: la HSP del mes se reparte entre días más y menos despejados (un patrón fijo que
+     conserva la media mensual, para que el recorte del inversor vea picos realistas) y cada día la
+     reparte entre las horas con el perfil de Collares-Pereira y Rabl (geometría solar en hora solar
+     verdadera); la temperatura ambiente sigue una onda diaria alrededor de la media del mes.
+  2. Separación directa/difusa con la correlación de Erbs y transposición al plano del panel
+     (inclinación/azimut) con el modelo isotrópico de Liu-Jordan, más el albedo del suelo.
+  3. Temperatura de celda por NOCT, potencia DC con coeficiente de temperatura y pérdidas del
+     sistema, e inversor con eficiencia y recorte (clipping) a su potencia AC nominal.
+
+Todo es vectorizado sobre los 8760 pasos (unos pocos milisegundos), así que corre en cada interacción.
+"""
+import numpy as np
+
+DIAS_POR_MES = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+MES_POR_DIA = np.repeat(np.arange(12), DIAS_POR_MES)  # (365,)
+CONSTANTE_SOLAR = 1367.0  # W/m²
+PATRON_DIARIO = np.array([1.3, 0.85, 1.15, 0.6, 1.1])  # días despejados/nublados, media 1
+
+
+def _factores_diarios():
+    """PATRON_DIARIO repetido a lo largo del año y renormalizado para que cada mes promedie 1."""
+    factores = np.resize(PATRON_DIARIO, 365)
+    media_mes = np.bincount(MES_POR_DIA, weights=factores) / DIAS_POR_MES
+    return factores / media_mes[MES_POR_DIA]
+
+
+FACTORES_DIARIOS = _factores_diarios()  # (365,)
+
+# Parámetros por defecto de la planta.
+PARAMETROS_HORARIO_DEFAULT = {
+    "inclinacion_deg": 10.0,   # cerca del ecuador basta una inclinación baja (y ayuda a la autolimpieza)
+    "azimut_deg": 0.0,         # hacia dónde mira el panel: 0 = norte, 90 = este, 180 = sur, 270 = oeste
+    "relacion_dc_ac": 1.15,    # kWp del generador / kW AC del inversor
+    "perdidas_sistema": 0.14,  # suciedad, cableado, mismatch, LID... (fracción)
+    "eficiencia_inversor": 0.97,
+    "coef_temp_potencia": -0.0035,  # 1/°C
+    "noct": 45.0,              # °C
+    "albedo": 0.2,
+    "amplitud_temp_diaria": 4.0,  # °C alrededor de la media (máximo a las 15 h)
+}
+
+
+def _geometria_solar(lat):
+    """cos(zenit), vector solar (este, norte), irradiancia extraterrestre horizontal y peso de cada
+    hora en el total diario (Collares-Pereira y Rabl) para las 8760 horas (mitad de cada hora)."""
+    n = np.arange(1, 366)[:, None]  # día del año
+    hora = np.arange(24)[None, :] + 0.5
+    declinacion = np.radians(23.45) * np.sin(2 * np.pi * (284 + n) / 365)
+    angulo_horario = np.radians(15.0 * (hora - 12))
+    phi = np.radians(lat)
+
+    cos_zenit = np.sin(phi) * np.sin(declinacion) + np.cos(phi) * np.cos(declinacion) * np.cos(angulo_horario)
+    este = -np.cos(declinacion) * np.sin(angulo_horario)
+    norte = np.cos(phi) * np.sin(declinacion) - np.sin(phi) * np.cos(declinacion) * np.cos(angulo_horario)
+    excentricidad = 1 + 0.033 * np.cos(2 * np.pi * n / 365)
+    extraterrestre = CONSTANTE_SOLAR * excentricidad * np.clip(cos_zenit, 0, None)  # W/m² horizontal
+
+    # Collares-Pereira y Rabl: la global se concentra más que la extraterrestre alrededor del mediodía.
+    ocaso = np.arccos(np.clip(-np.tan(phi) * np.tan(declinacion), -1, 1))
+    a = 0.409 + 0.5016 * np.sin(ocaso - np.radians(60))
+    b = 0.6609 - 0.4767 * np.sin(ocaso - np.radians(60))
+    perfil = extraterrestre * (a + b * np.cos(angulo_horario))
+    pesos = perfil / perfil.sum(axis=1, keepdims=True)
+    return cos_zenit, este, norte, extraterrestre, pesos
+
+
+def _fraccion_difusa_erbs(kt):
+    return np.where(
+        kt <= 0.22, 1 - 0.09 * kt,
+        np.where(kt <= 0.8, 0.9511 - 0.1604 * kt + 4.388 * kt**2 - 16.638 * kt**3 + 12.336 * kt**4, 0.165),
+    )
+
+
+def simular_anio(potencia_kwp, hsp_mensual, temp_mensual, lat, parametros=None):
+    """Producción AC hora a hora de un año típico. hsp_mensual: 12 valores de irradiación horizontal
+    diaria (kWh/m²/día); temp_mensual: 12 temperaturas medias (°C). Devuelve un dict con
+    potencia_ac_kw (8760,), produccion_mensual (12 valores, kWh), generacion_anual (kWh),
+    perdidas_clipping (kWh), irradiacion_plano (kWh/m²/año) y pr_equivalente."""
+    p = dict(PARAMETROS_HORARIO_DEFAULT, **(parametros or {}))
+    hsp_mensual = np.asarray(hsp_mensual, dtype=float)
+    temp_mensual = np.asarray(temp_mensual, dtype=float)
+
+    # 1. Año típico: irradiancia horizontal global (W/m²) y temperatura ambiente por hora
+    cos_zenit, este, norte, extraterrestre, pesos = _geometria_solar(lat)
+    hsp_diaria = hsp_mensual[MES_POR_DIA] * FACTORES_DIARIOS
+    ghi = hsp_diaria[:, None] * 1000 * pesos  # W/m² (pasos de 1 h)
+    hora = np.arange(24)[None, :] + 0.5
+    temp_amb = temp_mensual[MES_POR_DIA][:, None] + p["amplitud_temp_diaria"] * np.cos(2 * np.pi * (hora - 15) / 24)
+
+    # 2. Directa/difusa (Erbs) y transposición isotrópica al plano del panel
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kt = np.where(extraterrestre > 0, ghi / extraterrestre, 0.0)
+    difusa = ghi * _fraccion_difusa_erbs(np.clip(kt, 0, 1))
+    directa_horizontal = ghi - difusa
+    beta = np.radians(p["inclinacion_deg"])
+    azimut = np.radians(p["azimut_deg"])
+    cos_incidencia = (np.sin(beta) * np.sin(azimut) * este + np.sin(beta) * np.cos(azimut) * norte
+                      + np.cos(beta) * cos_zenit)
+    # Rb = cos(incidencia) / cos(zenit); con el sol muy bajo (zenit > 85°) se acota para no amplificar ruido
+    rb = np.clip(cos_incidencia, 0, None) / np.maximum(cos_zenit, np.cos(np.radians(85)))
+    poa = (directa_horizontal * rb + difusa * (1 + np.cos(beta)) / 2
+           + ghi * p["albedo"] * (1 - np.cos(beta)) / 2)
+
+    # 3. Temperatura de celda, potencia DC y AC con recorte del inversor
+    temp_celda = temp_amb + (p["noct"] - 20) / 800 * poa
+    potencia_dc = (potencia_kwp * poa / 1000 * (1 + p["coef_temp_potencia"] * (temp_celda - 25))
+                   * (1 - p["perdidas_sistema"]))
+    potencia_ac_sin_limite = np.clip(potencia_dc, 0, None) * p["eficiencia_inversor"]
+    potencia_ac = np.minimum(potencia_ac_sin_limite, potencia_kwp / p["relacion_dc_ac"])
+
+    produccion_diaria = potencia_ac.sum(axis=1)
+    produccion_mensual = np.bincount(MES_POR_DIA, weights=produccion_diaria, minlength=12)
+    generacion_anual = float(produccion_mensual.sum())
+    irradiacion_horizontal = float((hsp_mensual * DIAS_POR_MES).sum())
+    return {
+        "potencia_ac_kw": potencia_ac.ravel(),
+        "produccion_mensual": produccion_mensual.tolist(),
+        "generacion_anual": generacion_anual,
+        "perdidas_clipping": float((potencia_ac_sin_limite - potencia_ac).sum()),
+        "irradiacion_plano": float(poa.sum() / 1000),
+        "pr_equivalente": generacion_anual / (potencia_kwp * irradiacion_horizontal) if potencia_kwp > 0 and irradiacion_horizontal > 0 else 0.0,
+    }
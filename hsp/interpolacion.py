@@ -0,0 +1,108 @@
+"""Índice espacial de HSP y temperatura para cualquier coordenada del Ecuador, sin red.
+
+Con solo las seis ciudades de ciudades_data, un cliente entre Guayaquil y Cuenca recibía los valores de
+la ciudad más cercana (o dependía de una consulta a NASA POWER). Aquí se precalcula una grilla regular
+(por defecto 0.5°, la misma del prefetch de almacen_clima) con los 12 valores mensuales de HSP y de
+temperatura en cada nodo:
+
+  - nodos con climatología de NASA POWER en el almacén -> ese valor tal cual;
+  - el resto -> interpolación por inverso de la distancia (IDW) de los puntos conocidos (almacén +
+    ciudades de referencia).
+
+Una consulta es una interpolación bilineal entre los cuatro nodos vecinos (índice directo en la grilla,
+unos pocos microsegundos). Fuera de la grilla se usa IDW sobre los puntos conocidos. La grilla se puede
+guardar en un .npz compacto (python -m hsp clima indice) y cargarse sin tocar el almacén.
+"""
+import numpy as np
+
+from hsp.almacen_clima import LIMITES_ECUADOR, PASO_GRILLA
+from hsp.clima import ciudades_data
+
+POTENCIA_IDW = 2
+VECINOS_IDW = 6
+
+
+def puntos_referencia(almacen=None):
+    """Puntos conocidos (lats, lons, hsp (n, 12), temp (n, 12)): las entradas del almacén y las ciudades
+    de ciudades_data que no tengan ya una entrada del almacén en su coordenada redondeada."""
+    filas = list(almacen.entradas()) if almacen is not None else []
+    claves_almacen = {(lat, lon) for lat, lon, _, _ in filas}
+    for datos in ciudades_data.values():
+        clave = (round(datos["lat"], 1), round(datos["lon"], 1))
+        if clave not in claves_almacen:
+            filas.append((datos["lat"], datos["lon"], datos["hsp"], [datos["temp"]] * 12))
+    lats, lons, hsp, temp = zip(*filas)
+    return np.array(lats), np.array(lons), np.array(hsp, dtype=float), np.array(temp, dtype=float)
+
+
+def interpolar_idw(lats, lons, valores, lat, lon, vecinos=VECINOS_IDW, potencia=POTENCIA_IDW):
+    """Inverso de la distancia (en grados, con la longitud corregida por cos(lat)) con los `vecinos`
+    puntos más cercanos. Si (lat, lon) coincide con un punto, devuelve ese valor exacto."""
+    dist = np.hypot(lats - lat, (lons - lon) * np.cos(np.radians(lat)))
+    cercanos = np.argsort(dist)[:vecinos]
+    if dist[cercanos[0]] < 1e-9:
+        return valores[cercanos[0]]
+    pesos = 1.0 / dist[cercanos] ** potencia
+    return (pesos[:, None] * valores[cercanos]).sum(axis=0) / pesos.sum()
+
+
+class IndiceClimatico:
+    """Grilla regular lat × lon con HSP y temperatura mensuales (arreglos (n_lat, n_lon, 12))."""
+
+    def __init__(self, lats, lons, hsp, temp, puntos=None):
+        self.lats = np.asarray(lats, dtype=float)
+        self.lons = np.asarray(lons, dtype=float)
+        self.hsp = np.asarray(hsp, dtype=float)
+        self.temp = np.asarray(temp, dtype=float)
+        self.puntos = puntos  # (lats, lons, hsp, temp) para consultas fuera de la grilla
+        self._paso_lat = self.lats[1] - self.lats[0]
+        self._paso_lon = self.lons[1] - self.lons[0]
+
+    @classmethod
+    def desde_puntos(cls, lats, lons, hsp, temp, paso=PASO_GRILLA, limites=LIMITES_ECUADOR):
+        grilla_lats = np.arange(limites["lat_min"], limites["lat_max"] + paso / 2, paso)
+        grilla_lons = np.arange(limites["lon_min"], limites["lon_max"] + paso / 2, paso)
+        valores = np.concatenate([hsp, temp], axis=1)
+        nodos = np.empty((len(grilla_lats), len(grilla_lons), 24))
+        for i, lat in enumerate(grilla_lats):
+            for j, lon in enumerate(grilla_lons):
+                nodos[i, j] = interpolar_idw(lats, lons, valores, lat, lon)
+        return cls(grilla_lats, grilla_lons, nodos[..., :12], nodos[..., 12:], puntos=(lats, lons, hsp, temp))
+
+    @classmethod
+    def desde_almacen(cls, almacen=None, paso=PASO_GRILLA):
+        """Construye la grilla a partir de las entradas de un AlmacenClima (o solo de ciudades_data si
+        almacen es None o está vacío)."""
+        return cls.desde_puntos(*puntos_referencia(almacen), paso=paso)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta) as datos:
+            puntos = tuple(datos[k] for k in ("p_lats", "p_lons", "p_hsp", "p_temp"))
+            return cls(datos["lats"], datos["lons"], datos["hsp"], datos["temp"], puntos=puntos)
+
+    def guardar(self, ruta):
+        p_lats, p_lons, p_hsp, p_temp = self.puntos
+        np.savez_compressed(ruta, lats=self.lats, lons=self.lons, hsp=self.hsp, temp=self.temp,
+                            p_lats=p_lats, p_lons=p_lons, p_hsp=p_hsp, p_temp=p_temp)
+
+    def contiene(self, lat, lon):
+        return self.lats[0] <= lat <= self.lats[-1] and self.lons[0] <= lon <= self.lons[-1]
+
+    def interpolar(self, lat, lon):
+        """(hsp_mensual, temp_mensual) interpolados en (lat, lon), como listas de 12 valores."""
+        if not self.contiene(lat, lon):
+            p_lats, p_lons, p_hsp, p_temp = self.puntos
+            valores = interpolar_idw(p_lats, p_lons, np.concatenate([p_hsp, p_temp], axis=1), lat, lon)
+            return valores[:12].tolist(), valores[12:].tolist()
+
+        # Índice directo del nodo inferior izquierdo y pesos bilineales dentro de la celda.
+        fi = (lat - self.lats[0]) / self._paso_lat
+        fj = (lon - self.lons[0]) / self._paso_lon
+        i = min(int(fi), len(self.lats) - 2)
+        j = min(int(fj), len(self.lons) - 2)
+        di, dj = fi - i, fj - j
+        pesos = np.outer((1 - di, di), (1 - dj, dj))
+        hsp = np.tensordot(pesos, self.hsp[i:i + 2, j:j + 2], axes=2)
+        temp = np.tensordot(pesos, self.temp[i:i + 2, j:j + 2], axes=2)
+        return hsp.tolist(), temp.tolist()
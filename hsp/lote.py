@@ -0,0 +1,167 @@
+"""Generación de propuestas por lotes, sin Streamlit: una carpeta de planillas -> un PDF + un JSON por planilla.
+
+Cada planilla pasa por el mismo camino que en la app (extracción de texto/OCR, detección de campos,
+dimensionamiento, flujo de caja y generar_pdf), repartiendo los archivos entre un pool de procesos.
+"""
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from hsp import ocr
+from hsp.activos import ACTIVOS
+from hsp.calculos import calcular_propuesta
+from hsp.planillas import extraer_datos_planilla, extraer_texto_detallado
+from hsp.propuesta_pdf import generar_pdf
+
+EXTENSIONES_PLANILLA = (".pdf", ".jpg", ".jpeg", ".png")
+
+# Campos de la propuesta que se copian al resumen JSON de cada planilla.
+CAMPOS_RESUMEN = (
+    "nombre_cliente", "numero_contrato", "ubicacion_cliente", "n_proyecto", "ciudad_sel", "tipo_proyecto",
+    "consumo_mensual", "pago_planilla", "costo_kwh", "hsp_avg", "temp_prom", "fuente_meteo", "pr_calculado",
+    "potencia_sug", "potencia_final", "numero_paneles", "area_total_paneles_m2", "generacion_y1",
+    "inv_final", "payback_exacto", "tarifa_nivelada", "ahorro_vida_util",
+)
+
+
+def listar_planillas(directorio):
+    return sorted(
+        os.path.join(directorio, nombre) for nombre in os.listdir(directorio)
+        if nombre.lower().endswith(EXTENSIONES_PLANILLA)
+    )
+
+
+def nombres_base(rutas):
+    """{ruta: nombre base de sus salidas y de n_proyecto}: el nombre del archivo sin extensión, o con la
+    extensión como sufijo (enero_pdf, enero_jpg) si otra planilla del lote tiene el mismo nombre; si no,
+    los procesos se pisarían Propuesta_<nombre>.pdf/.json. Se compara sin mayúsculas, como en Windows/macOS."""
+    tallos = [os.path.splitext(os.path.basename(ruta))[0] for ruta in rutas]
+    repetidos = {t.lower() for t in tallos if sum(o.lower() == t.lower() for o in tallos) > 1}
+    nombres, usados = {}, set()
+    for ruta, tallo in zip(rutas, tallos):
+        base = tallo
+        if tallo.lower() in repetidos:
+            base = f"{tallo}_{os.path.splitext(ruta)[1].lstrip('.').lower()}"
+        candidato, n = base, 2
+        while candidato.lower() in usados:
+            candidato, n = f"{base}_{n}", n + 1
+        usados.add(candidato.lower())
+        nombres[ruta] = candidato
+    return nombres
+
+
+def entradas_desde_planilla(datos_planilla, entradas_base, base):
+    """Combina los datos detectados en la planilla con los parámetros comunes del lote; `base` (ver
+    nombres_base) es el cliente y el n_proyecto por defecto. Devuelve (entradas, meses_hist,
+    valores_hist). Lanza ValueError si falta el consumo o el monto."""
+    consumo = sum(datos_planilla["consumos_kwh"])
+    if not consumo:
+        raise ValueError("no se detectó el consumo (kWh) en la planilla")
+    if not datos_planilla["valor_pagar"]:
+        raise ValueError("no se detectó el monto de energía ni el valor a pagar")
+
+    entradas = dict(entradas_base)
+    entradas.update(
+        nombre_cliente=datos_planilla["cliente"] or base,
+        numero_contrato=datos_planilla["contrato"] or "",
+        ubicacion_cliente=datos_planilla["direccion"] or "",
+        consumo_mensual=consumo,
+        pago_planilla=datos_planilla["valor_pagar"],
+    )
+    if not entradas.get("n_proyecto"):
+        entradas["n_proyecto"] = base
+    return entradas, [datos_planilla["etiqueta_mes"] or "Mes 1"], [consumo]
+
+
+def procesar_planilla(ruta, directorio_salida, entradas_base=None, meteo=None, base=None):
+    """Procesa una planilla completa y escribe Propuesta_<base>.pdf y Propuesta_<base>.json en
+    directorio_salida (`base`: por defecto, el nombre del archivo sin extensión). Devuelve el resumen (el
+    mismo contenido del JSON). `meteo` (ver clima.resolver_meteorologia) evita resolver la meteorología
+    por cada planilla."""
+    inicio = time.perf_counter()
+    nombre_archivo = os.path.basename(ruta)
+    base = base or os.path.splitext(nombre_archivo)[0]
+    with open(ruta, "rb") as f:
+        datos = f.read()
+
+    lectura = extraer_texto_detallado(datos, nombre_archivo)
+    if lectura["metodo"] == "fallo":
+        raise ValueError("no se pudo leer el archivo (ni texto ni OCR)")
+    datos_planilla = extraer_datos_planilla(lectura["texto"], lectura["tabla"])
+
+    entradas, meses_hist, valores_hist = entradas_desde_planilla(datos_planilla, entradas_base or {}, base)
+    propuesta = calcular_propuesta(entradas, meses_hist, valores_hist, meteo)
+
+    ruta_pdf = os.path.join(directorio_salida, f"Propuesta_{base}.pdf")
+    generar_pdf(propuesta, ruta_pdf)  # directo al archivo: ninguna copia en bytes del PDF en el trabajador
+
+    resumen = {campo: propuesta[campo] for campo in CAMPOS_RESUMEN}
+    resumen.update(
+        archivo_planilla=nombre_archivo,
+        archivo_pdf=os.path.basename(ruta_pdf),
+        metodo_extraccion=lectura["metodo"],
+        paginas_ocr=lectura["paginas_procesadas"] if lectura["metodo"] == "ocr" else None,
+        datos_planilla=datos_planilla,
+        segundos=round(time.perf_counter() - inicio, 3),
+    )
+    with open(os.path.join(directorio_salida, f"Propuesta_{base}.json"), "w", encoding="utf-8") as f:
+        json.dump(resumen, f, ensure_ascii=False, indent=2)
+    return resumen
+
+
+def _inicializar_trabajador_lote():
+    # Cada proceso del lote ya es una unidad de paralelismo: el OCR va en serie dentro de él y los
+    # gráficos se dibujan sin interfaz gráfica.
+    import matplotlib
+    matplotlib.use("Agg")
+    ocr.OCR_EN_PARALELO = False
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def _procesar_sin_excepcion(ruta, directorio_salida, entradas_base, meteo, base):
+    try:
+        return ruta, procesar_planilla(ruta, directorio_salida, entradas_base, meteo, base), None
+    except Exception as e:
+        return ruta, None, f"{type(e).__name__}: {e}"
+
+
+def procesar_lote(directorio_entrada, directorio_salida, entradas_base=None, procesos=None, al_avanzar=None, meteo=None):
+    """Procesa todas las planillas de directorio_entrada en un pool de `procesos` procesos (por
+    defecto, uno por núcleo). al_avanzar(ruta, resumen, error) se llama cada vez que termina un archivo.
+    Escribe informe_lote.json en directorio_salida y devuelve el mismo informe: archivos, exitos,
+    fallos (lista de {archivo, error}), segundos y archivos_por_segundo. Todas las planillas del lote
+    comparten la ciudad, así que `meteo` se resuelve una vez en quien llama y se reparte a los procesos."""
+    os.makedirs(directorio_salida, exist_ok=True)
+    rutas = listar_planillas(directorio_entrada)
+    bases = nombres_base(rutas)
+    procesos = procesos or ocr.procesos_disponibles()
+
+    inicio = time.perf_counter()
+    ACTIVOS.preparar()  # una vez aquí: los procesos encuentran los activos listos y no compiten por escribirlos
+    exitos = 0
+    fallos = []
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_trabajador_lote) as pool:
+        futuros = [pool.submit(_procesar_sin_excepcion, ruta, directorio_salida, entradas_base, meteo, bases[ruta])
+                   for ruta in rutas]
+        for futuro in as_completed(futuros):
+            ruta, resumen, error = futuro.result()
+            if error is None:
+                exitos += 1
+            else:
+                fallos.append({"archivo": os.path.basename(ruta), "error": error})
+            if al_avanzar:
+                al_avanzar(ruta, resumen, error)
+    segundos = time.perf_counter() - inicio
+
+    informe = {
+        "archivos": len(rutas),
+        "exitos": exitos,
+        "fallos": sorted(fallos, key=lambda f: f["archivo"]),
+        "procesos": procesos,
+        "segundos": round(segundos, 3),
+        "archivos_por_segundo": round(len(rutas) / segundos, 3) if segundos > 0 else 0.0,
+    }
+    with open(os.path.join(directorio_salida, "informe_lote.json"), "w", encoding="utf-8") as f:
+        json.dump(informe, f, ensure_ascii=False, indent=2)
+    return informe
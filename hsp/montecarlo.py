@@ -0,0 +1,81 @@
+"""Análisis de incertidumbre (Monte Carlo) del payback y del ahorro a 30 años.
+
+El payback de la propuesta es un único número calculado con hsp_avg, pr_calculado, deg_y1 y atenuacion
+fijos. Aquí esas entradas (más un escalamiento anual de la tarifa) se muestrean de distribuciones y
+cada muestra es un flujo de caja completo a 30 años; todas se evalúan en bloque con
+flujo_caja.simular_flujo_caja, por lotes para acotar la memoria. HSP y PR entran como factores
+multiplicativos sobre la generacion_y1 de la propuesta (del modelo mensual o de la simulación horaria),
+de modo que la mediana queda centrada en el payback determinístico.
+"""
+import numpy as np
+
+from hsp.calculos import porcentaje_beneficio_tributario
+from hsp.flujo_caja import simular_flujo_caja
+
+SIMULACIONES_DEFAULT = 100_000
+TAMANO_LOTE = 25_000
+PERCENTILES = (10, 50, 90)
+
+# Distribuciones de las entradas, relativas a los valores nominales de la propuesta:
+#   hsp y pr: factor normal centrado en 1 con desviación relativa (recortado a valores positivos);
+#   deg_y1 y atenuacion: triangular (mínimo, moda, máximo) como múltiplos del valor nominal;
+#   escalamiento_tarifa: triangular absoluta (fracción anual; 0.02 = +2 % por año).
+DISTRIBUCIONES_DEFAULT = {
+    "desv_hsp": 0.07,
+    "desv_pr": 0.04,
+    "deg_y1": (0.5, 1.0, 1.5),
+    "atenuacion": (0.7, 1.0, 1.6),
+    "escalamiento_tarifa": (-0.01, 0.0, 0.03),
+}
+
+
+def _muestrear_entradas(rng, n, deg_y1, atenuacion, distribuciones):
+    d = distribuciones
+    return {
+        "hsp": np.clip(rng.normal(1.0, d["desv_hsp"], n), 0.1, None),
+        "pr": np.clip(rng.normal(1.0, d["desv_pr"], n), 0.1, None),
+        "deg_y1": deg_y1 * rng.triangular(*d["deg_y1"], n) if deg_y1 > 0 else np.zeros(n),
+        "atenuacion": atenuacion * rng.triangular(*d["atenuacion"], n) if atenuacion > 0 else np.zeros(n),
+        "escalamiento_tarifa": rng.triangular(*d["escalamiento_tarifa"], n),
+    }
+
+
+def _percentiles(valores):
+    # "inverted_cdf" no interpola: los escenarios sin recuperación (inf) no contaminan a los vecinos.
+    return {f"P{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(valores, PERCENTILES, method="inverted_cdf"))}
+
+
+def simular_montecarlo(generacion_y1, costo_kwh, inv_final, deg_y1, atenuacion,
+                       tipo_proyecto, anios_beneficio, simulaciones=SIMULACIONES_DEFAULT, semilla=None,
+                       distribuciones=None, tamano_lote=TAMANO_LOTE, curva_autoconsumo=None, tarifa_excedentes=0.0):
+    """Corre `simulaciones` flujos de caja con entradas muestreadas (la generación del año 1 de cada uno
+    es generacion_y1 por los factores de HSP y PR) y devuelve:
+    payback y ahorro_vida_util como {"P10", "P50", "P90"} (payback = inf si ese percentil no recupera
+    la inversión en 30 años), prob_recuperacion (fracción de escenarios que recuperan la inversión) e
+    histograma_payback (conteos, bordes) de los escenarios que recuperan. `semilla` hace el resultado
+    reproducible. curva_autoconsumo y tarifa_excedentes se pasan tal cual a simular_flujo_caja."""
+    distribuciones = dict(DISTRIBUCIONES_DEFAULT, **(distribuciones or {}))
+    rng = np.random.default_rng(semilla)
+    ahorro_trib_anual = inv_final * (porcentaje_beneficio_tributario(tipo_proyecto, anios_beneficio) / 100.0)
+
+    paybacks = np.empty(simulaciones)
+    ahorros = np.empty(simulaciones)
+    for inicio in range(0, simulaciones, tamano_lote):
+        n = min(tamano_lote, simulaciones - inicio)
+        m = _muestrear_entradas(rng, n, deg_y1, atenuacion, distribuciones)
+        r = simular_flujo_caja(generacion_y1 * m["hsp"] * m["pr"], costo_kwh, inv_final, m["deg_y1"],
+                               m["atenuacion"], ahorro_trib_anual, anios_beneficio,
+                               escalamiento_tarifa=m["escalamiento_tarifa"], curva_autoconsumo=curva_autoconsumo,
+                               tarifa_excedentes=tarifa_excedentes)
+        paybacks[inicio:inicio + n] = r["payback"]
+        ahorros[inicio:inicio + n] = r["acumulado"][:, -1]
+
+    recupera = ~np.isnan(paybacks)
+    conteos, bordes = np.histogram(paybacks[recupera], bins=30) if recupera.any() else (np.zeros(0), np.zeros(0))
+    return {
+        "simulaciones": simulaciones,
+        "payback": _percentiles(np.where(recupera, paybacks, np.inf)),
+        "ahorro_vida_util": _percentiles(ahorros),
+        "prob_recuperacion": float(recupera.mean()),
+        "histograma_payback": (conteos.tolist(), bordes.tolist()),
+    }
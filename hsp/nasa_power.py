@@ -0,0 +1,99 @@
+"""Cliente de la API de climatología de NASA POWER.
+
+Una requests.Session por proceso y perfil (conexiones keep-alive reutilizadas) y consultas concurrentes
+de varias coordenadas (hilos o asyncio) para que el prefetch y las propuestas de varios sitios no
+esperen una respuesta tras otra. Dos perfiles de consulta:
+
+  - PERFIL_INTERACTIVO (la app esperando la respuesta): no reintenta lecturas ni respuestas 5xx, solo
+    una conexión fallida; un servidor colgado bloquea como mucho dos conexiones y una lectura (~9 s);
+  - PERFIL_LOTE (prefetch, refresco en segundo plano, python -m hsp lote): reintentos acotados con
+    backoff exponencial ante errores de red, 429 y 5xx.
+
+La URL base se puede cambiar con HSP_NASA_POWER_URL (p. ej. un espejo o un servidor local).
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+URL_BASE = os.environ.get("HSP_NASA_POWER_URL", "https://power.larc.nasa.gov")
+RUTA_CLIMATOLOGIA = "/api/temporal/climatology/point"
+MESES_ORDEN_NASA = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
+
+PERFIL_INTERACTIVO = "interactivo"
+PERFIL_LOTE = "lote"
+PERFILES = {
+    PERFIL_INTERACTIVO: {"timeout": (2, 5), "reintentos": {"total": 1, "connect": 1, "read": 0, "status": 0,
+                                                           "other": 0, "backoff_factor": 0}},
+    PERFIL_LOTE: {"timeout": (3.05, 8), "reintentos": {"total": 2, "backoff_factor": 0.5}},  # espera 0.5 s, 1 s
+}
+HILOS_DEFAULT = 8
+
+_sesiones = {}
+_lock_sesion = threading.Lock()
+
+
+def obtener_sesion(perfil=PERFIL_INTERACTIVO):
+    """Sesión HTTP del perfil, compartida por todos los hilos del proceso y creada la primera vez que se usa."""
+    with _lock_sesion:
+        if perfil not in _sesiones:
+            reintentos = Retry(
+                status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",),
+                respect_retry_after_header=True, **PERFILES[perfil]["reintentos"],
+            )
+            adaptador = HTTPAdapter(max_retries=reintentos, pool_connections=4, pool_maxsize=HILOS_DEFAULT)
+            sesion = requests.Session()
+            sesion.mount("https://", adaptador)
+            sesion.mount("http://", adaptador)
+            _sesiones[perfil] = sesion
+        return _sesiones[perfil]
+
+
+def obtener_climatologia(lat, lon, url_base=None, perfil=PERFIL_INTERACTIVO, timeout=None):
+    """Climatología mensual multi-anual de NASA POWER (irradiancia y temperatura) para una coordenada.
+    Retorna (hsp_mensual, temp_mensual, exito). Solo los errores de red/HTTP y las respuestas con un
+    formato inesperado se tratan como fallo; cualquier otra excepción es un error de programación y se propaga.
+    `timeout` (conexión, lectura) reemplaza al del perfil."""
+    params = {
+        "parameters": "ALLSKY_SFC_SW_DWN,T2M",
+        "community": "RE",
+        "longitude": lon,
+        "latitude": lat,
+        "format": "JSON",
+    }
+    try:
+        resp = obtener_sesion(perfil).get((url_base or URL_BASE).rstrip("/") + RUTA_CLIMATOLOGIA, params=params,
+                                          timeout=timeout or PERFILES[perfil]["timeout"])
+        resp.raise_for_status()
+        parametros = resp.json()["properties"]["parameter"]
+        hsp_mensual = [float(parametros["ALLSKY_SFC_SW_DWN"][m]) for m in MESES_ORDEN_NASA]
+        temp_mensual = [float(parametros["T2M"][m]) for m in MESES_ORDEN_NASA]
+    except (requests.RequestException, ValueError, KeyError, TypeError):
+        return None, None, False
+    return hsp_mensual, temp_mensual, True
+
+
+obtener_climatologia_lote = functools.partial(obtener_climatologia, perfil=PERFIL_LOTE)
+
+
+def obtener_climatologias(coordenadas, hilos=HILOS_DEFAULT, consultar=obtener_climatologia_lote):
+    """Consulta varias coordenadas (lista de (lat, lon)) a la vez en un pool de hilos. Devuelve los
+    resultados (hsp_mensual, temp_mensual, exito) en el mismo orden que `coordenadas`."""
+    coordenadas = list(coordenadas)
+    if len(coordenadas) <= 1 or hilos <= 1:
+        return [consultar(lat, lon) for lat, lon in coordenadas]
+    with ThreadPoolExecutor(max_workers=min(hilos, len(coordenadas))) as pool:
+        return list(pool.map(lambda coordenada: consultar(*coordenada), coordenadas))
+
+
+async def obtener_climatologias_async(coordenadas, hilos=HILOS_DEFAULT, consultar=obtener_climatologia_lote):
+    """Versión asyncio de obtener_climatologias(): las consultas corren en un pool propio de `hilos`
+    hilos (la sesión HTTP es bloqueante), sin bloquear el event loop."""
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=max(1, hilos)) as pool:
+        return await asyncio.gather(*(loop.run_in_executor(pool, consultar, lat, lon) for lat, lon in coordenadas))
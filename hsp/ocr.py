@@ -0,0 +1,285 @@
+"""OCR de planillas escaneadas (PDF sin texto seleccionable o fotos).
+
+Los PDF de varias páginas no se rasterizan completos en memoria: cada página se convierte y se lee por
+separado (pdf2image con first_page/last_page) dentro de un pool de procesos del tamaño de los núcleos
+disponibles. Nunca hay más páginas en vuelo que procesos en el pool, así que la memoria máxima depende
+del tamaño del pool y no del número de páginas. Los textos se reensamblan en el orden original.
+"""
+import atexit
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from hsp import formatos_planilla
+
+try:
+    import pytesseract
+    from pdf2image import convert_from_path, pdfinfo_from_path
+    OCR_DISPONIBLE = True
+except Exception:
+    OCR_DISPONIBLE = False
+
+IDIOMAS_OCR = "spa+eng"
+DPI_OCR = 200
+
+# Si el llamador ya reparte el trabajo entre procesos (p. ej. el generador por lotes), el OCR de cada
+# planilla se hace en serie dentro de su proceso en vez de abrir otro pool anidado.
+OCR_EN_PARALELO = True
+
+# --- ESTRATEGIA ADAPTATIVA DE RESOLUCIÓN ---
+# Primero una pasada barata (baja resolución, escala de grises, página completa). Solo si la confianza
+# media de Tesseract o la cobertura de campos de la planilla quedan por debajo del mínimo se vuelve a
+# rasterizar a mayor resolución; y si el texto de baja resolución ya permitió reconocer la empresa
+# eléctrica (formatos_planilla.detectar_formato()), en esas pasadas caras solo se leen las regiones de
+# interés que su formato registró (regiones_ocr).
+ESTRATEGIA_ADAPTATIVA = {
+    "dpis": (100, 200, 300),
+    "escala_grises": True,
+    "confianza_minima": 75.0,   # 0-100, promedio de image_to_data sobre las palabras reconocidas
+    # Fracción de campos requeridos encontrados en el texto acumulado (páginas anteriores + esta; solo se
+    # evalúa si hay función). No se exige el 100 %: en planillas cuyos campos se reparten en varias hojas
+    # (p. ej. el historial en la segunda) la primera nunca los tiene todos, y subir la resolución no los
+    # hace aparecer; las páginas siguientes completan lo que falte.
+    "cobertura_minima": 0.6,
+    "usar_roi": True,
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def procesos_disponibles():
+    """Núcleos que este proceso puede usar (respeta afinidad/cgroups cuando el sistema lo expone)."""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+def _inicializar_trabajador():
+    # Cada página ya corre en su propio proceso: que Tesseract no abra además sus propios hilos OpenMP
+    # (varios Tesseract multihilo en paralelo compiten por los mismos núcleos y terminan más lentos).
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def _obtener_pool():
+    """Pool compartido por todo el proceso (Streamlit atiende varias sesiones en el mismo proceso):
+    se crea la primera vez que se necesita y se reutiliza, evitando pagar el arranque en cada planilla.
+    Se usa 'spawn' porque hacer fork de un servidor con varios hilos activos no es seguro."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=procesos_disponibles(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_inicializar_trabajador,
+            )
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def _ocr_pagina(ruta_pdf, numero_pagina, dpi):
+    """Rasteriza UNA página del PDF y devuelve su texto. Se ejecuta dentro de un proceso del pool."""
+    paginas = convert_from_path(ruta_pdf, dpi=dpi, first_page=numero_pagina, last_page=numero_pagina)
+    textos = []
+    for img in paginas:
+        textos.append(pytesseract.image_to_string(img, lang=IDIOMAS_OCR))
+        img.close()
+    return "\n".join(textos)
+
+
+def detectar_plantilla_roi(texto):
+    """Formato de planilla (ver formatos_planilla) detectado en el texto, si registró regiones de OCR;
+    None si no se reconoció la empresa o su formato no tiene regiones."""
+    formato = formatos_planilla.detectar_formato(texto)
+    return formato if formatos_planilla.FORMATOS[formato]["regiones_ocr"] else None
+
+
+def _ocr_con_confianza(img):
+    """Una sola llamada a Tesseract (image_to_data) que da a la vez el texto, reconstruido línea por
+    línea, y la confianza media (0-100) de las palabras reconocidas."""
+    datos = pytesseract.image_to_data(img, lang=IDIOMAS_OCR, output_type=pytesseract.Output.DICT)
+    lineas = []
+    linea_actual = None
+    palabras = []
+    confianzas = []
+    for i, palabra in enumerate(datos["text"]):
+        clave_linea = (datos["block_num"][i], datos["par_num"][i], datos["line_num"][i])
+        if clave_linea != linea_actual:
+            if palabras:
+                lineas.append(" ".join(palabras))
+            palabras = []
+            linea_actual = clave_linea
+        palabra = palabra.strip()
+        if palabra:
+            palabras.append(palabra)
+            confianza = float(datos["conf"][i])
+            if confianza >= 0:
+                confianzas.append(confianza)
+    if palabras:
+        lineas.append(" ".join(palabras))
+    confianza_media = sum(confianzas) / len(confianzas) if confianzas else 0.0
+    return "\n".join(lineas), confianza_media
+
+
+def _ocr_regiones(img, regiones):
+    """OCR solo de las regiones (fracciones de la página) indicadas; devuelve el texto unido en orden
+    y la confianza media ponderada por región."""
+    ancho, alto = img.size
+    textos = []
+    confianzas = []
+    for x0, y0, x1, y1 in regiones.values():
+        recorte = img.crop((int(x0 * ancho), int(y0 * alto), int(x1 * ancho), int(y1 * alto)))
+        texto, confianza = _ocr_con_confianza(recorte)
+        recorte.close()
+        textos.append(texto)
+        confianzas.append(confianza)
+    return "\n".join(textos), (sum(confianzas) / len(confianzas) if confianzas else 0.0)
+
+
+def _ocr_pagina_adaptativa(ruta_pdf, numero_pagina, estrategia, evaluar_cobertura=None, texto_previo=""):
+    """Rasteriza y lee UNA página subiendo la resolución solo cuando hace falta (ver ESTRATEGIA_ADAPTATIVA).
+    evaluar_cobertura(texto) -> fracción 0-1 de campos encontrados; None para no usar ese criterio. Se
+    evalúa sobre texto_previo (lo ya leído de las páginas anteriores) más el texto de esta página.
+    Devuelve (texto, informe) con el informe de la pasada elegida: dpi, confianza, cobertura, roi, pasadas."""
+    mejor = None
+    plantilla = None
+    pasadas = 0
+    for dpi in estrategia["dpis"]:
+        pasadas += 1
+        paginas = convert_from_path(ruta_pdf, dpi=dpi, first_page=numero_pagina, last_page=numero_pagina,
+                                    grayscale=estrategia["escala_grises"])
+        if not paginas:
+            break
+        img = paginas[0]
+        try:
+            if plantilla is not None:
+                texto, confianza = _ocr_regiones(img, formatos_planilla.FORMATOS[plantilla]["regiones_ocr"])
+            else:
+                texto, confianza = _ocr_con_confianza(img)
+        finally:
+            img.close()
+
+        cobertura = evaluar_cobertura(texto_previo + texto) if evaluar_cobertura else 1.0
+        informe = {"dpi": dpi, "confianza": round(confianza, 1), "cobertura": cobertura, "roi": plantilla}
+        if mejor is None or (cobertura, confianza) > (mejor[1]["cobertura"], mejor[1]["confianza"]):
+            mejor = (texto, informe)
+        if confianza >= estrategia["confianza_minima"] and cobertura >= estrategia["cobertura_minima"]:
+            break
+
+        # La plantilla se decide con el texto de la pasada de baja resolución y se usa en las siguientes
+        if plantilla is None and estrategia["usar_roi"]:
+            plantilla = detectar_plantilla_roi(texto)
+
+    texto, informe = mejor
+    informe["pasadas"] = pasadas
+    return texto, informe
+
+
+def contar_paginas(ruta_pdf):
+    return int(pdfinfo_from_path(ruta_pdf)["Pages"])
+
+
+def ocr_paginas_pdf(ruta_pdf, paginas, dpi=DPI_OCR, funcion=None, args=()):
+    """Generador que entrega (numero_pagina, texto) en el orden de `paginas`, procesándolas en paralelo.
+    Como máximo hay tantas páginas en proceso como trabajadores tiene el pool; las siguientes se
+    encolan a medida que terminan las anteriores. Si quien consume el generador deja de iterar, las
+    páginas pendientes que aún no empezaron se cancelan.
+    `funcion(ruta_pdf, numero_pagina, *args)` reemplaza al OCR simple a `dpi` (p. ej. la estrategia
+    adaptativa); en ese caso se entrega lo que ella devuelva en lugar del texto."""
+    if funcion is None:
+        funcion, args = _ocr_pagina, (dpi,)
+    paginas = list(paginas)
+    if len(paginas) <= 1 or not OCR_EN_PARALELO:
+        # Una sola página: el viaje de ida y vuelta al pool no compensa.
+        for numero in paginas:
+            yield numero, funcion(ruta_pdf, numero, *args)
+        return
+
+    pool = _obtener_pool()
+    en_vuelo = {}
+    resultados = {}
+    pendientes = iter(paginas)
+    siguiente_a_entregar = 0
+    try:
+        for numero in pendientes:
+            en_vuelo[pool.submit(funcion, ruta_pdf, numero, *args)] = numero
+            if len(en_vuelo) >= procesos_disponibles():
+                break
+
+        while en_vuelo:
+            terminados, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                resultados[en_vuelo.pop(futuro)] = futuro.result()
+                numero = next(pendientes, None)
+                if numero is not None:
+                    en_vuelo[pool.submit(funcion, ruta_pdf, numero, *args)] = numero
+
+            while siguiente_a_entregar < len(paginas) and paginas[siguiente_a_entregar] in resultados:
+                numero = paginas[siguiente_a_entregar]
+                yield numero, resultados.pop(numero)
+                siguiente_a_entregar += 1
+    finally:
+        for futuro in en_vuelo:
+            futuro.cancel()
+
+
+def ocr_pdf_escaneado(datos, dpi=DPI_OCR):
+    """OCR de un PDF escaneado completo a partir de sus bytes. Devuelve el texto de todas las páginas
+    unido en orden (una línea en blanco entre páginas, igual que antes)."""
+    with tempfile.TemporaryDirectory(prefix="hsp_ocr_") as directorio:
+        ruta_pdf = os.path.join(directorio, "planilla.pdf")
+        with open(ruta_pdf, "wb") as f:
+            f.write(datos)
+        total = contar_paginas(ruta_pdf)
+        texto = ""
+        for _, texto_pagina in ocr_paginas_pdf(ruta_pdf, range(1, total + 1), dpi=dpi):
+            texto += texto_pagina + "\n"
+        return texto
+
+
+def ocr_pdf_incremental(datos, completo, max_paginas=None, dpi=DPI_OCR, estrategia=None, evaluar_cobertura=None):
+    """OCR con salida anticipada: después de cada página se llama a completo(texto_acumulado) y, en
+    cuanto devuelve True, se deja de rasterizar. La primera página se procesa sola (en la mayoría de
+    planillas contiene todo lo necesario); el resto, si hace falta, en paralelo. max_paginas limita
+    cuántas páginas se leen como máximo (None = todas).
+    Con `estrategia` (ver ESTRATEGIA_ADAPTATIVA) cada página se lee con resolución adaptativa en vez de
+    a `dpi` fijo; evaluar_cobertura se aplica al texto acumulado: la primera página sola y cada una de
+    las siguientes (que se leen en paralelo) junto con el texto de la primera.
+    Devuelve un dict con texto, paginas_procesadas, paginas_totales, parada_temprana y, con estrategia,
+    el informe de cada página (detalle_paginas)."""
+    with tempfile.TemporaryDirectory(prefix="hsp_ocr_") as directorio:
+        ruta_pdf = os.path.join(directorio, "planilla.pdf")
+        with open(ruta_pdf, "wb") as f:
+            f.write(datos)
+        total = contar_paginas(ruta_pdf)
+        limite = min(total, max_paginas) if max_paginas else total
+
+        resultado = {"texto": "", "paginas_procesadas": 0, "paginas_totales": total,
+                     "parada_temprana": False, "detalle_paginas": []}
+        for paginas_lote in (range(1, min(limite, 1) + 1), range(2, limite + 1)):
+            if estrategia is None:
+                funcion, args = _ocr_pagina, (dpi,)
+            else:
+                # Lo ya leído (la primera página) cuenta para la cobertura de las siguientes
+                funcion, args = _ocr_pagina_adaptativa, (estrategia, evaluar_cobertura, resultado["texto"])
+            paginas = ocr_paginas_pdf(ruta_pdf, paginas_lote, funcion=funcion, args=args)
+            try:
+                for _, salida in paginas:
+                    if estrategia is not None:
+                        salida, informe = salida
+                        resultado["detalle_paginas"].append(informe)
+                    resultado["texto"] += salida + "\n"
+                    resultado["paginas_procesadas"] += 1
+                    if completo(resultado["texto"]):
+                        resultado["parada_temprana"] = resultado["paginas_procesadas"] < total
+                        return resultado
+            finally:
+                paginas.close()
+        return resultado
+
+
+def ocr_imagen(img):
+    return pytesseract.image_to_string(img, lang=IDIOMAS_OCR)
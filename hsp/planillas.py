@@ -0,0 +1,124 @@
+"""Lectura de planillas eléctricas: extracción de texto (PDF digital u OCR) y detección de campos."""
+import io
+
+import pdfplumber
+
+from hsp import formatos_planilla
+from hsp.formatos_planilla import CAMPOS_REQUERIDOS
+from hsp.ocr import ESTRATEGIA_ADAPTATIVA, OCR_DISPONIBLE, ocr_imagen, ocr_pdf_incremental
+from hsp.tabla_facturacion import leer_tabla
+
+if OCR_DISPONIBLE:
+    from PIL import Image
+
+# Una planilla está completa cuando aparecen todos los CAMPOS_REQUERIDOS (ver formatos_planilla): en el
+# OCR de escaneos se deja de leer páginas en ese momento (en planillas CNEL suelen estar en la primera hoja).
+
+# Tope de páginas que se pasan por OCR en un PDF escaneado (las planillas reales tienen 1-3 hojas;
+# lo que venga después suelen ser anexos o publicidad).
+MAX_PAGINAS_OCR = 6
+
+
+def _leer_pdf_digital(datos):
+    """Texto y tabla de facturación de un PDF con texto seleccionable, página por página: pdfplumber
+    solo interpreta una página al pedirle sus palabras, la tabla se busca hasta encontrarla y, con la
+    tabla y los campos requeridos completos, las páginas restantes (anexos) no se leen."""
+    lectura = {"texto": "", "tabla": None, "paginas_procesadas": 0, "paginas_totales": 0}
+    with pdfplumber.open(io.BytesIO(datos)) as pdf:
+        paginas = pdf.pages
+        lectura["paginas_totales"] = len(paginas)
+        for pagina in paginas:
+            lectura["texto"] += (pagina.extract_text() or "") + "\n"
+            if lectura["tabla"] is None:
+                lectura["tabla"] = leer_tabla(pagina)
+            pagina.close()
+            lectura["paginas_procesadas"] += 1
+            if lectura["tabla"] is not None and planilla_completa(lectura["texto"], lectura["tabla"]):
+                break
+    return lectura
+
+
+# --- EXTRACCIÓN DE TEXTO DE ARCHIVOS SUBIDOS (PDF digital u OCR de imagen/escaneo) ---
+def extraer_texto_archivo(archivo_subido):
+    """Devuelve (texto_extraido, metodo). metodo: 'texto_pdf', 'ocr', o 'fallo'."""
+    datos = archivo_subido.read()
+    archivo_subido.seek(0)
+    return extraer_texto_bytes(datos, archivo_subido.name)
+
+
+def extraer_texto_bytes(datos, nombre):
+    """Igual que extraer_texto_archivo(), pero a partir del contenido ya leído y el nombre del archivo
+    (la extensión decide si se trata como PDF o como imagen)."""
+    resultado = extraer_texto_detallado(datos, nombre)
+    return resultado["texto"], resultado["metodo"]
+
+
+def extraer_texto_detallado(datos, nombre, max_paginas_ocr=MAX_PAGINAS_OCR, estrategia_ocr=ESTRATEGIA_ADAPTATIVA):
+    """Extrae el texto y devuelve además un informe: dict con texto, metodo, paginas_procesadas y
+    paginas_totales (None en imágenes) y, en PDFs digitales, la tabla de facturación leída por
+    geometría (tabla_facturacion.leer_tabla(); None si no se encontró).
+    estrategia_ocr=None usa el OCR clásico (página completa a 200 dpi) en lugar del adaptativo."""
+    resultado = {"texto": "", "metodo": "fallo", "paginas_procesadas": None, "paginas_totales": None,
+                 "detalle_ocr": None, "tabla": None}
+    nombre = nombre.lower()
+    if nombre.endswith(".pdf"):
+        try:
+            lectura = _leer_pdf_digital(datos)
+        except Exception:
+            lectura = {"texto": ""}
+
+        if len(lectura["texto"].strip()) >= 25:
+            resultado.update(lectura, metodo="texto_pdf")
+            return resultado
+
+        # El PDF no tiene texto seleccionable (probablemente escaneado) -> intentar OCR, página por
+        # página y deteniéndose en cuanto se encuentran todos los campos requeridos
+        if OCR_DISPONIBLE:
+            try:
+                ocr = ocr_pdf_incremental(datos, planilla_completa, max_paginas=max_paginas_ocr,
+                                          estrategia=estrategia_ocr, evaluar_cobertura=cobertura_campos)
+                resultado.update(paginas_procesadas=ocr["paginas_procesadas"], paginas_totales=ocr["paginas_totales"],
+                                 detalle_ocr=ocr["detalle_paginas"] or None)
+                if len(ocr["texto"].strip()) >= 10:
+                    resultado.update(texto=ocr["texto"], metodo="ocr")
+            except Exception:
+                pass
+        return resultado
+
+    else:
+        # Imagen (jpg/png)
+        if OCR_DISPONIBLE:
+            try:
+                img = Image.open(io.BytesIO(datos))
+                texto_ocr = ocr_imagen(img)
+                if len(texto_ocr.strip()) >= 10:
+                    resultado.update(texto=texto_ocr, metodo="ocr")
+            except Exception:
+                pass
+        return resultado
+
+
+def campos_faltantes(datos_planilla):
+    """Lista de CAMPOS_REQUERIDOS que quedaron vacíos en el resultado de extraer_datos_planilla()."""
+    return [campo for campo in CAMPOS_REQUERIDOS if not datos_planilla.get(campo)]
+
+
+def planilla_completa(texto, tabla=None):
+    return not campos_faltantes(extraer_datos_planilla(texto, tabla))
+
+
+def cobertura_campos(texto):
+    """Fracción (0-1) de CAMPOS_REQUERIDOS que se detectan en el texto."""
+    return 1 - len(campos_faltantes(extraer_datos_planilla(texto))) / len(CAMPOS_REQUERIDOS)
+
+
+def extraer_datos_planilla(texto, tabla=None):
+    """Extrae datos de una planilla eléctrica ecuatoriana (CNEL u otra), best-effort.
+    Nota: en varias plantillas de CNEL, el extractor de texto separa las etiquetas de sus valores
+    (ej. 'Nombre Cliente' aparece lejos del nombre real). Por eso el cliente/contrato se buscan por
+    estructura (número de cuenta contrato seguido del nombre en mayúsculas) en vez de por etiqueta.
+    La lectura es de una sola pasada por las líneas (ver hsp/analizador_planillas.py). Las planillas de
+    otras empresas (EEQ, CENTROSUR) se reconocen por su encabezado y se leen por etiquetas; el resultado
+    incluye "formato" y "confianza" (ver hsp/formatos_planilla.py). Con la `tabla` de facturación de un
+    PDF digital, el monto de energía y los kWh salen de sus columnas (ver hsp/tabla_facturacion.py)."""
+    return formatos_planilla.analizar(texto, tabla)
@@ -0,0 +1,186 @@
+"""Plantillas del PDF: las partes fijas de cada página se dibujan una vez por proceso y se reutilizan.
+
+Cada propuesta volvía a calcular, con fpdf2, la misma maquetación: el encabezado (logo, razón social,
+RUC y teléfonos) en cada página, los títulos, el pie de página, las filas fijas de la tabla de
+componentes, la página de casos de éxito... y volvía a decodificar y comprimir las mismas imágenes.
+Aquí:
+
+  - dibujar(pdf, nombre, funcion, *args) graba los operadores PDF que `funcion` agrega a la página la
+    primera vez (un fragmento) y, en los documentos siguientes, los copia tal cual al flujo de la página
+    (renumerando fuentes e imágenes a las del documento) y deja a fpdf2 en el estado gráfico y la
+    posición con que terminó el fragmento. La clave incluye los argumentos y el estado de partida
+    (fuente, colores, grosor de línea, posición, márgenes): un fragmento solo se reutiliza donde
+    dibujarlo daría exactamente los mismos bytes. Si el dibujo salta de página no se graba.
+  - registrar_imagen(pdf, nombre, info) da de alta en el documento una imagen ya interpretada por
+    fpdf2 en otro documento (los datos comprimidos se comparten): los activos fijos (hsp/activos.py) y
+    los gráficos PNG (hsp/graficos.py) se decodifican y comprimen una sola vez por proceso.
+
+Así, generar N propuestas cuesta, después de la primera, solo el contenido variable de cada cliente.
+"""
+import copy
+import dataclasses
+import re
+import threading
+from collections import OrderedDict
+
+from fpdf.enums import PDFResourceType
+from fpdf.fonts import CoreFont
+
+_RE_FUENTE = re.compile(rb"/F(\d+) ([\d.]+ Tf)")
+_RE_IMAGEN = re.compile(rb"/I(\d+) Do")
+
+
+class CachePlantillas:
+    """LRU en memoria de fragmentos grabados. Segura entre hilos."""
+
+    def __init__(self, max_entradas=128):
+        self.max_entradas = max_entradas
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+        self.reutilizados = 0
+        self.grabados = 0
+
+    def buscar(self, clave):
+        with self._lock:
+            fragmento = self._memoria.get(clave)
+            if fragmento is not None:
+                self._memoria.move_to_end(clave)
+                self.reutilizados += 1
+            return fragmento
+
+    def guardar(self, clave, fragmento):
+        with self._lock:
+            self.grabados += 1
+            self._memoria[clave] = fragmento
+            while len(self._memoria) > self.max_entradas:
+                self._memoria.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._memoria.clear()
+
+    def estadisticas(self):
+        consultas = self.reutilizados + self.grabados
+        return {
+            "entradas": len(self._memoria),
+            "reutilizados": self.reutilizados,
+            "grabados": self.grabados,
+            "tasa_reutilizacion": self.reutilizados / consultas if consultas else 0.0,
+        }
+
+
+CACHE_PLANTILLAS = CachePlantillas()
+
+
+def registrar_imagen(pdf, nombre, info):
+    """Da de alta en el image_cache del documento, con el nombre `nombre`, una copia superficial de
+    `info` (imagen ya interpretada por fpdf2, sin perfil ICC): los datos se comparten, el índice y el
+    conteo de usos son del documento. Devuelve la entrada del documento (la existente, si ya estaba)."""
+    imagenes = pdf.image_cache.images
+    registrada = imagenes.get(nombre)
+    if registrada is None:
+        registrada = copy.copy(info)
+        registrada.update(i=len(imagenes) + 1, usages=0, iccp_i=None)
+        imagenes[nombre] = registrada
+    return registrada
+
+
+def _estado(pdf):
+    """Todo lo que decide qué escribe fpdf2: geometría de la página, márgenes, posición, el estado gráfico
+    actual (la fuente, por su nombre) y la versión de PDF (una imagen con transparencia la sube a 1.4)."""
+    estado = pdf._get_current_graphics_state()
+    campos = []
+    for campo in dataclasses.fields(estado):
+        valor = getattr(estado, campo.name)
+        campos.append(valor.fontkey if campo.name == "current_font" and valor is not None else valor)
+    return repr((
+        pdf.w, pdf.h, pdf.k, pdf.l_margin, pdf.t_margin, pdf.r_margin, pdf.b_margin, pdf.auto_page_break,
+        pdf.x, pdf.y, pdf._lasth, pdf.pdf_version, campos,
+    ))
+
+
+def _grabar(pdf, funcion, args):
+    pagina = pdf.page
+    inicio = len(pdf.pages[pagina].contents)
+    funcion(pdf, *args)
+    if pdf.page != pagina:
+        return None
+    contenido = bytes(pdf.pages[pagina].contents[inicio:])
+
+    fuentes_por_indice = {fuente.i: fuente for fuente in pdf.fonts.values()}
+    fuentes = {}
+    for indice in {int(m.group(1)) for m in _RE_FUENTE.finditer(contenido)}:
+        fuente = fuentes_por_indice[indice]
+        if not isinstance(fuente, CoreFont):
+            return None  # las fuentes TTF llevan su subconjunto de glifos por documento
+        fuentes[indice] = (fuente.fontkey, fuente.emphasis.style)
+
+    imagenes_por_indice = {info["i"]: (nombre, info) for nombre, info in pdf.image_cache.images.items()}
+    imagenes = {}
+    for indice in {int(m.group(1)) for m in _RE_IMAGEN.finditer(contenido)}:
+        nombre, info = imagenes_por_indice[indice]
+        if info.get("iccp_i") is not None:
+            return None
+        imagenes[indice] = (nombre, info)
+
+    estado_final = pdf._get_current_graphics_state()
+    fuente_final = estado_final.current_font
+    if fuente_final is not None and not isinstance(fuente_final, CoreFont):
+        return None
+    estado_final.current_font = None
+    return {
+        "contenido": contenido,
+        "fuentes": fuentes,
+        "imagenes": imagenes,
+        "estado_final": estado_final,
+        "fuente_final": (fuente_final.fontkey, fuente_final.emphasis.style) if fuente_final else None,
+        "x": pdf.x, "y": pdf.y, "lasth": pdf._lasth, "version_pdf": pdf.pdf_version,
+    }
+
+
+def _fuente_del_documento(pdf, fontkey, estilo):
+    fuente = pdf.fonts.get(fontkey)
+    if fuente is None:
+        fuente = pdf.fonts[fontkey] = CoreFont(len(pdf.fonts) + 1, fontkey, estilo)  # igual que set_font()
+    return fuente
+
+
+def _reproducir(pdf, fragmento):
+    contenido = fragmento["contenido"]
+    mapa_fuentes = {}
+    for indice, (fontkey, estilo) in fragmento["fuentes"].items():
+        fuente = _fuente_del_documento(pdf, fontkey, estilo)
+        pdf._resource_catalog.add(PDFResourceType.FONT, fuente.i, pdf.page)
+        mapa_fuentes[indice] = fuente.i
+    mapa_imagenes = {}
+    for indice, (nombre, info) in fragmento["imagenes"].items():
+        registrada = registrar_imagen(pdf, nombre, info)
+        registrada["usages"] += 1
+        pdf._resource_catalog.add(PDFResourceType.X_OBJECT, registrada["i"], pdf.page)
+        mapa_imagenes[indice] = registrada["i"]
+    if any(k != v for k, v in mapa_fuentes.items()):
+        contenido = _RE_FUENTE.sub(lambda m: b"/F%d %s" % (mapa_fuentes[int(m.group(1))], m.group(2)), contenido)
+    if any(k != v for k, v in mapa_imagenes.items()):
+        contenido = _RE_IMAGEN.sub(lambda m: b"/I%d Do" % mapa_imagenes[int(m.group(1))], contenido)
+    pdf.pages[pdf.page].contents += contenido
+
+    estado = fragmento["estado_final"].copy()
+    if fragmento["fuente_final"]:
+        estado.current_font = _fuente_del_documento(pdf, *fragmento["fuente_final"])
+    pdf._pop_local_stack()
+    pdf._push_local_stack(estado)
+    pdf.x, pdf.y, pdf._lasth = fragmento["x"], fragmento["y"], fragmento["lasth"]
+    pdf.pdf_version = fragmento["version_pdf"]
+
+
+def dibujar(pdf, nombre, funcion, *args):
+    """Equivale a funcion(pdf, *args), pero reutiliza los operadores ya grabados para el mismo `nombre`,
+    los mismos argumentos (que deben tener un repr estable) y el mismo estado de partida."""
+    clave = (nombre, repr(args), _estado(pdf))
+    fragmento = CACHE_PLANTILLAS.buscar(clave)
+    if fragmento is not None:
+        _reproducir(pdf, fragmento)
+        return
+    fragmento = _grabar(pdf, funcion, args)
+    if fragmento is not None:
+        CACHE_PLANTILLAS.guardar(clave, fragmento)
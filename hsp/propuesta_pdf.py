@@ -0,0 +1,732 @@
+"""Generación del PDF de la propuesta (portada, páginas técnicas y económicas, gráficos)."""
+
+from fpdf import FPDF
+
+from hsp import fotos, graficos, plantillas
+from hsp.activos import ACTIVOS
+from hsp.calculos import filas_tabla_flujo, produccion_por_mes_hist
+
+# --- ACTIVOS FIJOS (logo, fotos de portafolio) ---
+# Deben vivir en una carpeta "assets/" en la raíz del repositorio (junto a app.py); se insertan ya
+# reducidos y recomprimidos (ver hsp/activos.py).
+
+ARCHIVOS_ASSETS_REQUERIDOS = [
+    "logo_portada.png",
+]
+
+
+def _texto_pdf_seguro(texto):
+    """Limpia texto proveniente de fuentes externas (planillas OCR, entradas del usuario) para que
+    nunca rompa la generación del PDF por un caracter no soportado por la fuente Arial básica
+    (que solo admite Latin-1). Reemplaza los símbolos más comunes (guiones largos, comillas
+    tipográficas, viñetas, etc.) y descarta cualquier otro caracter no representable."""
+    if texto is None:
+        return ""
+    texto = str(texto)
+    reemplazos = {
+        "\u2014": "-", "\u2013": "-", "\u2018": "'", "\u2019": "'",
+        "\u201c": '"', "\u201d": '"', "\u2026": "...", "\u2022": "-",
+        "\u00a0": " ",
+    }
+    for buscado, reemplazo in reemplazos.items():
+        texto = texto.replace(buscado, reemplazo)
+    return texto.encode("latin-1", errors="replace").decode("latin-1")
+
+
+def _dibujar_pie_fijo(pdf):
+    pdf.set_font('Arial', 'I', 8)
+    pdf.set_text_color(130, 130, 130)
+    pdf.cell(0, 10, 'Latitud Solar - Propuesta confidencial, de uso exclusivo del destinatario.', 0, 0, 'C')
+
+
+class PropuestaPDF(FPDF):
+    """Agrega automáticamente, en TODAS las páginas, el pie de página de confidencialidad y número de hoja.
+    Las partes fijas de las páginas se reutilizan entre documentos (ver hsp/plantillas.py)."""
+    def footer(self):
+        self.set_y(-15)
+        plantillas.dibujar(self, "pie", _dibujar_pie_fijo)
+        self.set_y(-15)
+        self.set_x(-25)
+        self.set_font('Arial', '', 8)
+        self.cell(10, 10, str(self.page_no()), 0, 0, 'R')
+        self.set_text_color(0, 0, 0)
+
+
+# --- FUNCIONES AUXILIARES DE DISEÑO PARA EL PDF ---
+def _foto_proyecto(foto, ancho_mm, calidad_fotos=None):
+    """Foto subida por el usuario, enderezada y reducida a su recuadro de impresión (ver hsp/fotos.py),
+    o None si no hay foto. `foto` es la ya procesada por fotos.procesar_foto() o los bytes tal como se
+    subieron. Su alto real (fotos.alto_mm) evita solapamientos con lo que sigue."""
+    if not foto:
+        return None
+    if isinstance(foto, dict):
+        return foto
+    return fotos.procesar_foto(foto, ancho_mm, calidad_fotos or fotos.PERFIL_DEFAULT)
+
+
+def agregar_encabezado(pdf):
+    plantillas.dibujar(pdf, "encabezado", _dibujar_encabezado)
+
+
+def _dibujar_encabezado(pdf):
+    if ACTIVOS.entrada("logo_portada.png"):
+        ACTIVOS.insertar(pdf, "logo_portada.png", x=15, y=10, w=32, h=ACTIVOS.alto_mm("logo_portada.png", 32))
+
+    pdf.set_font('Arial', 'B', 10)
+    pdf.set_y(15)
+    pdf.cell(0, 5, 'LATITUDSOLAR C.LTDA.', 0, 1, 'C')
+    pdf.ln(2)
+
+    pdf.set_font('Arial', 'B', 9)
+    pdf.cell(50, 5, '', 0, 0)
+    pdf.cell(30, 5, 'RUC', 0, 0, 'R')
+    pdf.set_font('Arial', '', 9)
+    pdf.cell(40, 5, '0993403111001', 0, 0, 'L')
+    pdf.set_font('Arial', 'B', 9)
+    pdf.cell(25, 5, 'T ELEFONOS:', 0, 0, 'R')
+    pdf.set_font('Arial', '', 9)
+    pdf.cell(0, 5, '0969952794-0959032257', 0, 1, 'L')
+    pdf.ln(8)
+
+
+def agregar_titulo_principal(pdf, texto):
+    plantillas.dibujar(pdf, "titulo_principal", _dibujar_titulo_principal, texto)
+
+
+def _dibujar_titulo_principal(pdf, texto):
+    pdf.set_font('Arial', 'B', 16)
+    pdf.cell(0, 10, texto, 0, 1, 'C')
+    pdf.set_draw_color(31, 119, 180)
+    pdf.set_line_width(1)
+    pdf.line(30, pdf.get_y(), 180, pdf.get_y())
+    pdf.ln(10)
+
+
+def dibujar_titulo_seccion(pdf, texto):
+    y = pdf.get_y()
+    pdf.set_fill_color(230, 240, 250)
+    pdf.rect(15, y, 180, 10, 'F')
+    pdf.set_fill_color(31, 119, 180)
+    pdf.rect(15, y, 2, 10, 'F')
+    pdf.set_xy(20, y + 1.5)
+    pdf.set_font('Arial', 'B', 12)
+    pdf.set_text_color(30, 30, 30)
+    pdf.cell(170, 8, texto, 0, 1, 'L')
+    pdf.ln(4)
+
+
+def dibujar_tarjeta_metrica(pdf, x, y, w, h, titulo, valor, color_fondo, color_borde, color_texto):
+    pdf.set_fill_color(*color_fondo)
+    pdf.set_draw_color(*color_borde)
+    pdf.set_line_width(0.4)
+    pdf.rect(x, y, w, h, 'DF')
+    pdf.set_xy(x + 4, y + 3)
+    pdf.set_font('Arial', 'B', 8)
+    pdf.set_text_color(90, 90, 90)
+    pdf.cell(w - 8, 5, titulo, 0, 1, 'L')
+    pdf.set_xy(x + 4, y + 9)
+    pdf.set_font('Arial', 'B', 18)
+    pdf.set_text_color(*color_texto)
+    pdf.cell(w - 8, 10, valor, 0, 0, 'L')
+
+
+# --- PÁGINA: PORTADA ---
+def agregar_pagina_portada(pdf, potencia_kwp):
+    pdf.add_page()
+    plantillas.dibujar(pdf, "logo_portada", _dibujar_logo_portada)
+
+    pdf.set_font('Arial', 'B', 18)
+    pdf.set_text_color(0, 0, 0)
+    pdf.cell(0, 10, f'PROPUESTA TÉCNICA ECONÓMICA {potencia_kwp:.0f}KWP', 0, 1, 'C')
+
+
+def _dibujar_logo_portada(pdf):
+    pdf.set_y(90)
+    if ACTIVOS.insertar(pdf, "logo_portada.png", x=(210 - 130) / 2, y=90, w=130):
+        alto_logo = ACTIVOS.alto_mm("logo_portada.png", 130)
+        pdf.set_y(90 + alto_logo + 15)
+    else:
+        pdf.set_font('Arial', 'B', 26)
+        pdf.cell(0, 15, 'Latitud Solar', 0, 1, 'C')
+        pdf.ln(10)
+
+
+# --- PÁGINAS: CASOS DE ÉXITO (fijas, siempre las mismas fotos de portafolio) ---
+def _encabezado_casos_exito(pdf):
+    ACTIVOS.insertar(pdf, "logo_icono.png", x=15, y=15, w=14)
+    pdf.set_xy(32, 17)
+    pdf.set_font('Arial', 'B', 11)
+    pdf.set_text_color(20, 20, 20)
+    pdf.cell(0, 5, 'LATITUDSOLAR', 0, 2, 'L')
+    pdf.set_x(32)
+    pdf.cell(0, 5, 'C.LTDA.', 0, 1, 'L')
+
+    pdf.set_font('Arial', 'B', 14)
+    pdf.set_text_color(31, 119, 180)
+    pdf.set_xy(120, 20)
+    pdf.cell(75, 8, 'Casos de éxito', 0, 1, 'R')
+    pdf.set_text_color(0, 0, 0)
+
+
+def _pie_pagina_contacto(pdf):
+    pdf.set_y(275)
+    pdf.set_font('Arial', '', 9)
+    pdf.set_text_color(60, 60, 60)
+    pdf.cell(0, 5, '0969952794', 0, 1, 'L')
+    pdf.cell(0, 5, 'ventas@latitudsolarecuador.com', 0, 1, 'L')
+    pdf.set_text_color(0, 0, 0)
+
+
+def agregar_pagina_casos_exito(pdf, fotos):
+    """fotos: lista de nombres de archivo de assets/ (hasta 4), organizadas en 2 filas de 2.
+    Nota: algunas de estas imágenes son en realidad un collage de 2 fotos combinadas en un solo
+    archivo (así vienen del material original), y varían bastante en proporción (unas panorámicas,
+    otras verticales). Por eso, para cada fila, se calcula la altura que hace que el ancho total
+    de sus 2 fotos llene exactamente el ancho disponible de la página — sin distorsionar ninguna
+    y sin que ninguna se salga del margen."""
+    pdf.add_page()
+    plantillas.dibujar(pdf, "casos_exito", _dibujar_casos_exito, tuple(fotos))
+
+
+def _dibujar_casos_exito(pdf, fotos):
+    _encabezado_casos_exito(pdf)
+
+    ANCHO_DISPONIBLE = 180
+    GAP_X = 6
+    GAP_Y = 14
+    y = 45
+
+    for i in range(0, len(fotos), 2):
+        par = fotos[i:i + 2]
+        proporciones = [ACTIVOS.proporcion(nombre) for nombre in par]
+
+        suma_proporciones = sum(p for p in proporciones if p) or 1
+        alto_fila = (ANCHO_DISPONIBLE - GAP_X) / suma_proporciones
+
+        x = 15
+        for nombre, prop in zip(par, proporciones):
+            if prop is None:
+                continue
+            try:
+                ancho = alto_fila * prop
+                ACTIVOS.insertar(pdf, nombre, x=x, y=y, w=ancho, h=alto_fila)
+                x += ancho + GAP_X
+            except Exception:
+                pass
+        y += alto_fila + GAP_Y
+
+    _pie_pagina_contacto(pdf)
+
+
+# --- PÁGINA: PROPUESTA DE AHORRO ---
+def agregar_pagina_propuesta_ahorro(pdf, nombre_cliente, potencia_final, numero_paneles, potencia_panel_wp,
+                                     area_total_m2, respaldo_kw, inv_final, ahorro_vida_util, payback_exacto,
+                                     foto_techo=None, calidad_fotos=None):
+    pdf.add_page()
+    agregar_encabezado(pdf)
+    agregar_titulo_principal(pdf, 'PROPUESTA DE AHORRO')
+
+    pdf.set_font('Arial', '', 10.5)
+    texto_intro = (
+        f"Propuesta técnica y económica para la implementación de una planta solar fotovoltaica On-Grid "
+        f"con respaldo de energía, diseñada para optimizar los costos energéticos y promover la sostenibilidad "
+        f"de la residencia de {_texto_pdf_seguro(nombre_cliente).upper()}."
+    )
+    pdf.multi_cell(0, 6, texto_intro)
+    pdf.ln(4)
+
+    foto_techo = _foto_proyecto(foto_techo, fotos.ANCHO_FOTO_AHORRO_MM, calidad_fotos)
+    if foto_techo:
+        ancho_foto = fotos.ANCHO_FOTO_AHORRO_MM
+        alto_foto = fotos.alto_mm(foto_techo, ancho_foto)
+        x_foto = (210 - ancho_foto) / 2
+        y_foto = pdf.get_y()
+        pdf.image(fotos.imagen(foto_techo), x=x_foto, y=y_foto, w=ancho_foto)
+        pdf.set_draw_color(220, 30, 30)
+        pdf.set_line_width(1)
+        pdf.rect(x_foto, y_foto, ancho_foto, alto_foto)
+        pdf.set_y(y_foto + alto_foto + 8)
+    else:
+        pdf.ln(11)
+
+    filas = [
+        ("Potencia FV", f"{potencia_final:.0f} kWp"),
+        ("Total de módulos", f"{numero_paneles} unidades"),
+        ("Área de los módulos", f"{area_total_m2:,.2f} m²"),
+        ("Respaldo de cargas críticas", f"{respaldo_kw:.0f} kW/h"),
+        ("Vida útil y producción de energía", "30 años"),
+        ("Costo de planta solar", f"{inv_final:,.2f} USD"),
+        ("Ahorro en vida útil", f"${ahorro_vida_util:,.2f} USD"),
+        ("Recuperación de inversión", f"{payback_exacto:.1f} años" if payback_exacto else "N/A"),
+    ]
+
+    if pdf.get_y() > 230:
+        pdf.add_page()
+        agregar_encabezado(pdf)
+
+    y_tabla = pdf.get_y()
+    pdf.set_fill_color(31, 119, 180)
+    pdf.set_text_color(255, 255, 255)
+    pdf.set_font('Arial', 'B', 10)
+    pdf.set_xy(15, y_tabla)
+    pdf.cell(90, 9, 'Parámetro', 0, 0, 'L', fill=True)
+    pdf.cell(90, 9, 'Unidades / Valor', 0, 1, 'L', fill=True)
+
+    pdf.set_font('Arial', '', 10)
+    for i, (parametro, valor) in enumerate(filas):
+        es_ahorro_vida_util = parametro == "Ahorro en vida útil"
+        if es_ahorro_vida_util:
+            color_fondo = (163, 219, 190)
+        elif i % 2 == 0:
+            color_fondo = (245, 246, 247)
+        else:
+            color_fondo = (255, 255, 255)
+        pdf.set_fill_color(*color_fondo)
+        pdf.set_text_color(50, 50, 50) if es_ahorro_vida_util else pdf.set_text_color(90, 90, 90)
+        pdf.set_font('Arial', 'B', 10) if es_ahorro_vida_util else pdf.set_font('Arial', '', 10)
+        pdf.cell(90, 9, parametro, 0, 0, 'L', fill=True)
+        pdf.set_text_color(39, 174, 96)
+        pdf.set_font('Arial', 'B', 10)
+        pdf.cell(90, 9, valor, 0, 1, 'L', fill=True)
+        pdf.set_font('Arial', '', 10)
+    pdf.set_text_color(0, 0, 0)
+
+
+# --- PÁGINA: DISTRIBUCIÓN A CUBIERTA (fotos editables, propias de cada proyecto) ---
+def agregar_pagina_distribucion_cubierta(pdf, foto_antes=None, foto_despues=None, calidad_fotos=None):
+    pdf.add_page()
+    agregar_encabezado(pdf)
+    agregar_titulo_principal(pdf, 'DISTRIBUCIÓN A CUBIERTA')
+
+    y = pdf.get_y()
+    ancho = fotos.ANCHO_FOTO_CUBIERTA_MM
+
+    foto_antes = _foto_proyecto(foto_antes, ancho, calidad_fotos)
+    if foto_antes:
+        pdf.image(fotos.imagen(foto_antes), x=(210 - ancho) / 2, y=y, w=ancho)
+        y += fotos.alto_mm(foto_antes, ancho) + 10
+
+    foto_despues = _foto_proyecto(foto_despues, ancho, calidad_fotos)
+    if foto_despues:
+        pdf.image(fotos.imagen(foto_despues), x=(210 - ancho) / 2, y=y, w=ancho)
+    # Si no se sube ninguna foto, la página queda solo con el título (plantilla vacía).
+
+
+# --- PÁGINA: ALCANCE DE SUMINISTRO Y COMPONENTES ---
+ANCHOS_COMPONENTES = [45, 105, 30]
+# Filas de la tabla de componentes que no dependen del proyecto (la de paneles va primero).
+COMPONENTES_FIJOS = [
+    ("Inversores", "Sistema de inversores híbridos con inyección a red y respaldo.", "Incluido"),
+    ("Estructura de Montaje", "Aluminio anodizado (mid/end clamps y tornillería)", "Incluido"),
+    ("Protecciones Eléctricas", "Tableros de protección en DC y AC", "Incluido"),
+    ("Canalización y Cableado", "Cableado fotovoltaico y tubería", "Incluido"),
+    ("Sistema de Monitoreo", "Sistema de monitoreo remoto", "Incluido"),
+    ("Gestión de Medidor", "Tramitación legal ante CNEL", "Incluido"),
+    ("Instalación y Puesta en Marcha", "Mano de obra especializada", "Incluido"),
+    ("Inducción y Capacitación", "Sesión técnica", "Incluido"),
+    ("Mantenimiento", "Primer año de mantenimiento preventivo", "Gratis"),
+]
+
+
+def agregar_pagina_alcance_suministro(pdf, potencia_final, numero_paneles, potencia_panel_wp):
+    pdf.add_page()
+    agregar_encabezado(pdf)
+    agregar_titulo_principal(pdf, 'ALCANCE DE SUMINISTRO Y COMPONENTES')
+
+    pdf.set_font('Arial', 'B', 11)
+    pdf.cell(0, 8, '1. ALCANCE DEL PROYECTO', 0, 1, 'L')
+    pdf.set_font('Arial', '', 10)
+    texto_alcance = (
+        f"El proyecto comprende la ejecución integral de un sistema de generación fotovoltaica de "
+        f"{potencia_final:.0f}KWP bajo la modalidad \"llave en mano\", que incluye desde la ingeniería, "
+        f"suministro y montaje, hasta la gestión administrativa necesaria para la puesta en marcha legal "
+        f"ante la empresa eléctrica CNEL."
+    )
+    pdf.multi_cell(0, 6, texto_alcance)
+    pdf.ln(6)
+
+    pdf.set_font('Arial', 'B', 11)
+    pdf.cell(0, 8, '3. Tabla de Suministro y Componentes', 0, 1, 'L')
+
+    componentes = [
+        ("Paneles Solares", f"{numero_paneles} unidades (Longi, Trina o Yingli) de {potencia_panel_wp:.0f}Wp", "Incluido"),
+    ] + COMPONENTES_FIJOS
+
+    pdf.set_fill_color(31, 119, 180)
+    pdf.set_text_color(255, 255, 255)
+    pdf.set_font('Arial', 'B', 9.5)
+    pdf.cell(ANCHOS_COMPONENTES[0], 9, 'Componente / Servicio', 0, 0, 'L', fill=True)
+    pdf.cell(ANCHOS_COMPONENTES[1], 9, 'Cantidad / Especificación', 0, 0, 'L', fill=True)
+    pdf.cell(ANCHOS_COMPONENTES[2], 9, 'Estado', 0, 1, 'C', fill=True)
+
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font('Arial', '', 9)
+    # La primera fila depende del proyecto; las demás son siempre las mismas: se reutilizan de a una
+    # (cada fila revisa antes el salto de página, así que la tabla se corta igual que antes).
+    for i, fila in enumerate(componentes):
+        if pdf.get_y() > 265:
+            pdf.add_page()
+            agregar_encabezado(pdf)
+        if i == 0:
+            _dibujar_fila_componente(pdf, i, fila)
+        else:
+            plantillas.dibujar(pdf, "fila_componente", _dibujar_fila_componente, i, fila)
+
+
+def _dibujar_fila_componente(pdf, i, fila):
+    comp, espec, estado = fila
+    anchos = ANCHOS_COMPONENTES
+    y_ini = pdf.get_y()
+    if i % 2 == 0:
+        pdf.set_fill_color(245, 246, 247)
+    else:
+        pdf.set_fill_color(255, 255, 255)
+    pdf.multi_cell(anchos[0], 7, comp, 0, 'L', fill=True)
+    y_fin_izq = pdf.get_y()
+    pdf.set_xy(15 + anchos[0], y_ini)
+    pdf.multi_cell(anchos[1], 7, espec, 0, 'L', fill=True)
+    y_fin_centro = pdf.get_y()
+    alto_fila = max(y_fin_izq, y_fin_centro) - y_ini
+    pdf.set_xy(15 + anchos[0] + anchos[1], y_ini)
+    pdf.cell(anchos[2], alto_fila, estado, 0, 1, 'C', fill=True)
+    pdf.set_y(max(y_fin_izq, y_fin_centro))
+
+
+# --- PÁGINA: RESUMEN FINAL SIMPLIFICADO (tabla ejecutiva + saldo a favor) ---
+def agregar_pagina_resumen_final(pdf, tipo_proyecto, payback_exacto, ahorro_vida_util, inv_final, data_rows):
+    pdf.add_page()
+    agregar_encabezado(pdf)
+    agregar_titulo_principal(pdf, f'PROPUESTA SOLAR - {tipo_proyecto.upper()}')
+
+    saldo_favor = ahorro_vida_util - inv_final
+    pdf.set_font('Arial', '', 10.5)
+    texto_resumen = (
+        f"La inversión se recupera en {payback_exacto:.1f} años solo con el ahorro energético. "
+        f"Al trigésimo año el beneficio acumulado será de ${ahorro_vida_util:,.2f}, dejando un saldo a favor "
+        f"neto constante que maximizará la liquidez durante los 30 años de vida útil de la planta solar."
+    ) if payback_exacto else "Proyección de ahorro a 30 años."
+    pdf.multi_cell(0, 6, texto_resumen)
+    pdf.ln(4)
+
+    headers = ['Año', 'Ahorro Energético', 'Ahorro Tributario', 'Ahorro Total Anual', 'Ahorro Acumulado']
+    anchos = [20, 40, 40, 40, 40]
+    pdf.set_fill_color(31, 119, 180)
+    pdf.set_text_color(255, 255, 255)
+    pdf.set_font('Arial', 'B', 9)
+    for i, h in enumerate(headers):
+        pdf.cell(anchos[i], 8, h, 1, 0, 'C', fill=True)
+    pdf.ln()
+
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font('Arial', '', 8.5)
+    for row in data_rows:
+        if pdf.get_y() > 260:
+            pdf.add_page()
+            agregar_encabezado(pdf)
+            pdf.set_fill_color(31, 119, 180); pdf.set_text_color(255, 255, 255); pdf.set_font('Arial', 'B', 9)
+            for i, h in enumerate(headers):
+                pdf.cell(anchos[i], 8, h, 1, 0, 'C', fill=True)
+            pdf.ln()
+            pdf.set_text_color(0, 0, 0); pdf.set_font('Arial', '', 8.5)
+        pdf.cell(anchos[0], 7, f"Año {row['Año']}", 1, 0, 'C')
+        pdf.cell(anchos[1], 7, row['Ahorro Energía'], 1, 0, 'C')
+        pdf.cell(anchos[2], 7, row['Ahorro Trib.'], 1, 0, 'C')
+        pdf.cell(anchos[3], 7, row['Ahorro Año'], 1, 0, 'C')
+        pdf.cell(anchos[4], 7, row['Acumulado'], 1, 1, 'C')
+
+    pdf.ln(4)
+    ancho_resumen = sum(anchos)
+    filas_resumen = [
+        ("Capital Total Ahorrado", f"${ahorro_vida_util:,.2f}", True),
+        ("Inversión Inicial Estimada", f"-${inv_final:,.2f}", False),
+        ("Saldo a Favor Neto", f"${saldo_favor:,.2f}", True),
+        ("Retorno de Inversión", f"{payback_exacto:.1f} años" if payback_exacto else "N/A", False),
+    ]
+    for etiqueta, valor, negrita in filas_resumen:
+        if pdf.get_y() > 270:
+            pdf.add_page()
+            agregar_encabezado(pdf)
+        pdf.set_font('Arial', 'B' if negrita else '', 10)
+        pdf.cell(ancho_resumen - 50, 8, etiqueta, 0, 0, 'R' if not negrita else 'R')
+        pdf.set_font('Arial', 'B', 10)
+        pdf.cell(50, 8, valor, 0, 1, 'C')
+
+
+def agregar_pagina_perfil_consumo(pdf, meses_hist, valores_hist, promedio_hist, pct_autosuficiencia,
+                                  costo_kwh, tarifa_nivelada, produccion_mensual=None, formato_graficos=None):
+    """Nueva hoja: PERFIL DE CONSUMO ENERGÉTICO. Con produccion_mensual (simulación horaria), el
+    histórico muestra también la generación solar estimada de cada mes. formato_graficos: "png" o
+    "svg" (ver graficos.FORMATOS)."""
+    pdf.add_page()
+    agregar_encabezado(pdf)
+    agregar_titulo_principal(pdf, 'PERFIL DE CONSUMO ENERGÉTICO')
+
+    ANCHO_COL = 86
+
+    # --- SECCIÓN 1 ---
+    dibujar_titulo_seccion(pdf, '1. DISTRIBUCIÓN Y CAPACIDAD DE GENERACIÓN')
+    y_seccion1 = pdf.get_y()
+
+    produccion_hist = produccion_por_mes_hist(meses_hist, produccion_mensual) if produccion_mensual and meses_hist else []
+    grafico_hist = graficos.grafico_historico(meses_hist, valores_hist, promedio_hist, produccion_hist, formato_graficos)
+    grafico_dona = graficos.grafico_cobertura(pct_autosuficiencia, formato_graficos)
+
+    alto_hist = graficos.alto_mm(grafico_hist, ANCHO_COL)
+    alto_dona = graficos.alto_mm(grafico_dona, ANCHO_COL)
+    alto_max_sec1 = max(alto_hist, alto_dona)
+
+    graficos.insertar(pdf, grafico_hist, x=15, y=y_seccion1, w=ANCHO_COL)
+    graficos.insertar(pdf, grafico_dona, x=109, y=y_seccion1, w=ANCHO_COL)
+
+    # Leyenda de la dona dibujada directamente en el PDF (posición fija y predecible)
+    y_leyenda = y_seccion1 + alto_dona + 2
+    pdf.set_fill_color(46, 204, 113)
+    pdf.rect(120, y_leyenda, 3, 3, 'F')
+    pdf.set_font('Arial', '', 8)
+    pdf.set_text_color(60, 60, 60)
+    pdf.set_xy(124, y_leyenda - 1)
+    pdf.cell(30, 5, 'Energía Solar', 0, 0)
+    pdf.set_fill_color(189, 195, 199)
+    pdf.rect(160, y_leyenda, 3, 3, 'F')
+    pdf.set_xy(164, y_leyenda - 1)
+    pdf.cell(30, 5, 'Red (CNEL)', 0, 0)
+    pdf.set_text_color(0, 0, 0)
+
+    y_despues_sec1 = y_seccion1 + alto_max_sec1 + 8
+    pdf.set_y(y_despues_sec1)
+    pdf.set_font('Arial', 'I', 8)
+    pdf.set_text_color(100, 100, 100)
+    pdf.cell(90, 5, 'Análisis del consumo registrado en los últimos periodos.', 0, 0, 'C')
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_y(y_despues_sec1 + 12)
+
+    # --- SECCIÓN 2 ---
+    dibujar_titulo_seccion(pdf, '2. IMPACTO ECONÓMICO Y REDUCCIÓN TARIFARIA')
+    y_seccion2 = pdf.get_y()
+
+    grafico_tarifa = graficos.grafico_tarifas(costo_kwh, tarifa_nivelada, formato_graficos)
+    ANCHO_TARIFA = 90
+    alto_tarifa = graficos.alto_mm(grafico_tarifa, ANCHO_TARIFA)
+    graficos.insertar(pdf, grafico_tarifa, x=15, y=y_seccion2, w=ANCHO_TARIFA)
+
+    ALTO_TARJETA = 24
+    dibujar_tarjeta_metrica(
+        pdf, x=112, y=y_seccion2, w=83, h=ALTO_TARJETA,
+        titulo='TARIFA ACTUAL (RED CNEL)', valor=f"${costo_kwh:.3f} / kWh",
+        color_fondo=(230, 233, 236), color_borde=(150, 160, 170), color_texto=(70, 80, 90)
+    )
+    dibujar_tarjeta_metrica(
+        pdf, x=112, y=y_seccion2 + ALTO_TARJETA + 6, w=83, h=ALTO_TARJETA,
+        titulo='TARIFA NIVELADA (PLANTA SOLAR)', valor=f"${tarifa_nivelada:.3f} / kWh",
+        color_fondo=(230, 248, 240), color_borde=(46, 204, 113), color_texto=(39, 174, 96)
+    )
+    alto_max_sec2 = max(alto_tarifa, ALTO_TARJETA * 2 + 6)
+
+    pdf.set_y(y_seccion2 + alto_max_sec2 + 8)
+    pdf.set_font('Arial', 'B', 9.5)
+    pdf.set_text_color(0, 0, 0)
+    pdf.write(5, 'Conclusión Técnica: ')
+    pdf.set_font('Arial', '', 9.5)
+    texto_conclusion = (
+        f"Al sustituir el {pct_autosuficiencia:.0f}% de la energía proveniente de la red por generación propia, "
+        f"el costo efectivo de la energía se desploma de forma garantizada durante los próximos 30 años de vida útil del proyecto."
+    )
+    pdf.write(5, texto_conclusion)
+
+
+def _texto_payback_percentil(valor):
+    return f"{valor:.1f} años" if valor != float("inf") else "más de 30 años"
+
+
+def agregar_pagina_incertidumbre(pdf, montecarlo, payback_exacto, formato_graficos=None):
+    """Hoja opcional: ANÁLISIS DE INCERTIDUMBRE (resultado de montecarlo.simular_montecarlo)."""
+    pdf.add_page()
+    agregar_encabezado(pdf)
+    agregar_titulo_principal(pdf, 'ANÁLISIS DE INCERTIDUMBRE')
+
+    pdf.set_font('Arial', '', 9.5)
+    pdf.multi_cell(0, 5.5, (
+        f"El retorno calculado en esta propuesta ({_texto_payback_percentil(payback_exacto or float('inf'))}) supone "
+        f"radiación, rendimiento, degradación y tarifa fijos. Para medir su robustez se simularon "
+        f"{montecarlo['simulaciones']:,} escenarios a 30 años, variando la radiación solar (HSP), el rendimiento "
+        f"del sistema (PR), la degradación de los paneles y el incremento anual de la tarifa eléctrica. "
+        f"El {montecarlo['prob_recuperacion']:.0%} de los escenarios recupera la inversión dentro de la vida útil."
+    ))
+    pdf.ln(4)
+
+    headers = ['Escenario', 'Retorno de Inversión', 'Ahorro Acumulado (30 años)']
+    anchos = [60, 60, 60]
+    pdf.set_fill_color(31, 119, 180)
+    pdf.set_text_color(255, 255, 255)
+    pdf.set_font('Arial', 'B', 9)
+    for i, h in enumerate(headers):
+        pdf.cell(anchos[i], 8, h, 1, 0, 'C', fill=True)
+    pdf.ln()
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font('Arial', '', 9)
+    # P10 del payback es el escenario favorable; en el ahorro, el favorable es el P90.
+    for etiqueta, p_payback, p_ahorro in (("Favorable (P10)", "P10", "P90"), ("Esperado (P50)", "P50", "P50"),
+                                          ("Conservador (P90)", "P90", "P10")):
+        pdf.cell(anchos[0], 7, etiqueta, 1, 0, 'C')
+        pdf.cell(anchos[1], 7, _texto_payback_percentil(montecarlo["payback"][p_payback]), 1, 0, 'C')
+        pdf.cell(anchos[2], 7, f"${montecarlo['ahorro_vida_util'][p_ahorro]:,.2f}", 1, 1, 'C')
+    pdf.ln(6)
+
+    conteos, bordes = montecarlo["histograma_payback"]
+    if not conteos:
+        return
+    grafico_mc = graficos.grafico_incertidumbre(conteos, bordes, montecarlo["payback"], formato_graficos)
+    graficos.insertar(pdf, grafico_mc, x=15, w=180)
+
+
+# --- FUNCIÓN PDF PRINCIPAL ---
+def generar_pdf(propuesta, destino=None):
+    """Construye el PDF completo. Sin `destino` devuelve sus bytes; con `destino` (ruta o flujo binario
+    abierto, p. ej. el archivo de salida del lote) lo escribe ahí directamente, sin una copia en bytes
+    del documento, y devuelve None. `propuesta` es el dict de
+    calculos.calcular_propuesta(), más (opcionales) las fotos del proyecto, ya procesadas por
+    fotos.procesar_foto() o en bytes tal como se subieron: foto_ahorro, foto_cubierta_antes y
+    foto_cubierta_despues; calidad_fotos (perfil de
+    fotos.PERFILES_FOTO; por defecto fotos.PERFIL_DEFAULT) y formato_graficos ("png" o "svg"; por
+    defecto graficos.FORMATO_DEFAULT)."""
+    nombre_cliente = propuesta["nombre_cliente"]
+    n_proyecto = propuesta["n_proyecto"]
+    numero_contrato = propuesta["numero_contrato"]
+    ubicacion_cliente = propuesta["ubicacion_cliente"]
+    ciudad_sel = propuesta["ciudad_sel"]
+    tipo_proyecto = propuesta["tipo_proyecto"]
+    años_beneficio = propuesta["anios_beneficio"]
+    potencia_final = propuesta["potencia_final"]
+    potencia_panel_wp = propuesta["potencia_panel_wp"]
+    numero_paneles = propuesta["numero_paneles"]
+    area_total_paneles_m2 = propuesta["area_total_paneles_m2"]
+    costo_kwh = propuesta["costo_kwh"]
+    inv_final = propuesta["inv_final"]
+    payback_exacto = propuesta["payback_exacto"]
+    data_rows = filas_tabla_flujo(propuesta)
+    acumulados = propuesta["acumulados"]
+    formato_graficos = propuesta.get("formato_graficos")
+    calidad_fotos = propuesta.get("calidad_fotos")
+
+    pdf = PropuestaPDF()
+    pdf.set_margins(15, 15, 15)
+
+    ahorro_vida_util = acumulados[-1] if acumulados else 0.0
+    respaldo_kw = potencia_final  # respaldo de cargas críticas = potencia instalada (sistema híbrido)
+
+    # 1. Portada
+    agregar_pagina_portada(pdf, potencia_final)
+
+    # 2. Propuesta de ahorro
+    agregar_pagina_propuesta_ahorro(
+        pdf, nombre_cliente, potencia_final, numero_paneles, potencia_panel_wp,
+        area_total_paneles_m2, respaldo_kw, inv_final, ahorro_vida_util, payback_exacto,
+        foto_techo=propuesta.get("foto_ahorro"), calidad_fotos=calidad_fotos
+    )
+
+    # 3. Distribución a cubierta (fotos propias del proyecto, si se subieron)
+    agregar_pagina_distribucion_cubierta(
+        pdf, foto_antes=propuesta.get("foto_cubierta_antes"),
+        foto_despues=propuesta.get("foto_cubierta_despues"), calidad_fotos=calidad_fotos
+    )
+
+    # 4. Perfil de consumo energético
+    agregar_pagina_perfil_consumo(
+        pdf, propuesta["meses_hist"], propuesta["valores_hist"], propuesta["promedio_hist"],
+        propuesta["pct_autosuficiencia"], costo_kwh, propuesta["tarifa_nivelada"],
+        produccion_mensual=propuesta.get("produccion_mensual"), formato_graficos=formato_graficos
+    )
+
+    # 5. Alcance de suministro y componentes
+    agregar_pagina_alcance_suministro(pdf, potencia_final, numero_paneles, potencia_panel_wp)
+
+    # 6. Análisis de Rentabilidad (datos del proyecto + resumen financiero + tabla técnica detallada + gráfico)
+    pdf.add_page()
+    agregar_encabezado(pdf)
+    agregar_titulo_principal(pdf, 'ANÁLISIS DE RENTABILIDAD')
+
+    pdf.set_font('Arial', 'B', 11)
+    pdf.cell(0, 8, 'DATOS DEL PROYECTO', 0, 1, 'L')
+    pdf.set_font('Arial', '', 10)
+    pdf.cell(95, 7, f'Cliente: {_texto_pdf_seguro(nombre_cliente)}', 0, 0)
+    pdf.cell(0, 7, f'Ciudad: {ciudad_sel}', 0, 1)
+    pdf.cell(95, 7, f'Proyecto: {n_proyecto}', 0, 0)
+    pdf.cell(0, 7, f'N° Contrato: {_texto_pdf_seguro(numero_contrato) if numero_contrato else "N/A"}', 0, 1)
+    pdf.cell(95, 7, f'Costo kWh: ${costo_kwh:.4f}', 0, 0)
+    pdf.cell(0, 7, f'Potencia Instalada: {potencia_final:.2f} kWp', 0, 1)
+    pdf.cell(0, 7, f'Ubicación: {_texto_pdf_seguro(ubicacion_cliente) if ubicacion_cliente else "N/A"}', 0, 1)
+
+    pdf.ln(8)
+    pdf.set_fill_color(240, 240, 240)
+    pdf.set_font('Arial', 'B', 11)
+    pdf.cell(0, 8, 'RESUMEN FINANCIERO DE RECUPERACIÓN', 0, 1, 'L', fill=True)
+    pdf.ln(2)
+
+    texto_payback = f"{payback_exacto:.1f} años" if payback_exacto else "más de 30 años"
+    if tipo_proyecto == "Comercial":
+        explicacion_retorno = (
+            f"El retorno de inversión estimado para su proyecto es de solo {texto_payback}. "
+            f"Este extraordinario tiempo de recuperación no ocurre de manera aislada, sino como el resultado directo del "
+            f"beneficio tributario aplicado por la depreciación acelerada de la planta solar por {años_beneficio} años sumado al ahorro energético acumulado "
+            f"de estos mismos años.\n\n"
+            f"Al finalizar este período de amortización, la inyección constante de capital liberado de la planilla de energía eléctrica se consolidará "
+            f"como un saldo a favor directo y neto para el presupuesto de su empresa. Esto significa ganancias operativas constantes "
+            f"que maximizarán la rentabilidad de su negocio durante el resto de los 30 años de vida útil estimada de la planta."
+        )
+    else:
+        explicacion_retorno = (
+            f"El retorno de inversión estimado para su residencia es de {texto_payback}. "
+            f"Este resultado es el fruto de la sinergia y acumulación directa del ahorro por la autogeneración de energía. "
+            f"Al recuperar su capital, la reducción sustancial de su planilla eléctrica se traducirá en un saldo a favor constante "
+            f"dentro de su presupuesto mensual, maximizando la liquidez de su hogar por las próximas décadas."
+        )
+
+    pdf.set_font('Arial', '', 9.5)
+    pdf.multi_cell(0, 5.5, explicacion_retorno)
+
+    pdf.ln(10)
+    pdf.set_fill_color(31, 119, 180)
+    pdf.set_text_color(255, 255, 255)
+    pdf.set_font('Arial', 'B', 9)
+    pdf.set_draw_color(50, 50, 50); pdf.set_line_width(0.2)
+
+    cols_w = [15, 25, 35, 35, 35, 40]
+    headers = ['Año', 'Ind. Deg.', 'Prod. kWh', 'Ahorro En.', 'Ahorro Trib.', 'Acumulado']
+    for i in range(len(headers)):
+        pdf.cell(cols_w[i], 8, headers[i], 1, 0, 'C', fill=True)
+    pdf.ln()
+
+    pdf.set_text_color(0, 0, 0); pdf.set_font('Arial', '', 8)
+    for row in data_rows:
+        if pdf.get_y() > 260:
+            pdf.add_page()
+            pdf.set_fill_color(31, 119, 180); pdf.set_text_color(255, 255, 255); pdf.set_font('Arial', 'B', 9)
+            for i in range(len(headers)):
+                pdf.cell(cols_w[i], 8, headers[i], 1, 0, 'C', fill=True)
+            pdf.ln()
+            pdf.set_text_color(0, 0, 0); pdf.set_font('Arial', '', 8)
+
+        pdf.cell(cols_w[0], 7, str(row['Año']), 1, 0, 'C')
+        pdf.cell(cols_w[1], 7, row['Ind. Deg.'], 1, 0, 'C')
+        pdf.cell(cols_w[2], 7, row['Prod. kWh'], 1, 0, 'C')
+        pdf.cell(cols_w[3], 7, row['Ahorro Energía'], 1, 0, 'C')
+        pdf.cell(cols_w[4], 7, row['Ahorro Trib.'], 1, 0, 'C')
+        pdf.cell(cols_w[5], 7, row['Acumulado'], 1, 1, 'C')
+
+    pdf.ln(8)
+
+    grafico_recuperacion = graficos.grafico_recuperacion([0] + list(propuesta["años"]), [0] + list(acumulados), inv_final,
+                                                         tipo_proyecto, años_beneficio, payback_exacto, formato_graficos)
+    if pdf.get_y() > 160:
+        pdf.add_page()
+
+    graficos.insertar(pdf, grafico_recuperacion, x=15, w=180)
+
+    # 7. Análisis de incertidumbre (opcional)
+    if propuesta.get("montecarlo"):
+        agregar_pagina_incertidumbre(pdf, propuesta["montecarlo"], payback_exacto, formato_graficos)
+
+    if destino is not None:
+        pdf.output(destino)
+        return None
+    return bytes(pdf.output())
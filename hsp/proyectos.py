@@ -0,0 +1,164 @@
+"""Almacén persistente (SQLite) de proyectos: reabrir una propuesta sin volver a subir planillas.
+
+Las entradas de cada propuesta vivían solo en st.session_state: al cerrar la pestaña se perdían, y
+retomar un cliente era volver a subir sus planillas, esperar el texto/OCR, reescribir los parámetros y
+volver a resolver la meteorología. Aquí cada proyecto se guarda por n_proyecto en una fila:
+
+  - las entradas normalizadas (las claves de ENTRADAS_DEFAULT que usa la app, más la inversión total),
+    el histórico de consumo (meses y kWh) y los datos ya interpretados de sus planillas (con el hash
+    de cada archivo), en JSON;
+  - la meteorología con la que se calculó, junto con la ubicación que la determina: al reabrir el
+    proyecto con la misma ubicación no se vuelve a consultar NASA POWER;
+  - el hash del último PDF generado.
+
+Cargar un proyecto es una lectura por clave primaria. Para buscar, cada palabra del cliente, el
+contrato, la ciudad y el número de proyecto (en minúsculas y sin tildes) va a una tabla de términos
+indexada: buscar("zambrano guay") son dos recorridos por rango de prefijo en el índice, sin leer los
+proyectos que no coinciden.
+"""
+import json
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from contextlib import contextmanager
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_DEFAULT = os.path.join(os.environ.get("HSP_CACHE_DIR", os.path.join(BASE_DIR, ".cache")), "proyectos.sqlite")
+
+MAX_RESULTADOS = 20
+_RE_TERMINO = re.compile(r"[a-z0-9]+")
+_FIN_PREFIJO = "\U0010ffff"
+
+_ESQUEMA = (
+    "CREATE TABLE IF NOT EXISTS proyectos ("
+    " n_proyecto TEXT PRIMARY KEY, cliente TEXT NOT NULL, contrato TEXT NOT NULL, ciudad TEXT NOT NULL,"
+    " entradas TEXT NOT NULL, historico TEXT NOT NULL, planillas TEXT, meteo TEXT, hash_pdf TEXT,"
+    " actualizado REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS proyectos_actualizado ON proyectos (actualizado)",
+    "CREATE TABLE IF NOT EXISTS terminos ("
+    " termino TEXT NOT NULL, n_proyecto TEXT NOT NULL, PRIMARY KEY (termino, n_proyecto)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS terminos_proyecto ON terminos (n_proyecto)",
+)
+
+
+def terminos(*textos):
+    """Palabras de búsqueda: minúsculas, sin tildes, solo letras y dígitos."""
+    encontrados = set()
+    for texto in textos:
+        descompuesto = unicodedata.normalize("NFKD", str(texto or "").lower())
+        sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+        encontrados.update(_RE_TERMINO.findall(sin_tildes))
+    return encontrados
+
+
+class AlmacenProyectos:
+    """Proyectos por n_proyecto. Segura entre hilos: cada operación abre su propia conexión a SQLite."""
+
+    def __init__(self, ruta=RUTA_DEFAULT):
+        self.ruta = ruta
+        if os.path.dirname(ruta):
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with self._conectar() as conexion:
+            for sentencia in _ESQUEMA:
+                conexion.execute(sentencia)
+
+    # --- API principal ---
+    def guardar(self, n_proyecto, entradas, meses_hist, valores_hist, planillas=None, meteo=None, hash_pdf=None):
+        """Crea o reemplaza el proyecto. planillas (lista de {archivo, hash, datos}), meteo ({ubicacion,
+        meteo}) y hash_pdf en None conservan lo que el proyecto ya tenía guardado."""
+        n_proyecto = str(n_proyecto).strip()
+        if not n_proyecto:
+            raise ValueError("El proyecto necesita un número de proyecto para guardarse.")
+        cliente = entradas.get("nombre_cliente") or ""
+        contrato = entradas.get("numero_contrato") or ""
+        ciudad = entradas.get("ciudad_sel") or ""
+        with self._conectar() as conexion:
+            conexion.execute(
+                "INSERT INTO proyectos (n_proyecto, cliente, contrato, ciudad, entradas, historico, planillas, meteo,"
+                " hash_pdf, actualizado) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (n_proyecto) DO UPDATE SET cliente = excluded.cliente, contrato = excluded.contrato,"
+                " ciudad = excluded.ciudad, entradas = excluded.entradas, historico = excluded.historico,"
+                " planillas = COALESCE(excluded.planillas, planillas), meteo = COALESCE(excluded.meteo, meteo),"
+                " hash_pdf = COALESCE(excluded.hash_pdf, hash_pdf), actualizado = excluded.actualizado",
+                (
+                    n_proyecto, cliente, contrato, ciudad, json.dumps(entradas, ensure_ascii=False),
+                    json.dumps({"meses": list(meses_hist), "valores": list(valores_hist)}, ensure_ascii=False),
+                    None if planillas is None else json.dumps(planillas, ensure_ascii=False),
+                    None if meteo is None else json.dumps(meteo, ensure_ascii=False),
+                    hash_pdf, time.time(),
+                ),
+            )
+            conexion.execute("DELETE FROM terminos WHERE n_proyecto = ?", (n_proyecto,))
+            conexion.executemany(
+                "INSERT INTO terminos (termino, n_proyecto) VALUES (?, ?)",
+                [(termino, n_proyecto) for termino in terminos(n_proyecto, cliente, contrato, ciudad)],
+            )
+
+    def cargar(self, n_proyecto):
+        """Dict con n_proyecto, entradas, meses_hist, valores_hist, planillas, meteo, hash_pdf y
+        actualizado; None si el proyecto no existe."""
+        with self._conectar() as conexion:
+            fila = conexion.execute(
+                "SELECT n_proyecto, entradas, historico, planillas, meteo, hash_pdf, actualizado FROM proyectos"
+                " WHERE n_proyecto = ?", (str(n_proyecto).strip(),)
+            ).fetchone()
+        if fila is None:
+            return None
+        historico = json.loads(fila[2])
+        return {
+            "n_proyecto": fila[0],
+            "entradas": json.loads(fila[1]),
+            "meses_hist": historico["meses"],
+            "valores_hist": historico["valores"],
+            "planillas": json.loads(fila[3]) if fila[3] else [],
+            "meteo": json.loads(fila[4]) if fila[4] else None,
+            "hash_pdf": fila[5],
+            "actualizado": fila[6],
+        }
+
+    def buscar(self, texto="", limite=MAX_RESULTADOS):
+        """Resúmenes (n_proyecto, cliente, contrato, ciudad, actualizado) de los proyectos que tienen,
+        para cada palabra de `texto`, un término que empieza con ella; los más recientes primero. Sin
+        texto, los últimos guardados."""
+        palabras = terminos(texto)
+        with self._conectar() as conexion:
+            if not palabras:
+                filas = conexion.execute(
+                    "SELECT n_proyecto, cliente, contrato, ciudad, actualizado FROM proyectos"
+                    " ORDER BY actualizado DESC LIMIT ?", (limite,)
+                ).fetchall()
+            else:
+                condiciones = " INTERSECT ".join(
+                    ["SELECT n_proyecto FROM terminos WHERE termino >= ? AND termino < ?"] * len(palabras)
+                )
+                parametros = [valor for palabra in sorted(palabras) for valor in (palabra, palabra + _FIN_PREFIJO)]
+                filas = conexion.execute(
+                    "SELECT n_proyecto, cliente, contrato, ciudad, actualizado FROM proyectos"
+                    f" WHERE n_proyecto IN ({condiciones}) ORDER BY actualizado DESC LIMIT ?",
+                    parametros + [limite],
+                ).fetchall()
+        return [dict(zip(("n_proyecto", "cliente", "contrato", "ciudad", "actualizado"), fila)) for fila in filas]
+
+    def eliminar(self, n_proyecto):
+        with self._conectar() as conexion:
+            conexion.execute("DELETE FROM proyectos WHERE n_proyecto = ?", (n_proyecto,))
+            conexion.execute("DELETE FROM terminos WHERE n_proyecto = ?", (n_proyecto,))
+
+    def estadisticas(self):
+        with self._conectar() as conexion:
+            total = conexion.execute("SELECT COUNT(*) FROM proyectos").fetchone()[0]
+            total_terminos = conexion.execute("SELECT COUNT(*) FROM terminos").fetchone()[0]
+        return {"proyectos": total, "terminos": total_terminos}
+
+    # --- Internos ---
+    @contextmanager
+    def _conectar(self):
+        conexion = sqlite3.connect(self.ruta, timeout=30)
+        try:
+            conexion.execute("PRAGMA journal_mode=WAL")
+            with conexion:  # commit al salir (o rollback si hubo excepción)
+                yield conexion
+        finally:
+            conexion.close()
@@ -0,0 +1,44 @@
+"""Barrido de sensibilidad: payback y tarifa nivelada (LCOE) sobre una grilla potencia × costo/kWp × tarifa.
+
+Responde a "¿y si instalamos 8, 10 o 12 kWp a $800–$950 por kWp?" sin recalcular la propuesta ni el
+PDF: toda la grilla se evalúa en una sola llamada vectorizada a flujo_caja.simular_flujo_caja, con la
+misma fórmula de calcular_flujo_caja (beneficio tributario). La generación de cada potencia se escala
+desde la generacion_y1 de la propuesta (la del modelo mensual o la de la simulación horaria), así que el
+punto de la propuesta en la grilla da el mismo payback que la propuesta.
+"""
+import numpy as np
+
+from hsp.calculos import porcentaje_beneficio_tributario
+from hsp.flujo_caja import simular_flujo_caja
+
+
+def barrido_sensibilidad(potencias, costos_kwp, costos_kwh, potencia_base, generacion_y1_base, deg_y1, atenuacion,
+                         tipo_proyecto, anios_beneficio, curva_autoconsumo=None, tarifa_excedentes=0.0):
+    """Evalúa todas las combinaciones de potencias (kWp), costos_kwp (USD/kWp) y costos_kwh (USD/kWh).
+    La generación del año 1 de cada potencia es generacion_y1_base * potencia / potencia_base.
+    Devuelve los ejes y los arreglos "payback" (años, NaN si no se recupera en 30 años) y "lcoe"
+    (USD/kWh), ambos de forma (len(potencias), len(costos_kwp), len(costos_kwh)). Con curva_autoconsumo
+    el ahorro separa autoconsumo y excedentes (ver flujo_caja.simular_flujo_caja): una planta más grande
+    exporta una parte mayor de lo que produce."""
+    potencias = np.asarray(potencias, dtype=float)
+    costos_kwp = np.asarray(costos_kwp, dtype=float)
+    costos_kwh = np.asarray(costos_kwh, dtype=float)
+
+    # Ejes en forma (P, 1, 1), (1, C, 1) y (1, 1, T): el broadcasting arma la grilla completa.
+    potencia = potencias[:, None, None]
+    inv_final = potencia * costos_kwp[None, :, None]
+    generacion_y1 = generacion_y1_base * potencia / potencia_base
+    ahorro_trib_anual = inv_final * (porcentaje_beneficio_tributario(tipo_proyecto, anios_beneficio) / 100.0)
+
+    r = simular_flujo_caja(generacion_y1, costos_kwh[None, None, :], inv_final, deg_y1, atenuacion,
+                           ahorro_trib_anual, anios_beneficio, curva_autoconsumo=curva_autoconsumo,
+                           tarifa_excedentes=tarifa_excedentes)
+    forma = (len(potencias), len(costos_kwp), len(costos_kwh))
+    return {
+        "potencias": potencias,
+        "costos_kwp": costos_kwp,
+        "costos_kwh": costos_kwh,
+        "payback": np.broadcast_to(r["payback"], forma),
+        "lcoe": np.broadcast_to(r["tarifa_nivelada"], forma),
+        "escenarios": int(np.prod(forma)),
+    }
@@ -0,0 +1,224 @@
+"""Tabla de facturación de planillas PDF digitales leída por geometría (pdfplumber), no por texto plano.
+
+El monto de energía salía de extract_text() de todas las páginas: se tomaba el último número de cada
+línea de Energía Activa/Reactiva/Demanda Facturable. En el texto aplanado, una línea es todo lo que
+está a la misma altura de la hoja, así que si a la derecha de la tabla hay otro recuadro (el historial
+de consumos, el detalle de pagos) su número pasaba por el monto; y para llegar a esa línea había que
+extraer el texto de todas las páginas, anexos incluidos. Aquí:
+
+  - leer_tabla(pagina) busca en las palabras de la página (extract_words, que reutiliza los caracteres
+    ya interpretados para extract_text) la fila de encabezados de la tabla (Rubro/Concepto ...
+    Monto/Valor) y, debajo, sus filas hasta el total; con eso arma el recuadro de la tabla, limitado a
+    lo ancho de sus columnas;
+  - solo ese recuadro se lee (page.crop): con extract_tables() si la tabla tiene líneas dibujadas, o
+    asignando cada número a la columna cuyo encabezado tiene encima (Cantidad, Precio, Monto);
+  - el resultado es un dict serializable (página, recuadro, filas) con el monto de energía de la columna
+    Monto y los kWh de la columna Cantidad de las filas de Energía Activa.
+
+planillas.extraer_texto_detallado() recorre las páginas de a una (pdfplumber solo interpreta una página
+cuando se le piden sus caracteres), busca la tabla hasta encontrarla y deja de leer en cuanto la tabla
+y los campos requeridos están completos: los anexos de una planilla larga no se interpretan.
+"""
+import re
+
+TOLERANCIA_LINEA = 3  # pt: palabras cuyo borde superior difiere menos que esto están en la misma línea
+SEPARACION_COLUMNA = 15  # pt: una palabra más lejos que esto del encabezado "Monto" ya es otro recuadro
+SALTO_MAXIMO = 2.5  # en altos de línea: un hueco mayor entre filas termina la tabla
+TOLERANCIA_COLUMNA = 3  # pt: los montos de una columna comparten borde izquierdo, derecho o centro
+
+# Palabras de la fila de encabezados, por columna.
+_ENCABEZADOS = (
+    ("concepto", re.compile(r"^(?:Rubros?|Conceptos?|Descripci[oó]n|Detalle)$", re.IGNORECASE)),
+    ("cantidad", re.compile(r"^(?:Cantidad|Consumo|kWh)$", re.IGNORECASE)),
+    ("precio", re.compile(r"^(?:Precio|Tarifa|Cargo)$", re.IGNORECASE)),
+    ("monto", re.compile(r"^(?:Monto|Importe|Valor|Subtotal)$", re.IGNORECASE)),
+)
+_RE_TOTAL = re.compile(r"^(?:VALOR\s*(?:TOTAL\s*)?A\s*PAGAR|TOTAL)\b", re.IGNORECASE)
+_RE_NUMERO = re.compile(r"^\$?\d[\d.,]*$")
+_RE_CIFRA = re.compile(r"\d(?:[\d.,]*\d)?")
+_RE_ENERGIA = re.compile(r"Energ[íi]a\s*Activa|Energ[íi]a\s*Reactiva|Demanda\s*Facturable", re.IGNORECASE)
+_RE_ENERGIA_ACTIVA = re.compile(r"Energ[íi]a\s*Activa", re.IGNORECASE)
+
+
+def _numero(texto):
+    """Primer número de una celda ("67.92", "$ 1,234.50", "67,92", "4215 kWh"); None si no tiene."""
+    m = _RE_CIFRA.search(texto or "")
+    if not m:
+        return None
+    texto = m.group(0)
+    if "," in texto and "." in texto:
+        if texto.rfind(".") > texto.rfind(","):
+            texto = texto.replace(",", "")
+        else:
+            texto = texto.replace(".", "").replace(",", ".")
+    else:
+        texto = texto.replace(",", ".")
+    try:
+        return float(texto)
+    except ValueError:
+        return None
+
+
+def _lineas(palabras):
+    """Agrupa las palabras en líneas (por su borde superior) y ordena cada línea de izquierda a derecha."""
+    lineas = []
+    for palabra in sorted(palabras, key=lambda p: (p["top"], p["x0"])):
+        if lineas and palabra["top"] - lineas[-1][0]["top"] <= TOLERANCIA_LINEA:
+            lineas[-1].append(palabra)
+        else:
+            lineas.append([palabra])
+    return [sorted(linea, key=lambda p: p["x0"]) for linea in lineas]
+
+
+def _columna(palabra):
+    for columna, patron in _ENCABEZADOS:
+        if patron.match(palabra["text"].strip("():$")):
+            return columna
+    return None
+
+
+def _columnas_encabezado(linea):
+    """{columna: palabra} si la línea es el encabezado de la tabla (tiene concepto y monto), o None."""
+    columnas = {}
+    for palabra in linea:
+        columna = _columna(palabra)
+        if columna and columna not in columnas:
+            columnas[columna] = palabra
+    return columnas if "concepto" in columnas and "monto" in columnas else None
+
+
+def _recuadro(pagina, lineas, i_encabezado, columnas):
+    """(x0, top, x1, bottom) de la tabla: de la palabra del concepto al final del encabezado del monto
+    (hasta la mitad del hueco con lo que haya a la derecha) y del encabezado a la última fila."""
+    encabezado = lineas[i_encabezado]
+    izquierda, derecha = pagina.bbox[0], pagina.bbox[2]
+    anteriores = [p for p in encabezado if p["x1"] <= columnas["concepto"]["x0"]]
+    if anteriores:
+        izquierda = (anteriores[-1]["x1"] + columnas["concepto"]["x0"]) / 2
+    fin_monto = columnas["monto"]["x1"]
+    for palabra in encabezado:
+        if palabra["x0"] <= fin_monto:
+            continue
+        if palabra["x0"] - fin_monto > SEPARACION_COLUMNA:
+            derecha = (fin_monto + palabra["x0"]) / 2
+            break
+        fin_monto = palabra["x1"]
+
+    arriba = min(p["top"] for p in encabezado)
+    abajo = max(p["bottom"] for p in encabezado)
+    alto_linea = abajo - arriba
+    for linea in lineas[i_encabezado + 1:]:
+        dentro = [p for p in linea if p["x0"] >= izquierda and p["x1"] <= derecha]
+        if not dentro:
+            continue
+        if dentro[0]["top"] - abajo > SALTO_MAXIMO * alto_linea or _RE_TOTAL.match(" ".join(p["text"] for p in dentro)):
+            break
+        abajo = max(p["bottom"] for p in dentro)
+    return (max(izquierda, pagina.bbox[0]), max(arriba - 1, pagina.bbox[1]),
+            min(derecha, pagina.bbox[2]), min(abajo + 1, pagina.bbox[3]))
+
+
+def _alineadas(palabras):
+    """True si las palabras están en columna: comparten (con tolerancia) el borde izquierdo, el derecho
+    o el centro."""
+    for borde in (lambda p: p["x0"], lambda p: p["x1"], lambda p: (p["x0"] + p["x1"]) / 2):
+        posiciones = [borde(p) for p in palabras]
+        if max(posiciones) - min(posiciones) <= TOLERANCIA_COLUMNA:
+            return True
+    return False
+
+
+def _filas_por_palabras(recorte):
+    """Filas del recuadro: cada número va a la columna (Cantidad, Precio, Monto) cuyo encabezado tiene
+    más cerca en horizontal; el resto de las palabras forma el concepto. [] si los montos no están
+    alineados en columna (texto corrido, sin tabla maquetada: ahí manda la lectura del texto)."""
+    lineas = _lineas(recorte.extract_words())
+    if not lineas:
+        return []
+    encabezados = {}
+    for palabra in lineas[0]:
+        columna = _columna(palabra)
+        if columna in ("cantidad", "precio", "monto") and columna not in encabezados:
+            encabezados[columna] = palabra
+
+    filas, montos = [], []
+    for linea in lineas[1:]:
+        concepto, valores = [], {}
+        for palabra in linea:
+            if not _RE_NUMERO.match(palabra["text"]) or not encabezados:
+                concepto.append(palabra["text"])
+                continue
+            distancias = {columna: max(e["x0"] - palabra["x1"], palabra["x0"] - e["x1"], 0)
+                          for columna, e in encabezados.items()}
+            columna = min(distancias, key=distancias.get)
+            if columna not in valores or distancias[columna] < valores[columna][0]:
+                valores[columna] = (distancias[columna], palabra)
+        if concepto:
+            filas.append({"concepto": " ".join(concepto),
+                          "cantidad": _numero(valores["cantidad"][1]["text"]) if "cantidad" in valores else None,
+                          "monto": _numero(valores["monto"][1]["text"]) if "monto" in valores else None})
+            if "monto" in valores:
+                montos.append(valores["monto"][1])
+    return filas if montos and _alineadas(montos) else []
+
+
+def _filas_por_celdas(recorte):
+    """Filas de extract_tables() en el recuadro (tablas con líneas dibujadas); [] si no hay una tabla
+    con encabezado de monto."""
+    for tabla in recorte.extract_tables():
+        if len(tabla) < 2:
+            continue
+        indices = {}
+        for indice, celda in enumerate(tabla[0]):
+            columna = _columna({"text": (celda or "").split()[0]}) if (celda or "").strip() else None
+            if columna and columna not in indices:
+                indices[columna] = indice
+        if "monto" not in indices:
+            continue
+        filas = []
+        for fila in tabla[1:]:
+            celdas = [(celda or "").replace("\n", " ").strip() for celda in fila]
+            concepto = next((c for c in celdas if c and not _RE_NUMERO.match(c)), None)
+            if concepto:
+                filas.append({"concepto": concepto,
+                              "cantidad": _numero(celdas[indices["cantidad"]]) if "cantidad" in indices else None,
+                              "monto": _numero(celdas[indices["monto"]])})
+        return filas
+    return []
+
+
+def leer_tabla(pagina):
+    """Tabla de facturación de una página de pdfplumber: dict con pagina, recuadro, filas ({concepto,
+    cantidad, monto}), monto_energia y consumos_kwh; None si la página no tiene una tabla con filas de
+    energía."""
+    lineas = _lineas(pagina.extract_words())
+    for i, linea in enumerate(lineas):
+        columnas = _columnas_encabezado(linea)
+        if columnas is None:
+            continue
+        recuadro = _recuadro(pagina, lineas, i, columnas)
+        recorte = pagina.crop(recuadro)
+        filas = (_filas_por_celdas(recorte) if recorte.edges else []) or _filas_por_palabras(recorte)
+        energia = [fila for fila in filas if _RE_ENERGIA.search(fila["concepto"])]
+        if not energia:
+            continue
+        montos = [fila["monto"] for fila in energia if fila["monto"] is not None]
+        return {
+            "pagina": pagina.page_number,
+            "recuadro": [round(v, 1) for v in recuadro],
+            "filas": filas,
+            "monto_energia": round(sum(montos), 2) if montos else None,
+            "consumos_kwh": [fila["cantidad"] for fila in energia
+                             if _RE_ENERGIA_ACTIVA.search(fila["concepto"]) and fila["cantidad"] is not None],
+        }
+    return None
+
+
+def campos_tabla(tabla):
+    """Campos de la planilla que la tabla fija con precisión de columna (reemplazan a los del texto)."""
+    campos = {}
+    if tabla and tabla["monto_energia"] is not None:
+        campos["valor_pagar"] = tabla["monto_energia"]
+    if tabla and tabla["consumos_kwh"]:
+        campos["consumos_kwh"] = tabla["consumos_kwh"]
+    return campos
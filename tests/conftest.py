@@ -0,0 +1,68 @@
+"""Fixtures compartidas de las pruebas (python -m pytest desde la raíz del repositorio)."""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hsp.nasa_power import MESES_ORDEN_NASA  # noqa: E402
+
+
+class ServidorNasa:
+    """Servidor HTTP local que imita la API de climatología de NASA POWER. `respuestas` es una cola de
+    códigos de estado para las próximas consultas (vacía = 200), `demora` los segundos que tarda cada
+    respuesta y `consultas` la lista de (lat, lon) recibidas. Los valores de HSP devueltos son la latitud,
+    para que cada prueba pueda verificar qué coordenada respondió."""
+
+    def __init__(self):
+        self.respuestas = []
+        self.demora = 0.0
+        self.consultas = []
+        self._lock = threading.Lock()
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = parse_qs(urlparse(self.path).query)
+                lat, lon = float(params["latitude"][0]), float(params["longitude"][0])
+                with servidor._lock:
+                    servidor.consultas.append((lat, lon))
+                    estado = servidor.respuestas.pop(0) if servidor.respuestas else 200
+                time.sleep(servidor.demora)
+                cuerpo = json.dumps({"properties": {"parameter": {
+                    "ALLSKY_SFC_SW_DWN": {mes: lat for mes in MESES_ORDEN_NASA},
+                    "T2M": {mes: 20.0 for mes in MESES_ORDEN_NASA},
+                }}}).encode() if estado == 200 else b"{}"
+                try:
+                    self.send_response(estado)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(cuerpo)))
+                    self.end_headers()
+                    self.wfile.write(cuerpo)
+                except OSError:  # el cliente ya cerró la conexión por timeout
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self._http = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+        self._http.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._http.server_address[1]}"
+        threading.Thread(target=self._http.serve_forever, daemon=True).start()
+
+    def cerrar(self):
+        self._http.shutdown()
+        self._http.server_close()
+
+
+@pytest.fixture
+def servidor_nasa():
+    servidor = ServidorNasa()
+    yield servidor
+    servidor.cerrar()
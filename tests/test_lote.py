@@ -0,0 +1,11 @@
+"""Nombres de salida del lote: dos planillas con el mismo nombre no se pisan la propuesta."""
+from hsp.lote import nombres_base
+
+
+def test_nombres_base_unicos_con_la_extension_si_se_repite_el_nombre():
+    rutas = ["in/enero.pdf", "in/enero.jpg", "in/Enero.PNG", "in/enero_pdf.jpeg", "in/febrero.pdf"]
+    nombres = nombres_base(rutas)
+    assert nombres["in/febrero.pdf"] == "febrero"
+    assert nombres["in/enero.pdf"] == "enero_pdf" and nombres["in/enero.jpg"] == "enero_jpg"
+    assert nombres["in/Enero.PNG"] == "Enero_png"
+    assert len({nombre.lower() for nombre in nombres.values()}) == len(rutas)
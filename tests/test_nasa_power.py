@@ -0,0 +1,42 @@
+"""Cliente de NASA POWER contra un servidor local: reintentos, timeouts y consultas concurrentes."""
+import functools
+import time
+
+from hsp.nasa_power import PERFIL_INTERACTIVO, PERFIL_LOTE, obtener_climatologia, obtener_climatologias
+
+
+def test_perfil_lote_reintenta_tras_503(servidor_nasa):
+    servidor_nasa.respuestas = [503]
+    hsp, temp, exito = obtener_climatologia(-2.2, -79.9, url_base=servidor_nasa.url, perfil=PERFIL_LOTE)
+    assert exito
+    assert hsp == [-2.2] * 12 and temp == [20.0] * 12
+    assert len(servidor_nasa.consultas) == 2
+
+
+def test_perfil_interactivo_no_reintenta_503(servidor_nasa):
+    servidor_nasa.respuestas = [503]
+    assert obtener_climatologia(-2.2, -79.9, url_base=servidor_nasa.url, perfil=PERFIL_INTERACTIVO) == (None, None, False)
+    assert len(servidor_nasa.consultas) == 1
+
+
+def test_timeout_de_lectura_interactivo_es_un_fallo_sin_reintento(servidor_nasa):
+    servidor_nasa.demora = 2.0
+    inicio = time.perf_counter()
+    resultado = obtener_climatologia(-2.2, -79.9, url_base=servidor_nasa.url, perfil=PERFIL_INTERACTIVO,
+                                     timeout=(1, 0.3))
+    transcurrido = time.perf_counter() - inicio
+    assert resultado == (None, None, False)
+    assert transcurrido < 1.0
+    assert len(servidor_nasa.consultas) == 1
+
+
+def test_varias_coordenadas_en_paralelo_y_en_orden(servidor_nasa):
+    servidor_nasa.demora = 0.3
+    coordenadas = [(-float(i), -79.0) for i in range(8)]
+    consultar = functools.partial(obtener_climatologia, url_base=servidor_nasa.url, perfil=PERFIL_LOTE)
+    inicio = time.perf_counter()
+    resultados = obtener_climatologias(coordenadas, hilos=8, consultar=consultar)
+    transcurrido = time.perf_counter() - inicio
+    assert [hsp[0] for hsp, _, exito in resultados if exito] == [lat for lat, _ in coordenadas]
+    assert transcurrido < 8 * 0.3 / 2  # en serie serían 2.4 s
+    assert sorted(servidor_nasa.consultas) == sorted(coordenadas)
@@ -0,0 +1,40 @@
+"""Las plantillas del PDF (hsp/plantillas.py) reproducen internos de fpdf2: un documento armado con
+fragmentos reutilizados debe ser idéntico, byte a byte, al que se dibuja de cero."""
+import re
+
+import pytest
+
+from hsp.calculos import calcular_propuesta
+from hsp.plantillas import CACHE_PLANTILLAS
+from hsp.propuesta_pdf import generar_pdf
+
+# Lo único que cambia entre dos generaciones del mismo documento: la fecha y el ID derivado de ella.
+_RE_FECHA = re.compile(rb"/CreationDate \(D:\d+Z?\)|/ID \[<[0-9A-Fa-f]+><[0-9A-Fa-f]+>\]")
+
+
+def _sin_fecha(pdf):
+    return _RE_FECHA.sub(b"", pdf)
+
+
+def _propuesta(nombre, tipo_proyecto, valores, formato_graficos):
+    meses = [f"15/{mes:02d}/2024" for mes in range(1, len(valores) + 1)]
+    propuesta = calcular_propuesta({"nombre_cliente": nombre, "tipo_proyecto": tipo_proyecto}, meses, valores)
+    propuesta["formato_graficos"] = formato_graficos
+    return propuesta
+
+
+@pytest.mark.parametrize("formato_graficos", ["png", "svg"])
+def test_pdf_con_plantillas_igual_al_dibujado_de_cero(formato_graficos):
+    primera = _propuesta("Cliente Uno", "Comercial", [900.0], formato_graficos)
+    segunda = _propuesta("Cliente Dos", "Residencial", [700.0, 810.0, 765.0], formato_graficos)
+
+    CACHE_PLANTILLAS.limpiar()
+    de_cero = generar_pdf(segunda)
+
+    CACHE_PLANTILLAS.limpiar()
+    generar_pdf(primera)  # graba los fragmentos fijos
+    reutilizados_antes = CACHE_PLANTILLAS.estadisticas()["reutilizados"]
+    con_plantillas = generar_pdf(segunda)
+
+    assert CACHE_PLANTILLAS.estadisticas()["reutilizados"] > reutilizados_antes
+    assert _sin_fecha(con_plantillas) == _sin_fecha(de_cero)